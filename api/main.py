@@ -24,6 +24,8 @@ from flask_cors import CORS
 
 # Application imports
 from routes import *
+from core import geometry_refresh, jobs, metadata_index, token_purge
+from core.lib import encr
 
 # If using Connexion API
 app = None
@@ -68,7 +70,21 @@ with flaskApp.app_context():
     """
     Init config
     """
-    pass
+
+    # Calibrate the password hashing cost on this CPU (before uWSGI forks the workers)
+    encr.calibrate()
+
+
+@flaskApp.before_request
+def _ensure_background_jobs():
+    """
+    Makes sure the background jobs are running in the current process (uWSGI forks the workers after loading).
+    """
+
+    token_purge.purge_job.ensure_started()
+    jobs.purge_job.ensure_started()
+    geometry_refresh.refresh_job.ensure_started()
+    metadata_index.harvest_job.ensure_started()
 
 
 @jwtMan.unauthorized_loader
@@ -5,22 +5,28 @@ End points:
  - /api/login (login) enables JWT authentication using username/password
  - /api/refresh (refresh) enables JWT re-authentication using a refresh token
  - /api/logout (logout) logs out the current User
- - /api/collections Adds (PUT) a Collection
+ - /api/collections Adds (PUT) a Collection, in a background job
+ - /api/collections:bulk Adds (POST) many Collections, the results being streamed as JSON lines
+ - /api/collections:validate Validates (POST) a Collection without adding it
+ - /api/jobs/{job_id} Gets the state of a background job
  - /api/collections/{collection} Deletes (DELETE) a Collection
  - /api/user Creates (POST) a User in the database
  - /api/user/{user} Updates (PATCH) or Deletes (DELETE) a User in the database
  - /api/metadata/<uuid> Gets metadata information from the FGP CSW Catalog in a Json format
+ - /api/metadata:batch Gets (POST) the metadata information of many uuids, streamed as JSON lines
+ - /api/metadata:autocomplete Finds the metadata records by their titles or keywords, in the local metadata index
  - /api/parents Gets the available Parents, grouped by Themes, for the Collections
+ - /api/extent:batch Gets (POST) the extents of many tables of the same database, streamed as JSON lines
+ - /api/stats Gets the runtime statistics of the API process
 """
 
 # 3rd party imports
-import requests, json
+import json
 from flask import request, current_app, jsonify
 from uuid import UUID
 
 # Application imports
-from core import config, user, auth, clip_zip_ship
-from core.geonetwork import GeoNetworkReader
+from core import config, user, auth, clip_zip_ship, jobs, metadata, metadata_index, monitoring
 from core.lib.exceptions import *
 from core.routes import rt_core
 from . import routes
@@ -108,6 +114,7 @@ def logout():
 def put_collections():
     """
     Handles a PUT request on end point "/api/collections" to add a Collection.
+     The Collection is added in a background job, followed up with "/api/jobs/<job_id>".
     """
 
     try:
@@ -117,11 +124,87 @@ def put_collections():
             d = d.decode()
             d = json.loads(d)
 
+        # Redirect, the collection is added in a background job
+        job_id = clip_zip_ship.add_collection_job(d)
+
+        # Respond
+        return rt_core.response_202({"job_id": job_id}, "/api/jobs/" + job_id)
+
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/collections:validate', methods=["POST"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def post_collections_validate():
+    """
+    Handles a POST request on end point "/api/collections:validate" to validate a Collection without adding it.
+     All the problems found are returned at once.
+    """
+
+    try:
+        # Redirect
+        return clip_zip_ship.validate_collection(request.get_json(force=True, silent=True))
+
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/collections:bulk', methods=["POST"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def post_collections_bulk():
+    """
+    Handles a POST request on end point "/api/collections:bulk" to add many Collections, sent as a JSON array or as
+     newline delimited JSON. The result of each Collection is streamed back, one JSON line per Collection.
+    """
+
+    try:
+        # Read the rows
+        rows = rt_core.read_json_rows()
+
         # Redirect
-        clip_zip_ship.add_collection(d)
+        results = clip_zip_ship.add_collections(rows)
+
+        # Stream the results, the errors being in the official payload
+        return rt_core.response_ndjson({k: rt_core.payload_user(v) if k == "error" and v else v for k, v in r.items()}
+                                       for r in results)
+
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/jobs/<job_id>', methods=["GET"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def get_job(job_id):
+    """
+    Handles a GET request on end point "/api/jobs/<job_id>" to return the state of a job.
+    """
+
+    try:
+        # Redirect
+        job = jobs.get_job(job_id)
+
+        # If failed, the error is in the official payload
+        if job["error"]:
+            job["error"] = rt_core.payload_user(job["error"])
 
         # Respond
-        return rt_core.response_201("")
+        return jsonify(job)
 
     except UserMessageException as err:
         # Handle the error for the User
@@ -163,16 +246,16 @@ def delete_collection(collection):
 @rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
 def patch_collection(collection):
     """
-    Handles a PATCH request on end point "/api/users" to update a user of the system.
+    Handles a PATCH request on end point "/api/collections/{collection}" to update a collection, telling whether its
+    geometry was refreshed.
     """
 
     try:
-        # Get the users
+        # Update the collection
         body = request.json
-        clip_zip_ship.update_collection(collection, body)
 
-        # Return 204
-        return rt_core.response_204()
+        # Return the result
+        return clip_zip_ship.update_collection(collection, body)
 
     except UserMessageException as err:
         # Handle the error for the User
@@ -197,14 +280,76 @@ def get_metadata(uuid):
                                        "Invalide UUID.",
                                        "UUID invalid.")
 
-        # Connect to GeoNetwork to get the XML
-        response = requests.get(config.CATALOG_URL.format(metadata_uuid=uuid))
+        # Get the metadata from the cache, or from GeoNetwork
+        return metadata.get_metadata(uuid)
 
-        # Create class
-        geonetwork = GeoNetworkReader(response.text)
-        
-        # Return the dictionary
-        return geonetwork.to_dict()
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/metadata:batch', methods=["POST"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def get_metadata_batch():
+    """
+    Handles a POST request on end point "/api/metadata:batch" to return the Metadata information of many uuids.
+     The records are streamed back, one JSON line per uuid, as they're read.
+    """
+
+    try:
+        # Read the data
+        d = request.data
+
+        if d:
+            d = d.decode()
+            d = json.loads(d)
+
+        # If the body isn't an object
+        if not isinstance(d, dict):
+            raise ParametersInvalidException()
+
+        # Redirect
+        results = metadata.get_metadata_batch(d.get("uuids"))
+
+        # Stream the results, the errors per uuid being in the official payload
+        return rt_core.response_ndjson({k: rt_core.payload_user(v) if k == "error" else v for k, v in r.items()}
+                                       for r in results)
+
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/metadata:autocomplete', methods=["GET"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def get_metadata_autocomplete(q: str = None, lang: str = None, limit: int = None):
+    """
+    Handles a GET request on end point "/api/metadata:autocomplete" to find the Metadata records whose titles or keywords
+     match a text (the q query parameter), in the local metadata index only.
+    """
+
+    try:
+        # Read the parameters
+        q = q or request.args.get("q")
+        lang = lang or request.args.get("lang")
+        limit = limit or request.args.get("limit")
+        try:
+            limit = int(limit) if limit else None
+
+        except ValueError:
+            # Parameters invalid
+            raise ParametersInvalidException()
+
+        # Redirect
+        return jsonify(metadata_index.autocomplete(q, lang, limit))
 
     except UserMessageException as err:
         # Handle the error for the User
@@ -220,11 +365,13 @@ def get_metadata(uuid):
 def get_parents():
     """
     Handles a GET request on end point "/api/parents" to return the Parents information.
+     The response has an ETag and is empty (304) when the client sends the ETag it already has in If-None-Match.
     """
 
     try:
         # Redirect
-        return clip_zip_ship.get_parents()
+        parents, etag = clip_zip_ship.get_parents_with_etag()
+        return rt_core.response_etag(parents, etag)
 
     except UserMessageException as err:
         # Handle the error for the User
@@ -293,9 +440,10 @@ def delete_parent(uuid):
 
 @routes.route('/api/extent/<schema>/<table_name>/<out_crs>', methods=["GET"], defaults={'schema': 'nrcan', 'table_name': None, 'out_crs': 4326})
 @rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
-def get_extent(schema: str, table_name: str, out_crs: int):
+def get_extent(schema: str, table_name: str, out_crs: int, mode: str = None):
     """
     Handles a GET request on end point "/api/extent/<table_name>" to return the Parents information.
+     The mode query parameter tells how to compute the extent (estimated, exact, auto or auto_analyze).
     """
 
     try:
@@ -306,8 +454,86 @@ def get_extent(schema: str, table_name: str, out_crs: int):
             d = d.decode()
             d = json.loads(d)
 
+        # If the connection information isn't an object or the spatial reference isn't an integer
+        if not isinstance(d, dict):
+            raise ParametersInvalidException()
+        try:
+            out_crs = int(out_crs)
+
+        except (TypeError, ValueError):
+            raise ParametersInvalidException()
+
+        # Read the mode
+        mode = mode or request.args.get("mode") or config.EXTENT_DEFAULT_MODE
+
+        # Redirect
+        info = clip_zip_ship.get_extent_info(schema, table_name, out_crs, d, mode)
+
+        # Respond, telling if the extent came from the cache, how it was computed and how long it took
+        return info["extent"], 200, {
+            "X-Cache": "HIT" if info["cache_hit"] else "MISS",
+            "X-Extent-Mode": info["mode"],
+            "Server-Timing": 'extent;dur=' + str(info["duration_ms"]) + ';desc="' + info["mode"] + '"'
+        }
+
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/extent:batch', methods=["POST"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def get_extents(mode: str = None):
+    """
+    Handles a POST request on end point "/api/extent:batch" to return the extents of many tables of the same database.
+     The extents are computed concurrently and streamed back, one JSON line per table, as they complete.
+    """
+
+    try:
+        # Read the data
+        d = request.data
+
+        if d:
+            d = d.decode()
+            d = json.loads(d)
+
+        # If the body isn't an object
+        if not isinstance(d, dict):
+            raise ParametersInvalidException()
+
+        # Read the mode
+        mode = mode or request.args.get("mode") or config.EXTENT_DEFAULT_MODE
+
+        # Redirect
+        results = clip_zip_ship.get_extents(d.get("tables"), d, mode)
+
+        # Stream the results, the errors per table being in the official payload
+        return rt_core.response_ndjson({k: rt_core.payload_user(v) if k == "error" else v for k, v in r.items()}
+                                       for r in results)
+
+    except UserMessageException as err:
+        # Handle the error for the User
+        rt_core.abort_user_message(err)
+
+    except Exception as err:
+        # Raise a generic error
+        rt_core.abort_error(err)
+
+
+@routes.route('/api/stats', methods=["GET"])
+@rt_core.validate_user_level(config.ROLE_LEVEL_ADMIN)
+def get_stats():
+    """
+    Handles a GET request on end point "/api/stats" to return the runtime statistics of the API process.
+    """
+
+    try:
         # Redirect
-        return clip_zip_ship.get_extent(schema, table_name, out_crs, d)
+        return monitoring.get_stats()
 
     except UserMessageException as err:
         # Handle the error for the User
@@ -0,0 +1,97 @@
+"""
+This script benchmarks the GeoNetworkReader backends ("xmltodict" and "stream") on metadata records.
+
+The records are read from files (GetRecordById responses) or fetched from the catalog by uuid. Each record can also be
+inflated, repeating its online resources, to see how the backends behave on records with large distribution sections.
+The script checks that both backends return the same to_dict() and reports their time and peak memory per record.
+
+Run from the root of the repository:
+    python bench/bench_geonetwork.py [--repeat 50] [--inflate 0] <file or uuid> [<file or uuid> ...]
+"""
+
+# Core modules
+import os, re, sys, time, argparse, statistics, tracemalloc
+
+# Run from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Application modules
+from core.geonetwork import GeoNetworkReader
+
+
+BACKENDS = ["xmltodict", "stream"]
+
+
+def load_record(source: str):
+    """
+    Loads a record from a file, or else from the catalog.
+
+    :param source: The path of a GetRecordById response, or the uuid of a record
+    :returns: The XML of the record, as text.
+    """
+
+    if os.path.isfile(source):
+        with open(source, "r", encoding="utf-8") as f:
+            return f.read()
+
+    # Fetch it
+    from core.catalog import catalog_client
+    return catalog_client.get_record(source)
+
+
+def inflate(xml_content: str, times: int):
+    """
+    Repeats the online resources of a record.
+
+    :param xml_content: The XML of the record
+    :param times: The number of copies of the online resources to add
+    :returns: The XML of the inflated record
+    """
+
+    onlines = re.findall(r"<gmd:onLine\b.*?</gmd:onLine>", xml_content, flags=re.S)
+    if not onlines or times <= 0:
+        return xml_content
+    return xml_content.replace(onlines[-1], onlines[-1] + "".join(onlines) * times, 1)
+
+
+def bench(xml_content: str, backend: str, repeat: int):
+    """
+    Reads a record repeatedly with a backend.
+
+    :returns: A tuple with the to_dict() of the record, the median time in milliseconds and the peak memory in KB.
+    """
+
+    # Time it
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = GeoNetworkReader(xml_content, backend).to_dict()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # Measure the memory once, tracing slows it down
+    tracemalloc.start()
+    GeoNetworkReader(xml_content, backend).to_dict()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, statistics.median(timings), peak / 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks the GeoNetworkReader backends.")
+    parser.add_argument("sources", nargs="+", help="GetRecordById response files or metadata uuids")
+    parser.add_argument("--repeat", type=int, default=50, help="number of reads per record and backend")
+    parser.add_argument("--inflate", type=int, default=0, help="copies of the online resources to add to each record")
+    args = parser.parse_args()
+
+    print(f"{'record':<40} {'size KB':>8} " + " ".join(f"{b + ' ms':>13} {b + ' KB':>13}" for b in BACKENDS) +
+          f" {'speedup':>8} {'identical':>9}")
+    for source in args.sources:
+        xml_content = inflate(load_record(source), args.inflate)
+
+        # Bench each backend
+        results = {b: bench(xml_content, b, args.repeat) for b in BACKENDS}
+        identical = results["xmltodict"][0] == results["stream"][0]
+        speedup = results["xmltodict"][1] / results["stream"][1]
+        print(f"{os.path.basename(source)[:40]:<40} {len(xml_content.encode('utf-8')) / 1024:>8.1f} " +
+              " ".join(f"{results[b][1]:>13.3f} {results[b][2]:>13.1f}" for b in BACKENDS) +
+              f" {speedup:>7.2f}x {str(identical):>9}")
@@ -0,0 +1,84 @@
+"""
+This script benchmarks the PathTrie against resolving the paths one by one (the GeoNetwork digging helpers).
+
+On synthetic documents, N fields sharing a common prefix are resolved both ways, for growing N, to show how the time
+scales with the number of fields. On records (GetRecordById response files), the fields of the data identification
+root read by the GeoNetworkReader are resolved both ways, checking both return the same nodes.
+
+Run from the root of the repository:
+    python bench/bench_path_trie.py [--repeat 2000] [--depth 5] [<file> ...]
+"""
+
+# Core modules
+import os, sys, argparse, timeit
+
+# 3rd party imports
+import xmltodict
+
+# Run from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Application modules
+from core import geonetwork
+from core.lib.path_trie import PathTrie
+
+
+FIELDS = [1, 2, 4, 8, 16, 32, 64]
+
+
+def synthetic(depth: int, fields: int):
+    """
+    Builds a document with fields leaves under a common prefix of depth nodes, and the paths to the leaves.
+
+    :returns: A tuple with the document and the paths by name
+    """
+
+    prefix = ["level" + str(i) for i in range(depth)]
+    leaves = {"field" + str(i): {"#text": str(i)} for i in range(fields)}
+    document = leaves
+    for key in reversed(prefix):
+        document = {key: [{"other": None}, document]}
+    return document, {name: prefix + [name] for name in leaves}
+
+
+def compare(document, paths: dict, repeat: int):
+    """
+    Resolves the paths one by one and with a PathTrie.
+
+    :returns: A tuple with the microseconds per resolution one by one and with the trie, and whether both found the
+              same nodes.
+    """
+
+    trie = PathTrie(paths)
+    one_by_one = lambda: {name: geonetwork._dig_node_all(document, keys) for name, keys in paths.items()}
+    identical = one_by_one() == trie.resolve(document)
+    t_one = timeit.timeit(one_by_one, number=repeat) / repeat * 1e6
+    t_trie = timeit.timeit(lambda: trie.resolve(document), number=repeat) / repeat * 1e6
+    return t_one, t_trie, identical
+
+
+def print_row(label: str, t_one: float, t_trie: float, identical: bool):
+    # Redirect
+    print(f"{label:<40} {t_one:>12.2f} {t_trie:>12.2f} {t_one / t_trie:>7.2f}x {str(identical):>9}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks the PathTrie against resolving the paths one by one.")
+    parser.add_argument("records", nargs="*", help="GetRecordById response files")
+    parser.add_argument("--repeat", type=int, default=2000, help="number of resolutions per measure")
+    parser.add_argument("--depth", type=int, default=5, help="depth of the common prefix of the synthetic paths")
+    args = parser.parse_args()
+
+    print(f"{'paths':<40} {'one by one us':>12} {'trie us':>12} {'speedup':>8} {'identical':>9}")
+
+    # Synthetic, growing number of fields
+    for fields in FIELDS:
+        print_row(f"synthetic, {fields} fields, depth {args.depth}",
+                  *compare(*synthetic(args.depth, fields), args.repeat))
+
+    # The data identification fields of the records
+    for record in args.records:
+        with open(record, "r", encoding="utf-8") as f:
+            document = xmltodict.parse(f.read())
+        root = geonetwork._dig_node_one(document, geonetwork._DATA_IDENTIFY_PATH)
+        print_row(os.path.basename(record)[:40], *compare(root, geonetwork._DATA_IDENTIFY_TRIE.paths, args.repeat))
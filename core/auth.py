@@ -14,6 +14,7 @@ from flask_jwt_extended import create_access_token, create_refresh_token, decode
 from core import config
 from core.lib.exceptions import *
 from core.db import db_conn
+from core.revoked_tokens import revoked_cache
 
 
 class User(object):
@@ -101,9 +102,14 @@ def logout():
 
     # Get the jwt_token
     jwt_token = get_jwt()
+    expiration_date = datetime.datetime.fromtimestamp(jwt_token["exp"])
 
-    # Revoke the token for real in the blacklist
-    return db_conn.add_token_revoked(jwt_token["jti"], datetime.datetime.fromtimestamp(jwt_token["exp"]))
+    # Revoke the token for real in the blacklist (the other processes are notified)
+    revoked = db_conn.add_token_revoked(jwt_token["jti"], expiration_date)
+
+    # Revoke it right away in the current process
+    revoked_cache.add(jwt_token["jti"], expiration_date)
+    return revoked
 
 
 def current_user():
@@ -143,6 +149,10 @@ def check_token_revoked(jwt_data_jti):
     :returns: True if the token has been revoked (if the user has logged out manually somewhere).
     """
 
+    # If using the local cache of revoked tokens
+    if config.TOKEN_REVOKED_CACHE_ENABLED:
+        return revoked_cache.is_revoked(jwt_data_jti)
+
     # Try to find the token in the revoked tokens in the database
     return db_conn.query_token_revoked(jwt_data_jti)
 
@@ -0,0 +1,188 @@
+"""
+This module handles the requests sent to the catalog (the FGP CSW GeoNetwork).
+
+The requests go through a pooled HTTP session (per process, keeping the connections alive) with connect and read
+timeouts. The failed requests (connection errors, timeouts, 5xx and 429 responses) are retried at most CATALOG_RETRIES
+times, after an exponential backoff with full jitter. A circuit breaker fails the requests right away while the catalog
+is deemed down, instead of holding the workers.
+"""
+
+# Core modules
+import os, time, random, threading
+
+# 3rd party imports
+import requests
+from requests.adapters import HTTPAdapter
+
+# Application modules
+from core import config
+from core.lib.exceptions import *
+from core.lib.circuit_breaker import CircuitBreaker
+
+
+class CatalogClient(object):
+    """
+    Class representing the client of the catalog for the current process.
+     The session is recreated in each forked process, because its connections can't be shared with the parent.
+    """
+
+    # The HTTP status codes worth retrying
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, url_template, pool_size, connect_timeout, read_timeout, retries, backoff, breaker):
+        """
+        Constructor
+
+        :param url_template: The GetRecordById URL of the catalog, with a {metadata_uuid} placeholder
+        :param pool_size: The maximum number of connections kept alive to the catalog
+        :param connect_timeout: The number of seconds to wait for a connection to the catalog
+        :param read_timeout: The number of seconds to wait for the catalog to answer
+        :param retries: The number of times a failed request is retried
+        :param backoff: The base number of seconds before retrying, doubled after each retry (with jitter)
+        :param breaker: The CircuitBreaker of the catalog
+        """
+        self.url_template = url_template
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._stats = {
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "last_error": None
+        }
+
+
+    def get_record(self, uuid: str):
+        """
+        Gets the metadata record (ISO 19139 XML) of a uuid.
+
+        :param uuid: The uuid of the metadata record
+        :returns: The XML of the record, as text.
+        :raises CatalogUnavailableException: Raised when the catalog couldn't be reached or is deemed down.
+        """
+
+        # Redirect
+        return self.get(self.url_template.format(metadata_uuid=uuid))
+
+
+    def get(self, url: str, params: dict = None):
+        """
+        Sends a GET request to the catalog, retrying when it fails.
+
+        :param url: The URL of the catalog
+        :param params: The query parameters, if any
+        :returns: The response, as text.
+        :raises CatalogUnavailableException: Raised when the catalog couldn't be reached or is deemed down.
+        :raises UserMessageException: Raised when the catalog refused the request (4xx).
+        """
+
+        # If the catalog is deemed down, fail fast
+        if not self.breaker.allow():
+            with self._lock:
+                self._stats["short_circuited"] += 1
+            raise CatalogUnavailableException()
+
+        response = None
+        try:
+            session = self._get_session()
+            for attempt in range(self.retries + 1):
+                # If retrying, wait a random time, up to a bit longer each time
+                if attempt > 0:
+                    with self._lock:
+                        self._stats["retries"] += 1
+                    time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+
+                started = time.perf_counter()
+                try:
+                    response = session.get(url, params=params, timeout=self.timeout)
+                    if response.status_code in CatalogClient.RETRY_STATUSES:
+                        raise requests.HTTPError(f"{response.status_code} from the catalog", response=response)
+
+                except requests.RequestException as err:
+                    response = None
+                    with self._lock:
+                        self._stats["last_error"] = str(err)
+                    continue
+
+                # The catalog answered
+                break
+
+        except BaseException:
+            # Whatever went wrong, settle the circuit (e.g. when it was the single half open probe)
+            self.breaker.record_failure()
+            raise
+
+        # If all attempts failed
+        if response is None:
+            print("catalog.get: " + self._stats["last_error"])
+            with self._lock:
+                self._stats["failures"] += 1
+            self.breaker.record_failure()
+            raise CatalogUnavailableException()
+
+        # The catalog answered
+        self._record_latency((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+
+        # If the catalog refused the request
+        if response.status_code >= 400:
+            raise UserMessageException(400,
+                                       f"The catalog refused the request ({response.status_code})",
+                                       f"Le catalogue a refusé la requête ({response.status_code})")
+        return response.text
+
+
+    def stats(self):
+        """
+        Gets the statistics of the client for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        with self._lock:
+            stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()}
+        stats["breaker"] = self.breaker.stats()
+        return stats
+
+
+    def _get_session(self):
+        """
+        Gets the session of the current process, creating it if needed.
+
+        :returns: The requests.Session
+        """
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # Never use the parent's connections
+                self._pid = os.getpid()
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+            self._stats["requests"] += 1
+            return self._session
+
+
+    def _record_latency(self, latency_ms: float):
+        # Keep the statistics
+        with self._lock:
+            self._stats["latency_ms_total"] += latency_ms
+            self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"], latency_ms)
+
+
+# Create the client which is GLOBAL (its session is created per process, on demand)
+catalog_client = CatalogClient(config.CATALOG_URL, config.CATALOG_POOL_SIZE, config.CATALOG_CONNECT_TIMEOUT_SECONDS,
+                               config.CATALOG_READ_TIMEOUT_SECONDS, config.CATALOG_RETRIES,
+                               config.CATALOG_RETRY_BACKOFF_SECONDS,
+                               CircuitBreaker("catalog", config.CATALOG_BREAKER_FAILURES,
+                                              config.CATALOG_BREAKER_RESET_SECONDS))
@@ -3,6 +3,11 @@ This module handles the NRCan business logic to work with the Quality metadata i
 """
 
 # Imports
+# Core modules
+import hashlib, threading, time, traceback, uuid
+from collections import OrderedDict
+from concurrent.futures import as_completed, wait
+
 # 3rd party imports
 from flask import json
 import requests, xmltodict, psycopg2
@@ -10,9 +15,43 @@ from dateutil import parser as date_parser
 import mimetypes
 
 # Application modules
-from core import config
+from core import config, footprint, jobs
 from core.lib.exceptions import *
-from core.db import db_conn
+from core.lib.bounded_executor import BoundedExecutor
+from core.db import db_conn, db_listen
+from core.pygeoapi import reload_notifier
+
+
+# The parents grouped by themes, cached for the current process, along with their ETag
+_parents_cache = {
+  "parents": None,
+  "etag": None,
+  "loaded": None
+}
+_parents_lock = threading.Lock()
+
+# The extents of the remote tables, cached for the current process (least recently used first)
+_extents_cache = OrderedDict()
+_extents_lock = threading.Lock()
+_extents_stats = {
+  "hits": 0,
+  "misses": 0
+}
+
+# The fields of a collection to add, per provider type
+_COLLECTION_FIELDS = {
+  "common": ["parent_uuid", "metadata_uuid", "name", "title_en", "title_fr", "description_en", "description_fr",
+             "keywords_en", "keywords_fr", "crs", "extent_bbox", "extent_crs", "extent_temporal_begin", "extent_temporal_end"],
+  "feature": ["table_name", "table_schema", "db_host", "db_port", "db_name", "db_user", "db_password",
+              "table_id_field", "table_queryables"],
+  "coverage": ["geom_wkt", "geom_crs", "cov_data", "cov_format_name"]
+}
+
+# The executor computing the extents of the batches, GLOBAL
+_extents_executor = BoundedExecutor("extent-batch", config.EXTENT_BATCH_WORKERS, config.EXTENT_BATCH_MAX_PENDING)
+
+# The executor running the checks of the collections to validate, GLOBAL
+_validate_executor = BoundedExecutor("collection-validate", config.COLLECTION_VALIDATE_WORKERS, config.COLLECTION_VALIDATE_MAX_PENDING)
 
 
 def get_parents():
@@ -21,7 +60,50 @@ def get_parents():
 
   :returns: The list of parents and themes.
   """
-  
+
+  # Redirect
+  return get_parents_with_etag()[0]
+
+
+def get_parents_with_etag():
+  """
+  Gets the parents from the cache of the current process, loading them when the cache is empty or expired.
+  The cache is invalidated when parents are added or deleted, by any process.
+
+  :returns: A tuple with the list of parents and themes and its ETag (a hash of the content).
+  """
+
+  # Make sure the listener thread is running in this process, to be told about the changes
+  db_listen.ensure_started()
+
+  with _parents_lock:
+    # If the cache is empty or expired
+    if _parents_cache["loaded"] is None or time.monotonic() - _parents_cache["loaded"] > config.PARENTS_CACHE_TTL_SECONDS:
+      # Load and hash
+      parents = _query_parents()
+      _parents_cache["parents"] = parents
+      _parents_cache["etag"] = hashlib.sha256(json.dumps(parents, sort_keys=True).encode('utf-8')).hexdigest()
+      _parents_cache["loaded"] = time.monotonic()
+
+    return _parents_cache["parents"], _parents_cache["etag"]
+
+
+def invalidate_parents(_payload=None):
+  """
+  Invalidates the parents cache of the current process.
+  """
+
+  with _parents_lock:
+    _parents_cache["loaded"] = None
+
+
+def _query_parents():
+  """
+  Queries the parents and groups them by theme.
+
+  :returns: The list of parents and themes.
+  """
+
   # Redirect
   records = db_conn.query_parents()
 
@@ -59,7 +141,7 @@ def get_parents():
     } for k, v in theme_parents.items()]
 
 
-def get_extent(schema: str, table_name: str, out_crs: int, data: dict):
+def get_extent(schema: str, table_name: str, out_crs: int, data: dict, mode: str = config.EXTENT_DEFAULT_MODE):
   """
   Gets the extent of the specified table in the specified spatial reference.
 
@@ -67,10 +149,39 @@ def get_extent(schema: str, table_name: str, out_crs: int, data: dict):
   :param table_name: The table name of the table to retrieve the extent of.
   :param out_crs: The spatial reference that we want the extent into.
   :param data: The dictionary containing the information to connect to the remote database.
+  :param mode: The way to compute the extent, one of config.EXTENT_MODES (see get_extent_info).
   :returns: The extent of the given spatial table.
   """
 
+  # Redirect
+  return get_extent_info(schema, table_name, out_crs, data, mode)["extent"]
+
+
+def get_extent_info(schema: str, table_name: str, out_crs: int, data: dict, mode: str = config.EXTENT_DEFAULT_MODE):
+  """
+  Gets the extent of the specified table in the specified spatial reference, from the cache of the current process
+  when the change signals of the table (rows modified, last analyze, size) haven't changed since it was computed.
+
+  :param schema: The schema name of the table to retrieve the extent of.
+  :param table_name: The table name of the table to retrieve the extent of.
+  :param out_crs: The spatial reference that we want the extent into.
+  :param data: The dictionary containing the information to connect to the remote database.
+  :param mode: The way to compute the extent: "estimated" from the table statistics (fast, but missing or stale
+               when the table isn't analyzed), "exact" over all the geometries, "auto" which estimates first and
+               falls back to exact, or "auto_analyze" which estimates first, falls back to exact within a time budget,
+               then to analyzing the table (which requires to own it).
+  :returns: A dictionary with the extent of the given spatial table, whether it came from the cache (cache_hit),
+            the mode which gave it (estimated, exact or analyzed) and the time it took (duration_ms).
+  """
+
+  started = time.perf_counter()
   try:
+    # If invalid mode
+    if mode not in config.EXTENT_MODES:
+        raise UserMessageException(400,
+                                   "Invalid extent mode: " + str(mode),
+                                   "Mode d'étendu spatial invalide: " + str(mode))
+
     # If no db_host
     if "db_host" not in data or not data["db_host"] or data["db_host"] == "":
         raise UserMessageException(500,
@@ -101,8 +212,43 @@ def get_extent(schema: str, table_name: str, out_crs: int, data: dict):
                                    "Database password not specified.",
                                    "Mot de passe de la base de données non spécifié.")
     
-    # Redirect
-    return db_conn.get_table_extent(schema, table_name, out_crs, data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"])
+    # The cache key, per remote table and credentials
+    conn_args = (data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"])
+    key = (data["db_host"], int(data["db_port"]), data["db_name"], data["db_user"],
+           hashlib.sha256(data["db_password"].encode('utf-8')).hexdigest(), schema, table_name, int(out_crs), mode)
+
+    # Read the change signals of the table, which is cheap
+    signal = db_conn.get_table_change_signal(schema, table_name, *conn_args)
+
+    with _extents_lock:
+      # If cached, unchanged and not expired
+      entry = _extents_cache.get(key)
+      if entry and signal is not None and entry["signal"] == signal and \
+         time.monotonic() - entry["cached"] <= config.EXTENT_CACHE_TTL_SECONDS:
+        _extents_cache.move_to_end(key)
+        _extents_stats["hits"] += 1
+        return {"extent": entry["extent"], "cache_hit": True, "mode": entry["mode"],
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+      _extents_stats["misses"] += 1
+
+    # Compute the extent
+    extent, mode_used = _compute_extent(schema, table_name, out_crs, conn_args, mode)
+
+    # If the table was analyzed, its change signals have changed
+    if mode_used == "analyzed":
+      signal = db_conn.get_table_change_signal(schema, table_name, *conn_args)
+
+    # If found, cache it
+    if extent and signal is not None:
+      with _extents_lock:
+        _extents_cache[key] = {"extent": extent, "mode": mode_used, "signal": signal, "cached": time.monotonic()}
+        _extents_cache.move_to_end(key)
+        while len(_extents_cache) > config.EXTENT_CACHE_MAX_ENTRIES:
+          _extents_cache.popitem(last=False)
+
+    return {"extent": extent, "cache_hit": False, "mode": mode_used,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3)}
 
   except UserMessageException as err:
     raise err
@@ -114,6 +260,153 @@ def get_extent(schema: str, table_name: str, out_crs: int, data: dict):
                                "Impossible de déterminer l'étendu spatial de la table: " + table_name)
 
 
+def get_extents(tables: list, data: dict, mode: str = config.EXTENT_DEFAULT_MODE):
+  """
+  Gets the extents of many tables of the same remote database, concurrently.
+  All the tables are admitted (or refused) before any extent is computed.
+
+  :param tables: The list of tables, each a dictionary with a schema, a table_name and an optional out_crs (4326).
+  :param data: The dictionary containing the information to connect to the remote database.
+  :param mode: The way to compute the extents, one of config.EXTENT_MODES (see get_extent_info).
+  :returns: A generator of dictionaries, in completion order, with the schema, table_name and out_crs of each table
+            along with either the extent information (see get_extent_info) or the UserMessageException (error).
+  :raises UserMessageException: Raised when the tables are invalid.
+  :raises ServiceBusyException: Raised when too many extents are already being computed.
+  """
+
+  # If no tables
+  if not tables:
+    raise UserMessageException(400,
+                               "No tables specified.",
+                               "Aucune table spécifiée.")
+
+  # If not a list
+  if not isinstance(tables, list):
+    raise ParametersInvalidException()
+
+  # If too many tables
+  if len(tables) > config.EXTENT_BATCH_MAX_TABLES:
+    raise UserMessageException(400,
+                               "Too many tables, the maximum is " + str(config.EXTENT_BATCH_MAX_TABLES) + ".",
+                               "Trop de tables, le maximum est " + str(config.EXTENT_BATCH_MAX_TABLES) + ".")
+
+  # Read the tables
+  items = []
+  for t in tables:
+    # If no schema or table name
+    if not isinstance(t, dict) or not t.get("schema") or not t.get("table_name"):
+      raise UserMessageException(400,
+                                 "Each table must have a schema and a table_name.",
+                                 "Chaque table doit avoir un schema et un table_name.")
+
+    # If the spatial reference isn't an integer
+    try:
+      out_crs = int(t.get("out_crs") or 4326)
+
+    except (TypeError, ValueError):
+      raise UserMessageException(400,
+                                 "Invalid out_crs: " + str(t.get("out_crs")),
+                                 "out_crs invalide: " + str(t.get("out_crs")))
+    items.append({"schema": t["schema"], "table_name": t["table_name"], "out_crs": out_crs})
+
+  # Admit all the tables
+  futures = {}
+  try:
+    for item in items:
+      futures[_extents_executor.submit(get_extent_info, item["schema"], item["table_name"], item["out_crs"], data, mode)] = item
+
+  except ExecutorFullException as err:
+    # Too many extents at the same time, give back what was admitted
+    for f in futures:
+      f.cancel()
+    raise ServiceBusyException() from err
+
+  def generate():
+    try:
+      # As they complete
+      for f in as_completed(futures):
+        res = dict(futures[f])
+        try:
+          res.update(f.result())
+
+        except UserMessageException as err:
+          res["error"] = err
+        yield res
+
+    finally:
+      # If the client went away, don't compute the rest
+      for f in futures:
+        f.cancel()
+
+  return generate()
+
+
+def _compute_extent(schema: str, table_name: str, out_crs: int, conn_args: tuple, mode: str):
+  """
+  Computes the extent of the table with the given mode.
+
+  :returns: A tuple with the extent and the mode which gave it (estimated, exact or analyzed).
+  """
+
+  # If exact
+  if mode == "exact":
+    return db_conn.get_table_extent(schema, table_name, out_crs, *conn_args, exact=True, timeout_ms=config.EXTENT_EXACT_TIMEOUT_MS), "exact"
+
+  # Estimate from the table statistics
+  try:
+    extent = db_conn.get_table_extent(schema, table_name, out_crs, *conn_args)
+
+  except psycopg2.Error:
+    # Depending on the PostGIS version, a table without statistics raises instead of returning nothing
+    if mode == "estimated":
+      raise
+    extent = None
+
+  # If estimated or only estimating
+  if extent or mode == "estimated":
+    return extent, "estimated"
+
+  # If not allowed to analyze the table, compute the exact extent
+  if mode == "auto":
+    return db_conn.get_table_extent(schema, table_name, out_crs, *conn_args, exact=True, timeout_ms=config.EXTENT_EXACT_TIMEOUT_MS), "exact"
+
+  # Compute the exact extent, within the time budget
+  try:
+    return db_conn.get_table_extent(schema, table_name, out_crs, *conn_args, exact=True, timeout_ms=config.EXTENT_AUTO_EXACT_BUDGET_MS), "exact"
+
+  except psycopg2.extensions.QueryCanceledError:
+    # Too big to be scanned in time
+    pass
+
+  # Gather the statistics of the table (opted in) and estimate again
+  db_conn.analyze_table(schema, table_name, *conn_args)
+  return db_conn.get_table_extent(schema, table_name, out_crs, *conn_args), "analyzed"
+
+
+def extents_cache_stats():
+  """
+  Gets the statistics of the extents cache for the current process.
+
+  :returns: A dictionary of statistics
+  """
+
+  with _extents_lock:
+    stats = dict(_extents_stats)
+    stats["size"] = len(_extents_cache)
+    return stats
+
+
+def extents_batch_stats():
+  """
+  Gets the statistics of the extents batch executor for the current process.
+
+  :returns: A dictionary of statistics
+  """
+
+  # Redirect
+  return _extents_executor.stats()
+
+
 def add_parent(data):
   """
   Adds a parent in the system.
@@ -130,7 +423,11 @@ def add_parent(data):
 
   try:
     # Redirect
-    return db_conn.add_parent(data["theme_uuid"], data["title_en"], data["title_fr"])
+    parent_uuid = db_conn.add_parent(data["theme_uuid"], data["title_en"], data["title_fr"])
+
+    # The other processes are notified, invalidate right away for this one
+    invalidate_parents()
+    return parent_uuid
 
   except psycopg2.DatabaseError as err:
     if err.pgcode == config.DB_PG_CODE:
@@ -152,7 +449,11 @@ def delete_parent(parent_uuid: str):
 
   try:
     # Redirect
-    return db_conn.delete_parent(parent_uuid)
+    deleted = db_conn.delete_parent(parent_uuid)
+
+    # The other processes are notified, invalidate right away for this one
+    invalidate_parents()
+    return deleted
 
   except psycopg2.DatabaseError as err:
     if err.pgcode == config.DB_PG_CODE:
@@ -163,6 +464,27 @@ def delete_parent(parent_uuid: str):
       raise
 
 
+def add_collection_job(data):
+  """
+  Validates what can be validated right away on a collection to add, then adds it in a background job
+  (see add_collection and the jobs module).
+
+  :param data: The Python dictionary holding all information on the collection to add (see add_collection).
+  :returns: The identifier of the job adding the collection
+  """
+
+  # Validate the collection, before anything expensive
+  errors = [p for p in validate_collection(data)["problems"] if p["severity"] == "error"]
+  if errors:
+    raise UserMessageException(400,
+                               "Invalid collection: " + " ".join(p["message"] for p in errors),
+                               "Collection invalide: " + " ".join(p["message_fr"] for p in errors))
+  _collection_call(data)
+
+  # Redirect
+  return jobs.submit("add_collection", data["name"], add_collection, data)
+
+
 def add_collection(data):
   """
   Adds a collection in the system.
@@ -196,6 +518,8 @@ def add_collection(data):
                 - db_password: the password for the user
                 - table_id_field: the field in the table which holds the identifier key
                 - table_queryables: the list of queryables fields in the table
+                - footprint_mode: optional, how to compute the geometry from the table, one of config.FOOTPRINT_MODES
+                - footprint_param: the tolerance (simplified), cell size (grid) or target percent (concave_hull)
 
                 For type=="coverage":
                 - geom_wkt: the geometry in well known text format
@@ -206,6 +530,455 @@ def add_collection(data):
   :returns: True when added
   """
 
+  # Read and validate the collection
+  proc_key, params = _collection_call(data)
+
+  try:
+    # Depending on the collection type
+    if proc_key == "ADD_COLLECTION_FEATURE":
+        # Read the fingerprint of the source table, before the footprint is computed
+        fingerprint = _source_fingerprint(_feature_source(data), None)
+
+        # Compute the footprint by partitions, if it's a union on a large table (else the database computes it)
+        footprint_mode, _ = _parse_footprint(data.get("footprint_mode"), data.get("footprint_param"))
+        footprint_geom, _ = footprint.compute(data["table_schema"], data["table_name"], footprint_mode,
+                                              (data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"]))
+
+        # Add feature collection
+        result = db_conn.add_collection_feature(*params, footprint_geom)
+
+        # Keep the fingerprint the geometry was computed at, for the next updates
+        db_conn.update_collection_fingerprint(data["name"], fingerprint, None)
+
+    else:
+        # Add coverage collection
+        result = db_conn.add_collection_coverage(*params)
+
+    # The collection has been added. Tell PyGeoAPI to hot-reload
+    reload_notifier.request_reload()
+
+    # Return the result of the adding of the collection
+    return result
+
+  except psycopg2.DatabaseError as err:
+    if err.pgcode == config.DB_PG_CODE:
+        raise _collection_error(err) from err
+    else:
+        raise
+
+
+def add_collections(rows: list):
+  """
+  Adds many collections in the system. All the rows are validated first, then the valid ones are added, each
+  committed on its own so that a collection failing to be added doesn't prevent the others. As with add_collection,
+  the fingerprint of the source table of a feature collection is read before it's added and recorded once committed,
+  and its footprint is computed by partitions when it's a union on a large table. PyGeoAPI is reloaded once, at the end.
+
+  :param rows: The list of Python dictionaries holding all information on the collections to add (see add_collection).
+  :returns: A generator of dictionaries, one per row in order, with the index, name and status (added, invalid or
+            failed) of the collection and, when not added, the UserMessageException (error). A collection is reported
+            added once committed. When the generator is closed early (e.g. the client went away), the collections
+            not reported yet aren't added.
+  :raises UserMessageException: Raised when there are no rows or too many rows.
+  """
+
+  # If no rows
+  if not rows:
+    raise UserMessageException(400,
+                               "No collections specified.",
+                               "Aucune collection spécifiée.")
+
+  # If too many rows
+  if len(rows) > config.COLLECTION_BULK_MAX_ROWS:
+    raise UserMessageException(400,
+                               "Too many collections, the maximum is " + str(config.COLLECTION_BULK_MAX_ROWS) + ".",
+                               "Trop de collections, le maximum est " + str(config.COLLECTION_BULK_MAX_ROWS) + ".")
+
+  # Validate all the rows up front
+  results = []
+  calls = []
+  names = set()
+  for i, data in enumerate(rows):
+    name = data.get("name") if isinstance(data, dict) else None
+    res = {"index": i, "name": name if isinstance(name, str) else None, "status": "invalid", "error": None}
+    try:
+      # If the name isn't a string
+      if isinstance(data, dict) and "name" in data and not isinstance(name, str):
+        raise UserMessageException(400,
+                                   "Collection name must be a string.",
+                                   "Le nom de la collection doit être une chaîne de caractères.")
+
+      # If the name is repeated in the rows
+      if res["name"] in names:
+        raise UserMessageException(400,
+                                   "Collection name repeated: " + str(res["name"]),
+                                   "Nom de collection répété: " + str(res["name"]))
+
+      calls.append(_collection_call(data))
+      names.add(res["name"])
+      res["status"] = None
+
+    except UserMessageException as err:
+      res["error"] = err
+    results.append(res)
+
+  # The fingerprints of the source tables, read right before each feature collection is added
+  fingerprints = {}
+
+  def prepare():
+    for res, (proc_key, params) in zip([r for r in results if r["status"] is None], calls):
+      # If a feature collection
+      if proc_key == "ADD_COLLECTION_FEATURE":
+        data = rows[res["index"]]
+        try:
+          # Read the fingerprint of its source table, before the footprint is computed
+          fingerprints[res["index"]] = _source_fingerprint(_feature_source(data), None)
+
+          # Compute the footprint by partitions, if it's a union on a large table (else the database computes it)
+          footprint_geom, _ = footprint.compute(data["table_schema"], data["table_name"], params[-2],
+                                                (data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"]))
+          params = params + (footprint_geom,)
+
+        except UserMessageException as err:
+          # This collection can't be added, tell it in its turn
+          yield err
+          continue
+      yield proc_key, params
+
+  def generate():
+    added = 0
+    outcomes = db_conn.add_collections(prepare())
+    try:
+      for res in results:
+        # If valid, add it (committed when the outcome comes)
+        if res["status"] is None:
+          err = next(outcomes)
+          if isinstance(err, UserMessageException):
+            # It couldn't be prepared (e.g. the union of its footprint failed)
+            res["status"] = "failed"
+            res["error"] = err
+
+          elif err is None:
+            res["status"] = "added"
+            added += 1
+
+            # If a feature collection, keep the fingerprint the geometry was computed at, for the next updates
+            if res["index"] in fingerprints:
+              _record_fingerprint(res["name"], fingerprints[res["index"]])
+
+          else:
+            res["status"] = "failed"
+            res["error"] = _collection_error(err) if err.pgcode == config.DB_PG_CODE else \
+                           UserMessageException(500, "Internal error", "Erreur interne")
+        yield res
+
+    finally:
+      # Release the connection, the rows not tried aren't added
+      outcomes.close()
+
+      # If collections have been added, even if the client went away, tell PyGeoAPI to hot-reload
+      if added:
+        reload_notifier.request_reload()
+
+  return generate()
+
+
+def validate_collection(data):
+  """
+  Validates a collection to add without adding it (dry run). The cheap checks run right away and the ones needing a
+  database (name uniqueness, parent existence, source table, id field, queryables and spatial index) run concurrently
+  within COLLECTION_VALIDATE_BUDGET_MS, the ones not done in time being reported as warnings.
+
+  :param data: The Python dictionary holding all information on the collection to add (see add_collection).
+  :returns: A dictionary with valid (no errors), the problems, each with its check, severity (error or warning) and
+            message in English and French, and the duration in milliseconds.
+  :raises ServiceBusyException: Raised when too many checks are already running.
+  """
+
+  started = time.perf_counter()
+  problems = []
+
+  # If not an object or the provider type is invalid, nothing else can be checked
+  if not isinstance(data, dict) or data.get("type") not in ("feature", "coverage"):
+    try:
+      _collection_call(data)
+
+    except UserMessageException as err:
+      problems.append(_problem("fields", "error", err.message, err.message_fr))
+    return {"valid": False, "problems": problems, "duration_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+  # If fields are missing
+  missing = [f for f in _COLLECTION_FIELDS["common"] + _COLLECTION_FIELDS[data["type"]] if f not in data]
+  if missing:
+    problems.append(_problem("fields", "error",
+                             "Collection fields missing: " + ", ".join(missing),
+                             "Champs de la collection manquants: " + ", ".join(missing)))
+
+  # The checks needing a database, run concurrently
+  checks = []
+  if data.get("name"):
+    checks.append(("name", _check_name, data))
+  if data.get("parent_uuid"):
+    checks.append(("parent", _check_parent, data))
+  if data["type"] == "feature" and all(data.get(f) for f in ["table_schema", "table_name", "db_host", "db_port", "db_name", "db_user", "db_password"]):
+    checks.append(("table", _check_table, data))
+
+  futures = []
+  try:
+    for check in checks:
+      futures.append(_validate_executor.submit(check[1], check[2]))
+
+  except ExecutorFullException as err:
+    # Too many checks at the same time, give back what was admitted
+    for f in futures:
+      f.cancel()
+    raise ServiceBusyException() from err
+
+  # The cheap checks, meanwhile
+  for key in ["extent_temporal_begin", "extent_temporal_end"]:
+    try:
+      _parse_temporal_extent({"extent_temporal_begin": None, "extent_temporal_end": None, key: data.get(key)})
+
+    except UserMessageException as err:
+      problems.append(_problem("temporal_extent", "error", err.message, err.message_fr))
+
+  if data["type"] == "feature":
+    try:
+      _parse_footprint(data.get("footprint_mode"), data.get("footprint_param"))
+
+    except UserMessageException as err:
+      problems.append(_problem("footprint", "error", err.message, err.message_fr))
+
+  # Wait for the checks, within the budget
+  wait(futures, timeout=config.COLLECTION_VALIDATE_BUDGET_MS / 1000)
+  for (check, _, _), f in zip(checks, futures):
+    # If not done in time
+    if not f.done():
+      f.cancel()
+      problems.append(_problem(check, "warning",
+                               "The " + check + " couldn't be checked in time.",
+                               "La vérification '" + check + "' n'a pu être faite à temps."))
+
+    elif f.exception():
+      # If the check couldn't be done
+      err = f.exception()
+      if isinstance(err, UserMessageException):
+        problems.append(_problem(check, "warning", err.message, err.message_fr))
+
+      elif isinstance(err, psycopg2.errors.QueryCanceled):
+        problems.append(_problem(check, "warning",
+                                 "The " + check + " couldn't be checked in time.",
+                                 "La vérification '" + check + "' n'a pu être faite à temps."))
+
+      else:
+        problems.append(_problem(check, "error",
+                                 "Unable to check the " + check + ": " + str(err).strip(),
+                                 "Impossible de vérifier '" + check + "': " + str(err).strip()))
+
+    else:
+      problems.extend(f.result())
+
+  return {"valid": not any(p["severity"] == "error" for p in problems),
+          "problems": problems,
+          "duration_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
+def _check_name(data):
+  # If the name is already taken
+  if db_conn.query_collection_exists(data["name"]):
+    return [_problem("name", "error",
+                     "Collection Name " + str(data["name"]) + " already exists.",
+                     "Le nom de collection " + str(data["name"]) + " existe déjà.")]
+  return []
+
+
+def _check_parent(data):
+  # If the parent doesn't exist
+  try:
+    parent_uuid = str(uuid.UUID(str(data["parent_uuid"])))
+
+  except ValueError:
+    parent_uuid = None
+
+  if not parent_uuid or not db_conn.query_parent_exists(parent_uuid):
+    return [_problem("parent", "error",
+                     "Parent " + str(data["parent_uuid"]) + " not found.",
+                     "Parent " + str(data["parent_uuid"]) + " introuvable.")]
+  return []
+
+
+def _check_table(data):
+  table_full = str(data["table_schema"]) + "." + str(data["table_name"])
+  info = db_conn.get_table_columns_info(data["table_schema"], data["table_name"], config.COLLECTION_VALIDATE_BUDGET_MS,
+                                        data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"])
+
+  # If the table doesn't exist, or can't be read
+  if not info["exists"]:
+    return [_problem("table", "error",
+                     "Table " + table_full + " not found in the specified database connection.",
+                     "Table " + table_full + " introuvable dans la connexion de base de données spécifiée.")]
+
+  if not info["readable"]:
+    return [_problem("table", "error",
+                     "Table " + table_full + " can't be read by the specified user.",
+                     "La table " + table_full + " ne peut être lue par l'utilisateur spécifié.")]
+
+  problems = []
+  columns = info["columns"]
+
+  # If the id field doesn't exist
+  if data.get("table_id_field") and data["table_id_field"] not in columns:
+    problems.append(_problem("id_field", "error",
+                             "Data ID Field " + str(data["table_id_field"]) + " not found in the table.",
+                             "Champ d'identifiant " + str(data["table_id_field"]) + " introuvable dans la table."))
+
+  # If queryables don't exist
+  missing = [q.strip() for q in data.get("table_queryables") or [] if isinstance(q, str) and q.strip() and q.strip() not in columns]
+  if missing:
+    problems.append(_problem("queryables", "error",
+                             "Queryables not found in the table: " + ", ".join(missing),
+                             "Champs interrogeables introuvables dans la table: " + ", ".join(missing)))
+
+  # If no geometry column, or no spatial index on it
+  geom_columns = [name for name, c in columns.items() if c["type"].startswith("geometry")]
+  if not geom_columns:
+    problems.append(_problem("geometry", "error",
+                             "No geometry column in the table.",
+                             "Aucune colonne de géométrie dans la table."))
+
+  elif not any(columns[name]["spatial_index"] for name in geom_columns):
+    problems.append(_problem("spatial_index", "warning",
+                             "No spatial index on the geometry column " + geom_columns[0] + ", the extractions will be slow.",
+                             "Aucun index spatial sur la colonne de géométrie " + geom_columns[0] + ", les extractions seront lentes."))
+  return problems
+
+
+def _problem(check: str, severity: str, message: str, message_fr: str):
+  # Redirect
+  return {"check": check, "severity": severity, "message": message, "message_fr": message_fr}
+
+
+def _collection_call(data):
+  """
+  Reads and validates a collection to add.
+
+  :param data: The Python dictionary holding all information on the collection to add (see add_collection).
+  :returns: A tuple with the key of the stored procedure adding the collection and its parameters.
+  :raises UserMessageException: Raised when the collection is invalid.
+  """
+
+  # If not an object
+  if not isinstance(data, dict):
+    raise UserMessageException(400,
+                               "Collection must be an object.",
+                               "La collection doit être un objet.")
+
+  # If the provider type is invalid
+  if data.get("type") not in ("feature", "coverage"):
+    raise UserMessageException(500,
+                               "Collection provider type invalid.",
+                               "Type de fournisseur de collection invalide.")
+
+  # If a field is missing
+  missing = [f for f in _COLLECTION_FIELDS["common"] + _COLLECTION_FIELDS[data["type"]] if f not in data]
+  if missing:
+    raise UserMessageException(400,
+                               "Collection fields missing: " + ", ".join(missing),
+                               "Champs de la collection manquants: " + ", ".join(missing))
+
+  # Read the temporal extent
+  date_extent_temporal_begin, date_extent_temporal_end = _parse_temporal_extent(data)
+
+  # Depending on the collection type
+  if data["type"] == "feature":
+    # Massage the inputs
+    data_queryables = data["table_queryables"] or []
+    data_queryables = [d.strip() for d in data_queryables]
+    data_queryables = list(filter(lambda d: len(d) > 0, data_queryables))
+
+    # Read the footprint
+    footprint_mode, footprint_param = _parse_footprint(data.get("footprint_mode"), data.get("footprint_param"))
+
+    # The feature collection
+    return "ADD_COLLECTION_FEATURE", (data["parent_uuid"], data["metadata_uuid"], data["name"], data["title_en"], data["title_fr"], data["description_en"], data["description_fr"], data["keywords_en"], data["keywords_fr"], data["crs"],
+                                      'feature', 'PostgreSQL',
+                                      data["extent_bbox"], data["extent_crs"], date_extent_temporal_begin, date_extent_temporal_end,
+                                      'text/html', 'canonical', 'Metadata Record - Open Canada Portal', 'https://open.canada.ca/data/en/dataset/' + data["metadata_uuid"], 'en-CA',
+                                      data["table_name"], data["table_id_field"], data_queryables, data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"], [data["table_schema"]],
+                                      footprint_mode, footprint_param)
+
+  else:
+    # Guess the mime/type
+    mimetype, encoding = mimetypes.guess_type(data["cov_data"])
+
+    # The coverage collection
+    return "ADD_COLLECTION_COVERAGE", (data["parent_uuid"], data["metadata_uuid"], data["name"], data["title_en"], data["title_fr"], data["description_en"], data["description_fr"], data["keywords_en"], data["keywords_fr"], data["crs"],
+                                       'coverage', 'rasterio',
+                                       data["extent_bbox"], data["extent_crs"], date_extent_temporal_begin, date_extent_temporal_end, data["geom_wkt"], data["geom_crs"],
+                                       'text/html', 'canonical', 'Metadata Record - Open Canada Portal', 'https://open.canada.ca/data/en/dataset/' + data["metadata_uuid"], 'en-CA',
+                                       data["cov_data"], data["cov_format_name"], mimetype)
+
+
+def _parse_footprint(footprint_mode, footprint_param):
+  """
+  Reads and validates the footprint mode of a feature collection.
+
+  :param footprint_mode: The footprint mode, one of config.FOOTPRINT_MODES, None for the default one
+  :param footprint_param: The parameter of the footprint mode
+  :returns: A tuple with the footprint mode and its parameter.
+  :raises UserMessageException: Raised when the footprint mode or its parameter is invalid.
+  """
+
+  footprint_mode = footprint_mode or config.FOOTPRINT_DEFAULT_MODE
+
+  # If the mode is invalid
+  if footprint_mode not in config.FOOTPRINT_MODES:
+    raise UserMessageException(400,
+                               "Invalid footprint mode: " + str(footprint_mode),
+                               "Mode d'empreinte invalide: " + str(footprint_mode))
+
+  # If the parameter is invalid
+  if footprint_param is not None and (isinstance(footprint_param, bool) or not isinstance(footprint_param, (int, float)) or footprint_param <= 0):
+    raise UserMessageException(400,
+                               "Invalid footprint parameter: " + str(footprint_param),
+                               "Paramètre d'empreinte invalide: " + str(footprint_param))
+
+  # If the mode needs a parameter (tolerance, cell size)
+  if footprint_mode in ("simplified", "grid") and footprint_param is None:
+    raise UserMessageException(400,
+                               "The footprint mode " + footprint_mode + " needs a footprint parameter.",
+                               "Le mode d'empreinte " + footprint_mode + " nécessite un paramètre d'empreinte.")
+
+  # If the target percent of the concave hull isn't a percent
+  if footprint_mode == "concave_hull" and footprint_param is not None and footprint_param > 1:
+    raise UserMessageException(400,
+                               "The footprint parameter of the concave_hull mode must be between 0 and 1.",
+                               "Le paramètre d'empreinte du mode concave_hull doit être entre 0 et 1.")
+
+  return footprint_mode, footprint_param
+
+
+def _collection_error(err):
+  """
+  Creates the error for the User from a validation error raised by the stored procedures adding a collection.
+
+  :param err: The :class:`~psycopg2.DatabaseError` raised with the DB_PG_CODE
+  :returns: A :class:`~lib.exceptions.UserMessageException` object
+  """
+
+  return UserMessageException(500,
+                              "Error adding the collection: " + err.diag.message_primary,
+                              "Erreur lors de l'ajout de la collection: " + err.diag.message_primary)
+
+
+def _parse_temporal_extent(data):
+  """
+  Reads the temporal extent of a collection to add.
+
+  :param data: The Python dictionary holding all information on the collection to add (see add_collection).
+  :returns: A tuple with the begin and end dates, as strings, or None when not specified.
+  """
+
   # If an extent_temporal_begin is specified
   date_extent_temporal_begin = None
   if data["extent_temporal_begin"]:
@@ -230,71 +1003,143 @@ def add_collection(data):
                                    "Invalid temporal extent end.",
                                    "Étendu temporel de fin invalide.")
 
-  # Depending on the collection type
-  result = None
-  try:
-    if data["type"] == "feature":
-        # Massage the inputs
-        data_queryables = data["table_queryables"] or []
-        data_queryables = [d.strip() for d in data_queryables]
-        data_queryables = list(filter(lambda d: len(d) > 0, data_queryables))
+  return date_extent_temporal_begin, date_extent_temporal_end
 
-        # Add feature collection
-        result = db_conn.add_collection_feature(data["parent_uuid"], data["metadata_uuid"], data["name"], data["title_en"], data["title_fr"], data["description_en"], data["description_fr"], data["keywords_en"], data["keywords_fr"], data["crs"],
-                                               'feature', 'PostgreSQL', 
-                                               data["extent_bbox"], data["extent_crs"], date_extent_temporal_begin, date_extent_temporal_end,
-                                               'text/html', 'canonical', 'Metadata Record - Open Canada Portal', 'https://open.canada.ca/data/en/dataset/' + data["metadata_uuid"], 'en-CA',
-                                               data["table_name"], data["table_id_field"], data_queryables, data["db_host"], data["db_port"], data["db_name"], data["db_user"], data["db_password"], [data["table_schema"]])
 
-    elif data["type"] == "coverage":
-        # Guess the mime/type
-        mimetype, encoding = mimetypes.guess_type(data["cov_data"])
+def update_collection(coll_name: str, body_patch, reload: bool = True):
+  """
+  Updates a collection. The geometry is refreshed only when the source table has changed since the last update
+  (according to its fingerprint), when the footprint mode changes or when forced.
 
-        # Add coverage collection
-        result = db_conn.add_collection_coverage(data["parent_uuid"], data["metadata_uuid"], data["name"], data["title_en"], data["title_fr"], data["description_en"], data["description_fr"], data["keywords_en"], data["keywords_fr"], data["crs"],
-                                                'coverage', 'rasterio', 
-                                                data["extent_bbox"], data["extent_crs"], date_extent_temporal_begin, date_extent_temporal_end, data["geom_wkt"], data["geom_crs"],
-                                                'text/html', 'canonical', 'Metadata Record - Open Canada Portal', 'https://open.canada.ca/data/en/dataset/' + data["metadata_uuid"], 'en-CA',
-                                                data["cov_data"], data["cov_format_name"], mimetype)
+  :param coll_name: The collection name to update.
+  :param body_patch: The Python dictionary representing the information to update.
+               
+                     Properties in body_patch are:
+                      - geometry: True when the geometry must be updated
+                      - force: True to update the geometry even if the source table hasn't changed
+                      - change_column: optional, the column of the source table whose greatest value changes when
+                        the table changes (e.g. updated_at), "" to rely on the table statistics only
+                      - footprint_mode: optional, the footprint mode to compute the geometry with from now on
+                      - footprint_param: the parameter of the footprint mode
 
-    else:
-        raise UserMessageException(500,
-                                   "Collection provider type invalid.",
-                                   "Type de fournisseur de collection invalide.")
+  :param reload: False to leave the PyGeoAPI reload to the caller (e.g. once at the end of many updates)
+  :returns: A dictionary with the collection, whether the geometry was refreshed, the reason (not_requested,
+            unchanged, changed, forced or footprint_changed), the duration in milliseconds and the number of bytes
+            of geometry transferred from the source database
+  """
 
-    # The collection has been added. Tell PyGeoAPI to hot-reload
-    response = requests.get(config.PYGEOAPI_URL)
+  started = time.perf_counter()
+  result = {"collection": coll_name, "refreshed": False, "reason": "not_requested", "duration_ms": None, "bytes": 0}
 
-    # Return the result of the adding of the collection
-    return result
+  # If updating the geometry
+  if ("geometry" in body_patch and body_patch["geometry"]) or body_patch.get("footprint_mode"):
+    # Read the footprint, if changing it
+    footprint_mode, footprint_param = None, None
+    if body_patch.get("footprint_mode"):
+      footprint_mode, footprint_param = _parse_footprint(body_patch["footprint_mode"], body_patch.get("footprint_param"))
+
+    # Read the source table of the collection and its current fingerprint
+    source = next(iter(db_conn.query_collection_sources(coll_name)), None)
+    change_column = source["change_column"] if source else None
+    if "change_column" in body_patch:
+      change_column = body_patch["change_column"] or None
+    fingerprint = _source_fingerprint(source, change_column) if source else None
+
+    # Why refresh
+    if footprint_mode:
+      result["reason"] = "footprint_changed"
+
+    elif body_patch.get("force"):
+      result["reason"] = "forced"
+
+    elif fingerprint is None or fingerprint != source["source_fingerprint"]:
+      result["reason"] = "changed"
 
-  except psycopg2.DatabaseError as err:
-    if err.pgcode == config.DB_PG_CODE:
-        raise UserMessageException(500,
-                                   "Error adding the collection: " + err.diag.message_primary,
-                                   "Erreur lors de l'ajout de la collection: " + err.diag.message_primary) from err
     else:
-        raise
+      # Nothing changed, nothing to do
+      result["reason"] = "unchanged"
+      result["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+      return result
+
+    # Compute the footprint by partitions, if it's a union on a large table (else the database computes it)
+    footprint_geom = None
+    if source:
+      footprint_geom, result["bytes"] = footprint.compute(source["schema"], source["table_name"], footprint_mode or source["footprint_mode"],
+                                                          (source["db_host"], source["db_port"], source["db_name"], source["db_user"], source["db_password"]))
+
+    # Update the geometry
+    updated = db_conn.update_collection_geom(coll_name, footprint_mode, footprint_param, footprint_geom)
 
+    # If updated, keep the fingerprint it was computed at and tell PyGeoAPI to hot-reload
+    if updated:
+      if source:
+        db_conn.update_collection_fingerprint(coll_name, fingerprint, change_column)
 
-def update_collection(coll_name: str, body_patch):
+      # If computed by the database, the footprint itself came from the source database
+      if footprint_geom is None:
+        result["bytes"] = db_conn.query_collection_geom_size(coll_name)
+      if reload:
+        reload_notifier.request_reload()
+    result["refreshed"] = updated
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+  return result
+
+
+def _feature_source(data: dict):
   """
-  Updates a collection.
+  Gets the source table of a feature collection to add.
+
+  :param data: The Python dictionary holding all information on the collection to add (see add_collection).
+  :returns: The source table of the collection, as in DBConnection.query_collection_sources
+  """
+
+  # Redirect
+  return {"schema": data["table_schema"], "table_name": data["table_name"], "db_host": data["db_host"], "db_port": data["db_port"],
+          "db_name": data["db_name"], "db_user": data["db_user"], "db_password": data["db_password"]}
 
-  :param coll_name: The collection name to update.
-  :param body_patch: The Python dictionary representing the information to update.
-               
-                     Properties in body_patch are:
-                      - geometry: True when the geometry must be updated
 
-  :returns: True when updated
+def _record_fingerprint(coll_name: str, fingerprint: str):
+  """
+  Records the fingerprint of the source table of a collection just added. When it can't be recorded, the collection
+  is added anyways, its next geometry update will just not be skipped.
   """
 
-  # If updating the geometry
-  if "geometry" in body_patch and body_patch["geometry"]:
-    # Update the geometry
-    return db_conn.update_collection_geom(coll_name)
-  return True
+  try:
+    db_conn.update_collection_fingerprint(coll_name, fingerprint, None)
+
+  except psycopg2.Error:
+    traceback.print_exc()
+
+
+def _source_fingerprint(source: dict, change_column: str):
+  """
+  Computes the fingerprint of the source table of a feature collection, which changes when the table content changes.
+
+  :param source: The source table of the collection (see DBConnection.query_collection_sources)
+  :param change_column: The column whose greatest value changes when the table changes, None to rely on the statistics
+  :returns: The fingerprint, or None when it couldn't be read (the table is then considered changed)
+  """
+
+  try:
+    # Read the change signals of the table, which is cheap
+    signal = db_conn.get_table_fingerprint_signal(source["schema"], source["table_name"], change_column,
+                                                  source["db_host"], source["db_port"], source["db_name"],
+                                                  source["db_user"], source["db_password"])
+
+  except psycopg2.errors.UndefinedColumn as err:
+    # The change column doesn't exist
+    raise UserMessageException(400,
+                               "Change column not found in the source table: " + str(change_column),
+                               "Colonne de changement introuvable dans la table source: " + str(change_column)) from err
+
+  except psycopg2.Error:
+    traceback.print_exc()
+    return None
+
+  # If the table wasn't found
+  if signal is None:
+    return None
+  return hashlib.sha256(repr((change_column,) + signal).encode('utf-8')).hexdigest()
 
 
 def delete_collection(coll_name: str):
@@ -307,6 +1152,14 @@ def delete_collection(coll_name: str):
   """
 
   # Redirect
-  return db_conn.delete_collection(coll_name)
+  deleted = db_conn.delete_collection(coll_name)
+
+  # If deleted, tell PyGeoAPI to hot-reload
+  if deleted:
+    reload_notifier.request_reload()
+  return deleted
 
 
+# Keep the parents cache in sync with the changes made by the other processes
+db_listen.subscribe(config.PARENTS_NOTIFY_CHANNEL, invalidate_parents)
+db_listen.on_connect(invalidate_parents)
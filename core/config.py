@@ -2,7 +2,7 @@
 This module stores all configurations used by this application.
 """
 
-import sys, getopt
+import os, sys, getopt
 
 
 # Environment variables
@@ -18,12 +18,111 @@ DB_PASS = {{DB_PASS}}
 DB_SCHEMA = {{DB_SCHEMA}}
 DB_PG_CODE = "XXQUA"
 
+# Database connection pool variables (the pool is per process)
+DB_POOL_MIN_SIZE = 1
+DB_POOL_MAX_SIZE = 10
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = 10
+DB_POOL_IDLE_TIMEOUT_SECONDS = 300
+DB_POOL_HEALTH_CHECK_AFTER_SECONDS = 30
+
+# Remote (source) databases connection pools variables, one pool per host/port/database/user/password (per process)
+REMOTE_DB_POOL_MAX_POOLS = 20
+REMOTE_DB_POOL_MAX_SIZE = 4
+REMOTE_DB_POOL_MAX_PER_HOST = 8
+REMOTE_DB_POOL_CHECKOUT_TIMEOUT_SECONDS = 10
+REMOTE_DB_POOL_IDLE_TIMEOUT_SECONDS = 120
+REMOTE_DB_POOL_HEALTH_CHECK_AFTER_SECONDS = 30
+REMOTE_DB_CONNECT_TIMEOUT_SECONDS = 10
+
+# Database notifications (LISTEN/NOTIFY) variables. The listener thread also polls every DB_LISTEN_POLL_SECONDS
+DB_LISTEN_POLL_SECONDS = 5
+DB_LISTEN_RETRY_SECONDS = 5
+
+# Parents cache variables. The cache is invalidated by notifications and expires after the TTL in any case.
+PARENTS_CACHE_TTL_SECONDS = 300
+PARENTS_NOTIFY_CHANNEL = "czs_parents_changed"
+
+# Extents cache variables. An extent is recomputed when the change signals of the remote table change, or past the TTL.
+EXTENT_CACHE_MAX_ENTRIES = 500
+EXTENT_CACHE_TTL_SECONDS = 3600
+
+# Extent modes variables. In auto mode, the extent is estimated, else computed exactly. The auto_analyze mode (opt-in,
+# ANALYZE takes locks on the source table and requires its owner) computes it exactly within the budget only, else
+# analyzes the table and estimates the extent again.
+EXTENT_MODES = ["estimated", "exact", "auto", "auto_analyze"]
+EXTENT_DEFAULT_MODE = "auto"
+EXTENT_AUTO_EXACT_BUDGET_MS = 3000
+EXTENT_EXACT_TIMEOUT_MS = 60000
+
+# Extents batch variables (per process). Keep the workers at or below REMOTE_DB_POOL_MAX_SIZE.
+EXTENT_BATCH_MAX_TABLES = 100
+EXTENT_BATCH_WORKERS = 4
+EXTENT_BATCH_MAX_PENDING = 200
+
 # Catalog URL
 CATALOG_URL = "https://maps.canada.ca/geonetwork/srv/eng/csw?request=GetRecordById&service=CSW&version=2.0.2&elementSetName=full&outputSchema=http://www.isotc211.org/2005/gmd&typeNames=gmd:MD_Metadata&constraintLanguage=FILTER&id={metadata_uuid}"
 
+# Catalog URL of the summary records (used to revalidate the cached records against their date stamp)
+CATALOG_SUMMARY_URL = "https://maps.canada.ca/geonetwork/srv/eng/csw?request=GetRecordById&service=CSW&version=2.0.2&elementSetName=summary&outputSchema=http://www.isotc211.org/2005/gmd&typeNames=gmd:MD_Metadata&constraintLanguage=FILTER&id={metadata_uuid}"
+
+# Catalog URL of the records search (used to harvest the metadata index), paged with startPosition and maxRecords
+CATALOG_GETRECORDS_URL = "https://maps.canada.ca/geonetwork/srv/eng/csw?request=GetRecords&service=CSW&version=2.0.2&resultType=results&elementSetName=full&outputSchema=http://www.isotc211.org/2005/gmd&typeNames=gmd:MD_Metadata"
+
+# Catalog client variables (per process). The failed requests (connection errors, timeouts, 5xx, 429) are retried
+# after an exponential backoff with jitter. After CATALOG_BREAKER_FAILURES failures in a row, the catalog is deemed
+# down and the requests fail right away for CATALOG_BREAKER_RESET_SECONDS.
+CATALOG_POOL_SIZE = 10
+CATALOG_CONNECT_TIMEOUT_SECONDS = 3
+CATALOG_READ_TIMEOUT_SECONDS = 10
+CATALOG_RETRIES = 2
+CATALOG_RETRY_BACKOFF_SECONDS = 0.5
+CATALOG_BREAKER_FAILURES = 5
+CATALOG_BREAKER_RESET_SECONDS = 30
+
+# GeoNetwork reader variables. The "stream" backend keeps only the nodes the reader needs, in a single pass, instead of
+# parsing the whole record with "xmltodict". Both read the same information.
+GEONETWORK_READER_BACKEND = "stream"
+
+# Metadata cache variables. The parsed metadata records are cached in memory (per process) and on disk (shared by the
+# processes). Past the TTL, a record is revalidated against its date stamp (with a light summary request): within the
+# stale window the cached record is served right away and revalidated in the background, beyond it the revalidation
+# is done on the request itself. The disk tier lives in a directory of the application, only accessible to its user.
+METADATA_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "metadata")
+METADATA_CACHE_MEMORY_MAX_ENTRIES = 200
+METADATA_CACHE_DISK_MAX_ENTRIES = 5000
+METADATA_CACHE_TTL_SECONDS = 600
+METADATA_CACHE_STALE_SECONDS = 86400
+METADATA_CACHE_REVALIDATE_WORKERS = 2
+METADATA_CACHE_REVALIDATE_MAX_PENDING = 32
+
+# Metadata batch variables (per process). The records not cached are requested by chunks of ids in a single
+# GetRecordById. Keep the workers at or below CATALOG_POOL_SIZE.
+METADATA_BATCH_MAX_UUIDS = 500
+METADATA_BATCH_CHUNK_SIZE = 20
+METADATA_BATCH_WORKERS = 4
+METADATA_BATCH_MAX_PENDING = 100
+
+# Metadata index variables. The records of the catalog are harvested, by pages of METADATA_HARVEST_PAGE_SIZE, into the
+# metadata index table every interval, by a single process at a time. Set the interval to 0 to disable the in-app
+# harvest (e.g. when running from cron). The autocomplete searches the index only, never the catalog.
+METADATA_HARVEST_INTERVAL_SECONDS = 0
+METADATA_HARVEST_PAGE_SIZE = 50
+METADATA_HARVEST_MAX_RECORDS = 100000
+METADATA_HARVEST_LOCK_ID = 4617002
+METADATA_AUTOCOMPLETE_MIN_CHARS = 2
+METADATA_AUTOCOMPLETE_DEFAULT_LIMIT = 10
+METADATA_AUTOCOMPLETE_MAX_LIMIT = 50
+
 # PyGeoAPI URL
 PYGEOAPI_URL = "http://localhost:5000/reload_resources"
 
+# PyGeoAPI reload variables. The reload requests made within the debounce window are coalesced into one reload.
+PYGEOAPI_RELOAD_DEBOUNCE_SECONDS = 2
+PYGEOAPI_RELOAD_MAX_DELAY_SECONDS = 10
+PYGEOAPI_RELOAD_TIMEOUT_SECONDS = 10
+PYGEOAPI_RELOAD_RETRIES = 3
+PYGEOAPI_RELOAD_RETRY_SECONDS = 2
+
 # Determine if using Connexion API.
 # Connexion is essentially useful for the Swagger UI and define the spec first.
 USING_CONNEXION_API = True
@@ -35,6 +134,72 @@ TOKEN_KEY_API = {{TOKEN_KEY_WEB}}
 TOKEN_EXP_MINUTES = 480
 TOKEN_REFRESH_EXP_MINUTES = 1440
 
+# Revoked tokens cache variables. Past the max staleness, the cache is refreshed on the request itself. Each refresh
+# reads again the last poll overlap ids, in case a lower id committed after a higher one.
+TOKEN_REVOKED_CACHE_ENABLED = True
+TOKEN_REVOKED_CACHE_MAX_STALENESS_SECONDS = 30
+TOKEN_REVOKED_POLL_OVERLAP_IDS = 100
+TOKEN_REVOKED_NOTIFY_CHANNEL = "czs_token_revoked"
+
+# Expired tokens purge variables, by a single process at a time. Set the interval to 0 to disable the in-app purge (e.g.
+# when purging from cron).
+TOKEN_PURGE_INTERVAL_SECONDS = 3600
+TOKEN_PURGE_BATCH_SIZE = 1000
+TOKEN_PURGE_LOCK_ID = 4617003
+
+# Password verification variables (per process). Logins beyond the max pending get a 429.
+PASSWORD_CHECK_WORKERS = 2
+PASSWORD_CHECK_MAX_PENDING = 8
+
+# Password hashing variables. The bcrypt cost is calibrated at startup to hash in about PASSWORD_HASH_TARGET_MS.
+PASSWORD_HASH_TARGET_MS = 50
+PASSWORD_HASH_MIN_ROUNDS = 10
+PASSWORD_HASH_MAX_ROUNDS = 16
+
+# Jobs variables (per process). Jobs beyond the max pending are refused (503). Finished jobs are kept for the retention.
+# Jobs still queued past the timeout since created, or still running past the timeout since started (e.g. their
+# process was killed or recycled), are marked failed by the purge, which runs every interval.
+JOB_WORKERS = 2
+JOB_MAX_PENDING = 20
+JOB_RETENTION_DAYS = 7
+JOB_TIMEOUT_SECONDS = 3600
+JOB_PURGE_INTERVAL_SECONDS = 600
+
+# Footprint variables. The footprint of a feature collection is computed from its table with one of the modes, from
+# the most precise (and slowest) to the fastest. The simplified mode takes a tolerance and the grid mode a cell size
+# (in the units of the table), the concave_hull mode an optional target percent of the convex hull area (0.9).
+FOOTPRINT_MODES = ["union", "simplified", "grid", "concave_hull", "convex_hull", "envelope"]
+FOOTPRINT_DEFAULT_MODE = "union"
+
+# Partitioned union variables (per process). A union footprint of a table estimated at FOOTPRINT_PARTITION_MIN_ROWS or
+# more is computed by tiles of about FOOTPRINT_PARTITION_ROWS_PER_TILE rows, unioned concurrently on the source
+# database and merged. Keep the workers at or below REMOTE_DB_POOL_MAX_SIZE.
+FOOTPRINT_PARTITION_MIN_ROWS = 100000
+FOOTPRINT_PARTITION_ROWS_PER_TILE = 50000
+FOOTPRINT_PARTITION_MAX_TILES_PER_SIDE = 8
+FOOTPRINT_PARTITION_WORKERS = 4
+FOOTPRINT_PARTITION_MAX_PENDING = 128
+
+# Geometry refresh variables. All the feature collections are refreshed (when their source table changed) every interval,
+# by a single process at a time. Set the interval to 0 to disable the in-app refresh (e.g. when running from cron).
+GEOMETRY_REFRESH_INTERVAL_SECONDS = 0
+GEOMETRY_REFRESH_WORKERS = 4
+GEOMETRY_REFRESH_MAX_PER_HOST = 2
+GEOMETRY_REFRESH_LOCK_ID = 4617001
+
+# A collection whose footprint tiles don't fit in the footprint executor (busy with the other collections, PATCHes or
+# jobs) is retried every GEOMETRY_REFRESH_BUSY_RETRY_SECONDS, for at most GEOMETRY_REFRESH_BUSY_MAX_WAIT_SECONDS.
+GEOMETRY_REFRESH_BUSY_RETRY_SECONDS = 5
+GEOMETRY_REFRESH_BUSY_MAX_WAIT_SECONDS = 600
+
+# Collections validation variables (per process). The checks not done within the budget are reported as warnings.
+COLLECTION_VALIDATE_BUDGET_MS = 3000
+COLLECTION_VALIDATE_WORKERS = 4
+COLLECTION_VALIDATE_MAX_PENDING = 64
+
+# Collections bulk import variables
+COLLECTION_BULK_MAX_ROWS = 1000
+
 # Roles
 ROLE_LEVEL_ADMIN = 100
 ROLE_LEVEL_USER = 1
@@ -49,7 +214,8 @@ DB_STORED_PROCS = {
     "UPDATE_COLLECTION": "czs.czs_update_collection_geom",
     "DELETE_COLLECTION": "czs.czs_delete_collection",
     "ADD_PARENT": "czs.czs_add_parent",
-    "DELETE_PARENT": "czs.czs_delete_parent"
+    "DELETE_PARENT": "czs.czs_delete_parent",
+    "DBLINK_CLOSE_ALL": "czs.czs_dblink_close_all"
 }
 
 DB_TABLE_COLLECTION_PARENT = {
@@ -66,6 +232,29 @@ DB_TABLE_COLLECTION_THEME = {
     "FIELD_TITLE_FR": "title_fr",
 }
 
+DB_TABLE_COLLECTION = {
+    "TABLE_NAME": {{TABLE_NAME}},
+    "FIELD_UUID": "collection_uuid",
+    "FIELD_NAME": "collection_name",
+    "FIELD_PROVIDER_TYPE": "provider_type"
+}
+
+DB_TABLE_PROVIDER_FEATURE = {
+    "TABLE_NAME": {{TABLE_NAME}},
+    "FIELD_COLLECTION_UUID": "collection_uuid",
+    "FIELD_TABLE": "data_table",
+    "FIELD_HOST": "data_host",
+    "FIELD_PORT": "data_port",
+    "FIELD_DBNAME": "data_dbname",
+    "FIELD_USER": "data_user",
+    "FIELD_PASSWORD": "data_password",
+    "FIELD_SEARCH_PATH": "data_search_path",
+    "FIELD_FOOTPRINT_MODE": "footprint_mode",
+    "FIELD_FOOTPRINT_PARAM": "footprint_param",
+    "FIELD_SOURCE_FINGERPRINT": "source_fingerprint",
+    "FIELD_SOURCE_CHANGE_COLUMN": "source_change_column"
+}
+
 DB_TABLE_USERS = {
     "TABLE_NAME": {{TABLE_NAME}},
     "FIELD_ID": "id",
@@ -81,6 +270,36 @@ DB_TABLE_TOKEN_BLACKLIST = {
     "FIELD_EXP_DATE": "exp_date"
 }
 
+DB_TABLE_JOBS = {
+    "TABLE_NAME": {{TABLE_NAME}},
+    "FIELD_ID": "job_id",
+    "FIELD_TYPE": "job_type",
+    "FIELD_TARGET": "target",
+    "FIELD_STATE": "state",
+    "FIELD_CREATED_DATE": "created_date",
+    "FIELD_STARTED_DATE": "started_date",
+    "FIELD_FINISHED_DATE": "finished_date",
+    "FIELD_ERROR_STATUS": "error_status",
+    "FIELD_ERROR_EN": "error_en",
+    "FIELD_ERROR_FR": "error_fr"
+}
+
+DB_TABLE_METADATA_INDEX = {
+    "TABLE_NAME": {{TABLE_NAME}},
+    "FIELD_UUID": "metadata_uuid",
+    "FIELD_TITLE_EN": "title_en",
+    "FIELD_TITLE_FR": "title_fr",
+    "FIELD_KEYWORDS_EN": "keywords_en",
+    "FIELD_KEYWORDS_FR": "keywords_fr",
+    "FIELD_TOPIC": "topic",
+    "FIELD_SRID": "srid",
+    "FIELD_EXTENT": "extent",
+    "FIELD_TEMPORAL_EXTENT": "temporal_extent",
+    "FIELD_COGS": "cogs",
+    "FIELD_DATE_STAMP": "date_stamp",
+    "FIELD_HARVESTED_DATE": "harvested_date"
+}
+
 def read_param(param_name):
     opts, args = getopt.getopt(sys.argv[1:], "ae:p:", ["api=", "env=", "port="])
     for opt, arg in opts:
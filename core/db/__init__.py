@@ -4,8 +4,25 @@ This package offers database connection.
 
 # 3rd party imports
 from core import config
-from . import db_connection
+from . import db_connection, db_listener, remote_pool
+
+# Create the remote (source) databases connection pools which are GLOBAL
+remote_pools = remote_pool.RemotePools(config.REMOTE_DB_POOL_MAX_POOLS, config.REMOTE_DB_POOL_MAX_SIZE,
+                                       config.REMOTE_DB_POOL_MAX_PER_HOST,
+                                       config.REMOTE_DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+                                       config.REMOTE_DB_POOL_IDLE_TIMEOUT_SECONDS,
+                                       config.REMOTE_DB_POOL_HEALTH_CHECK_AFTER_SECONDS,
+                                       config.REMOTE_DB_CONNECT_TIMEOUT_SECONDS)
 
 # Create the database connection object which is GLOBAL
 db_conn = db_connection.DBConnection(host=config.DB_HOST, dbname=config.DB_NAME,
-                                     user=config.DB_USER, password=config.DB_PASS)
+                                     user=config.DB_USER, password=config.DB_PASS,
+                                     pool_min_size=config.DB_POOL_MIN_SIZE,
+                                     pool_max_size=config.DB_POOL_MAX_SIZE,
+                                     pool_checkout_timeout=config.DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+                                     pool_idle_timeout=config.DB_POOL_IDLE_TIMEOUT_SECONDS,
+                                     pool_health_check_after=config.DB_POOL_HEALTH_CHECK_AFTER_SECONDS,
+                                     remote_pools=remote_pools)
+
+# Create the database notifications listener which is GLOBAL (its thread is started per process, on demand)
+db_listen = db_listener.DBListener(db_conn, config.DB_LISTEN_POLL_SECONDS, config.DB_LISTEN_RETRY_SECONDS)
@@ -3,7 +3,8 @@ This module offers functions to query and manage a Postgresql database.
 """
 
 # 3rd party imports
-import datetime
+import datetime, json
+from contextlib import contextmanager
 
 import psycopg2
 import psycopg2.extras
@@ -13,6 +14,7 @@ from psycopg2 import sql
 from core import config
 from core.lib import encr
 from .entity.user import DBUser
+from .db_pool import DBPool
 
 
 class DBConnection(object):
@@ -20,25 +22,86 @@ class DBConnection(object):
     Class representing a Database connection.
     """
 
-    def __init__(self, host, dbname, user, password):
+    def __init__(self, host, dbname, user, password, pool_min_size=1, pool_max_size=10, pool_checkout_timeout=10,
+                 pool_idle_timeout=300, pool_health_check_after=30, remote_pools=None):
         """
         Constructor
+
+        :param remote_pools: The :class:`~remote_pool.RemotePools` used to connect to the remote (source) databases
         """
         self.host = host
         self.dbname = dbname
         self.user = user
         self.password = password
+        self.pool = DBPool(pool_min_size, pool_max_size, pool_checkout_timeout, pool_idle_timeout,
+                           pool_health_check_after, host=host, dbname=dbname, user=user, password=password)
+        self.remote_pools = remote_pools
 
 
     def open_conn(self):
         """
-        Connects to the database.
+        Gets a connection from the connection pool. Meant to be used in a 'with' block, after which the connection
+         is given back to the pool.
+
+        :returns: A context manager over a :class:`~psycopg2` connection
+        """
+
+        # Checkout a connection from the pool
+        return self.pool.connection()
+
+
+    @contextmanager
+    def open_dblink_conn(self):
+        """
+        Gets a connection from the connection pool, for the stored procedures connecting to remote databases with dblink.
+         The named dblink connections they open are reused until the end of the 'with' block, then closed (they
+         outlive the transactions).
 
-        :returns: A :class:`~psycopg2` connection
+        :returns: A context manager over a :class:`~psycopg2` connection
+        """
+
+        # Checkout a connection from the pool
+        with self.open_conn() as conn:
+            try:
+                yield conn
+
+            finally:
+                _close_dblinks(conn)
+
+
+    def open_listen_conn(self):
+        """
+        Connects to the database, outside of the connection pool, with a connection meant to LISTEN on channels.
+
+        :returns: A :class:`~psycopg2` connection in autocommit mode
         """
 
         # Connects and returns the connection
-        return psycopg2.connect(host=self.host, dbname=self.dbname, user=self.user, password=self.password)
+        conn = psycopg2.connect(host=self.host, dbname=self.dbname, user=self.user, password=self.password)
+        conn.autocommit = True
+        return conn
+
+
+    def remote_pools_stats(self):
+        """
+        Gets the statistics of the remote databases connection pools for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        # Redirect
+        return self.remote_pools.stats()
+
+
+    def pool_stats(self):
+        """
+        Gets the statistics of the connection pool for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        # Redirect
+        return self.pool.stats()
 
 
     def query_users(self):
@@ -115,6 +178,11 @@ class DBConnection(object):
 
             # If the password is valid
             if encr.check_password(password, passbytes):
+                # If the password was hashed with a lower cost than the calibrated one, hash it again (in the background)
+                if encr.needs_rehash(passbytes):
+                    user_id = user.id()
+                    encr.rehash_password(password, lambda passencr: self.update_user_password_hash(user_id, passencr))
+
                 # Valid user
                 return user
 
@@ -174,6 +242,46 @@ class DBConnection(object):
             conn.commit()
 
 
+    def update_user_password(self, user_id, password):
+        """
+        Updates the password of a user in the database.
+
+        :param user_id: The User ID to update
+        :param password: The new password. The password will be encrypted.
+        """
+
+        # Encrypt the password
+        passencr = encr.get_hashed_password(password)
+
+        # Redirect
+        self.update_user_password_hash(user_id, passencr)
+
+
+    def update_user_password_hash(self, user_id, passencr):
+        """
+        Updates the password of a user in the database with a password already encrypted.
+
+        :param user_id: The User ID to update
+        :param passencr: The encrypted password
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "UPDATE {table} SET {field_password} = %s WHERE {field_id} = %s"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_USERS["TABLE_NAME"]),
+                    field_password=sql.Identifier(config.DB_TABLE_USERS["FIELD_PASSWORD"]),
+                    field_id=sql.Identifier(config.DB_TABLE_USERS["FIELD_ID"]))
+
+                # Execute cursor
+                cur.execute(query, (passencr, user_id,))
+            conn.commit()
+
+
     def delete_user(self, user_id):
         """
         Deletes a user from the database.
@@ -231,41 +339,400 @@ class DBConnection(object):
 
         :param jti_uid: The JTI of the Token to add to the table in order to revoke it.
         :param expiration_date: The Expiration date of the Token being revoked. This serves to keep the
-         table clean and not store revoked tokens forever in the database.
+         table clean and not store revoked tokens forever in the database (see purge_tokens_revoked).
         """
 
         # Connect to the database
         with self.open_conn() as conn:
-            # *For a lack of a better place to do this*
-            # Clear the old revoked tokens to clean up the database with time
             # Open a cursor
             with conn.cursor() as cur:
-                str_query = "DELETE FROM {table} WHERE {field} < %s;"
+                str_query = "INSERT INTO {table} ({field_jti_uid}, {field_exp_date}) VALUES (%s, %s)"
 
                 # Query in the database
                 query = sql.SQL(str_query).format(
                     table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_TOKEN_BLACKLIST["TABLE_NAME"]),
-                    field=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_EXP_DATE"]))
+                    field_jti_uid=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_JTI_UID"]),
+                    field_exp_date=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_EXP_DATE"]))
 
                 # Execute cursor
-                cur.execute(query, (datetime.datetime.now(),))
+                cur.execute(query, (jti_uid, expiration_date,))
+
+                # Tell the other processes, the notification is sent on commit
+                _notify(cur, config.TOKEN_REVOKED_NOTIFY_CHANNEL, json.dumps({
+                    "jti": jti_uid,
+                    "exp": expiration_date.isoformat()
+                }))
+            conn.commit()
+            return True
+
+
+    def purge_tokens_revoked(self, batch_size):
+        """
+        Deletes the expired tokens from the tokens blacklist table. The rows are deleted in batches, each in its own
+         transaction, so that the locks are held briefly.
+
+        :param batch_size: The maximum number of rows deleted per transaction
+        :returns: The number of rows deleted
+        """
 
+        str_query = "DELETE FROM {table} WHERE {field_id} IN (SELECT {field_id} FROM {table} WHERE {field_exp_date} < %s LIMIT %s)"
+
+        # Query in the database
+        query = sql.SQL(str_query).format(
+            table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_TOKEN_BLACKLIST["TABLE_NAME"]),
+            field_id=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_ID"]),
+            field_exp_date=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_EXP_DATE"]))
+
+        # Delete until a batch isn't full
+        now = datetime.datetime.now()
+        deleted = 0
+        while True:
+            # Connect to the database
+            with self.open_conn() as conn:
+                # Open a cursor
+                with conn.cursor() as cur:
+                    # Execute cursor
+                    cur.execute(query, (now, batch_size,))
+                    count = cur.rowcount
+                conn.commit()
+
+            deleted += count
+            if count < batch_size:
+                return deleted
+
+
+    def query_tokens_revoked_since(self, last_id):
+        """
+        Queries the tokens blacklist table for the tokens revoked after the given record id.
+
+        :param last_id: The record id after which to read (may be below the highest id already read, to overlap).
+                        When None, all the tokens still valid are read.
+        :returns: A list of dictionaries with the id, jti and expiration date of the revoked tokens, ordered by id.
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
             # Open a cursor
-            with conn.cursor() as cur:
-                str_query = "INSERT INTO {table} ({field_jti_uid}, {field_exp_date}) VALUES (%s, %s)"
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                if last_id is None:
+                    str_query = "SELECT {field_id} AS id, {field_jti_uid} AS jti, {field_exp_date} AS exp FROM {table} WHERE {field_exp_date} >= %s ORDER BY {field_id}"
+                    params = (datetime.datetime.now(),)
+
+                else:
+                    str_query = "SELECT {field_id} AS id, {field_jti_uid} AS jti, {field_exp_date} AS exp FROM {table} WHERE {field_id} > %s ORDER BY {field_id}"
+                    params = (last_id,)
 
                 # Query in the database
                 query = sql.SQL(str_query).format(
                     table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_TOKEN_BLACKLIST["TABLE_NAME"]),
+                    field_id=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_ID"]),
                     field_jti_uid=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_JTI_UID"]),
                     field_exp_date=sql.Identifier(config.DB_TABLE_TOKEN_BLACKLIST["FIELD_EXP_DATE"]))
 
+                # Execute cursor and fetch
+                cur.execute(query, params)
+                return cur.fetchall()
+
+
+    def add_job(self, job_id, job_type, target):
+        """
+        Adds a job, queued, in the jobs table.
+
+        :param job_id: The identifier of the job
+        :param job_type: The type of the job (e.g. add_collection)
+        :param target: The name of what the job works on (e.g. the collection name)
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "INSERT INTO {table} ({field_id}, {field_type}, {field_target}, {field_state}, {field_created}) VALUES (%s, %s, %s, %s, %s)"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_JOBS["TABLE_NAME"]),
+                    field_id=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ID"]),
+                    field_type=sql.Identifier(config.DB_TABLE_JOBS["FIELD_TYPE"]),
+                    field_target=sql.Identifier(config.DB_TABLE_JOBS["FIELD_TARGET"]),
+                    field_state=sql.Identifier(config.DB_TABLE_JOBS["FIELD_STATE"]),
+                    field_created=sql.Identifier(config.DB_TABLE_JOBS["FIELD_CREATED_DATE"]))
+
                 # Execute cursor
-                cur.execute(query, (jti_uid, expiration_date,))
+                cur.execute(query, (job_id, job_type, target, "queued", datetime.datetime.now(),))
             conn.commit()
             return True
 
 
+    def start_job(self, job_id):
+        """
+        Marks a job as running, if it's still queued.
+
+        :param job_id: The identifier of the job
+        :returns: True if the job was started, False when it was no longer queued (e.g. failed as stale)
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "UPDATE {table} SET {field_state} = %s, {field_started} = %s WHERE {field_id} = %s AND {field_state} = %s"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_JOBS["TABLE_NAME"]),
+                    field_id=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ID"]),
+                    field_state=sql.Identifier(config.DB_TABLE_JOBS["FIELD_STATE"]),
+                    field_started=sql.Identifier(config.DB_TABLE_JOBS["FIELD_STARTED_DATE"]))
+
+                # Execute cursor
+                cur.execute(query, ("running", datetime.datetime.now(), job_id, "queued",))
+                count = cur.rowcount
+            conn.commit()
+            return count > 0
+
+
+    def finish_job(self, job_id, state, error_status=None, error_en=None, error_fr=None):
+        """
+        Marks a job as finished, if it isn't already (e.g. failed as stale).
+
+        :param job_id: The identifier of the job
+        :param state: The final state of the job, succeeded or failed
+        :param error_status: The HTTP status of the error, when failed
+        :param error_en: The English message of the error, when failed
+        :param error_fr: The French message of the error, when failed
+        :returns: True if the job was finished, False when it was already finished
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "UPDATE {table} SET {field_state} = %s, {field_finished} = %s, {field_error_status} = %s, {field_error_en} = %s, {field_error_fr} = %s WHERE {field_id} = %s AND {field_state} IN (%s, %s)"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_JOBS["TABLE_NAME"]),
+                    field_id=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ID"]),
+                    field_state=sql.Identifier(config.DB_TABLE_JOBS["FIELD_STATE"]),
+                    field_finished=sql.Identifier(config.DB_TABLE_JOBS["FIELD_FINISHED_DATE"]),
+                    field_error_status=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ERROR_STATUS"]),
+                    field_error_en=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ERROR_EN"]),
+                    field_error_fr=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ERROR_FR"]))
+
+                # Execute cursor
+                cur.execute(query, (state, datetime.datetime.now(), error_status, error_en, error_fr, job_id, "queued", "running",))
+                count = cur.rowcount
+            conn.commit()
+            return count > 0
+
+
+    def query_job(self, job_id):
+        """
+        Queries for a job.
+
+        :param job_id: The identifier of the job
+        :returns: A dictionary with the job information when found; otherwise returns None
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                str_query = "SELECT * FROM {table} WHERE {field_id} = %s"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_JOBS["TABLE_NAME"]),
+                    field_id=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ID"]))
+
+                # Execute cursor and fetch
+                cur.execute(query, (job_id,))
+                return cur.fetchone()
+
+
+    def fail_stale_jobs(self, before_date, error_status, error_en, error_fr):
+        """
+        Marks the jobs still queued which were created before the given date, and the jobs still running which were
+         started before the given date, as failed.
+
+        :param before_date: The date before which the unfinished jobs are failed
+        :param error_status: The HTTP status of the error
+        :param error_en: The English message of the error
+        :param error_fr: The French message of the error
+        :returns: The number of rows updated
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "UPDATE {table} SET {field_state} = %s, {field_finished} = %s, {field_error_status} = %s, {field_error_en} = %s, {field_error_fr} = %s WHERE ({field_state} = %s AND {field_created} < %s) OR ({field_state} = %s AND {field_started} < %s)"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_JOBS["TABLE_NAME"]),
+                    field_state=sql.Identifier(config.DB_TABLE_JOBS["FIELD_STATE"]),
+                    field_created=sql.Identifier(config.DB_TABLE_JOBS["FIELD_CREATED_DATE"]),
+                    field_started=sql.Identifier(config.DB_TABLE_JOBS["FIELD_STARTED_DATE"]),
+                    field_finished=sql.Identifier(config.DB_TABLE_JOBS["FIELD_FINISHED_DATE"]),
+                    field_error_status=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ERROR_STATUS"]),
+                    field_error_en=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ERROR_EN"]),
+                    field_error_fr=sql.Identifier(config.DB_TABLE_JOBS["FIELD_ERROR_FR"]))
+
+                # Execute cursor
+                cur.execute(query, ("failed", datetime.datetime.now(), error_status, error_en, error_fr, "queued", before_date, "running", before_date,))
+                count = cur.rowcount
+            conn.commit()
+            return count
+
+
+    def purge_jobs(self, before_date):
+        """
+        Deletes the jobs finished before the given date from the jobs table.
+
+        :param before_date: The date before which the finished jobs are deleted
+        :returns: The number of rows deleted
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "DELETE FROM {table} WHERE {field_finished} < %s"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_JOBS["TABLE_NAME"]),
+                    field_finished=sql.Identifier(config.DB_TABLE_JOBS["FIELD_FINISHED_DATE"]))
+
+                # Execute cursor
+                cur.execute(query, (before_date,))
+                count = cur.rowcount
+            conn.commit()
+            return count
+
+
+    def upsert_metadata_index(self, records: list, harvested_date):
+        """
+        Adds or updates records in the metadata index table.
+
+        :param records: The records, each a dictionary as returned by GeoNetworkReader.to_dict with its date_stamp
+        :param harvested_date: The date of the harvest which read the records
+        :returns: The number of records added or updated
+        """
+
+        # If nothing to do
+        if not records:
+            return 0
+
+        # The columns, in the order of the values
+        fields = ["FIELD_UUID", "FIELD_TITLE_EN", "FIELD_TITLE_FR", "FIELD_KEYWORDS_EN", "FIELD_KEYWORDS_FR", "FIELD_TOPIC",
+                  "FIELD_SRID", "FIELD_EXTENT", "FIELD_TEMPORAL_EXTENT", "FIELD_COGS", "FIELD_DATE_STAMP",
+                  "FIELD_HARVESTED_DATE"]
+        values = [(r["uuid"], r["title_en"], r["title_fr"], ", ".join(r["keywords_en"]), ", ".join(r["keywords_fr"]),
+                   r["topic"], r["srid"], psycopg2.extras.Json(r["extent"]), psycopg2.extras.Json(r["temporal_extent"]),
+                   psycopg2.extras.Json(r["cogs"]), r["date_stamp"], harvested_date,) for r in records]
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "INSERT INTO {table} ({fields}) VALUES %s ON CONFLICT ({field_uuid}) DO UPDATE SET {updates}"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_METADATA_INDEX["TABLE_NAME"]),
+                    fields=sql.SQL(", ").join(sql.Identifier(config.DB_TABLE_METADATA_INDEX[f]) for f in fields),
+                    field_uuid=sql.Identifier(config.DB_TABLE_METADATA_INDEX["FIELD_UUID"]),
+                    updates=sql.SQL(", ").join(sql.SQL("{field} = EXCLUDED.{field}").format(
+                        field=sql.Identifier(config.DB_TABLE_METADATA_INDEX[f])) for f in fields[1:]))
+
+                # Execute cursor, the records in as few statements as possible
+                psycopg2.extras.execute_values(cur, query, values, page_size=len(values))
+            conn.commit()
+            return len(values)
+
+
+    def purge_metadata_index(self, before_date):
+        """
+        Deletes the records harvested before the given date from the metadata index table (i.e. the records no longer in the catalog).
+
+        :param before_date: The date before which the harvested records are deleted
+        :returns: The number of rows deleted
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = "DELETE FROM {table} WHERE {field_harvested} < %s"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_METADATA_INDEX["TABLE_NAME"]),
+                    field_harvested=sql.Identifier(config.DB_TABLE_METADATA_INDEX["FIELD_HARVESTED_DATE"]))
+
+                # Execute cursor
+                cur.execute(query, (before_date,))
+                count = cur.rowcount
+            conn.commit()
+            return count
+
+
+    def query_metadata_autocomplete(self, text: str, langs: list, limit: int):
+        """
+        Queries the metadata index table for the records whose titles or keywords start with, contain or resemble
+         (trigrams) a text. The records whose title starts with the text come first, then the most similar ones.
+
+        :param text: The text, as typed
+        :param langs: The languages to search, "en" and/or "fr"
+        :param limit: The maximum number of records to return
+        :returns: A list of dictionaries, one per record found, with the uuid, titles, keywords, topic and score.
+        """
+
+        table = config.DB_TABLE_METADATA_INDEX
+        titles = [sql.Identifier(table["FIELD_TITLE_" + lang.upper()]) for lang in langs]
+        keywords = [sql.Identifier(table["FIELD_KEYWORDS_" + lang.upper()]) for lang in langs]
+
+        # The conditions and ranks on the titles (prefix, substring, words similarity) and the keywords (substring, words similarity)
+        prefixes = [sql.SQL("lower({field}) LIKE %(prefix)s").format(field=f) for f in titles]
+        contains = [sql.SQL("{field} ILIKE %(contains)s").format(field=f) for f in titles + keywords]
+        similar = [sql.SQL("%(text)s <%% {field}").format(field=f) for f in titles + keywords]
+        scores = [sql.SQL("word_similarity(%(text)s, {field})").format(field=f) for f in titles + keywords]
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                str_query = "SELECT {field_uuid} AS uuid, {field_title_en} AS title_en, {field_title_fr} AS title_fr, " \
+                            "{field_keywords_en} AS keywords_en, {field_keywords_fr} AS keywords_fr, {field_topic} AS topic, " \
+                            "COALESCE({prefix_rank}, false) AS prefix, GREATEST({scores}) AS score " \
+                            "FROM {table} WHERE {conditions} " \
+                            "ORDER BY prefix DESC, score DESC, {order_title} LIMIT %(limit)s"
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    table=sql.Identifier(config.DB_SCHEMA, table["TABLE_NAME"]),
+                    field_uuid=sql.Identifier(table["FIELD_UUID"]),
+                    field_title_en=sql.Identifier(table["FIELD_TITLE_EN"]),
+                    field_title_fr=sql.Identifier(table["FIELD_TITLE_FR"]),
+                    field_keywords_en=sql.Identifier(table["FIELD_KEYWORDS_EN"]),
+                    field_keywords_fr=sql.Identifier(table["FIELD_KEYWORDS_FR"]),
+                    field_topic=sql.Identifier(table["FIELD_TOPIC"]),
+                    prefix_rank=sql.SQL(" OR ").join(prefixes),
+                    scores=sql.SQL(", ").join(scores),
+                    conditions=sql.SQL(" OR ").join(prefixes + contains + similar),
+                    order_title=titles[0])
+
+                # The text, escaped for the LIKE patterns
+                escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+                # Execute cursor and fetch
+                cur.execute(query, {"text": text, "prefix": escaped.lower() + "%", "contains": "%" + escaped + "%", "limit": limit})
+                return cur.fetchall()
+
+
     def query_parents(self):
         """
         Queries for all the Parents/Themes in the system.
@@ -301,25 +768,47 @@ class DBConnection(object):
                 return cur.fetchall()
 
 
-    def get_table_extent(self, schema: str, table_name: str, out_crs: int, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str):
+    def get_table_extent(self, schema: str, table_name: str, out_crs: int, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str,
+                         exact: bool = False, timeout_ms: int = None):
         """
-        Queries for a table extent.
+        Queries for a table extent, estimated from the table statistics or exact (aggregated over the geometry column).
 
-        :returns: The bounding box extent of the table.
+        :param exact: True to aggregate the extent over all the geometries instead of estimating it
+        :param timeout_ms: The maximum number of milliseconds the query can run
+        :returns: The bounding box extent of the table, or None if it can't be estimated or the table has no geometry column.
+        :raises QueryCanceledError: Raised when the query exceeds the timeout.
         """
 
-        # Connect to the database
-        with psycopg2.connect(host=db_host, port=db_port, dbname=db_name, user=db_user, password=db_password) as conn:
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
             # Open a cursor
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                str_query = """SELECT ST_Extent(ST_Transform(ST_SetSRID(BOX2d(ST_EstimatedExtent({schema}, {table_name}, {geom}))::geometry, Find_SRID({schema}, {table_name}, {geom})), {out_crs}))"""
+                # Find the geometry column of the table
+                cur.execute("SELECT f_geometry_column, srid FROM geometry_columns WHERE f_table_schema = %s AND f_table_name = %s ORDER BY f_geometry_column LIMIT 1;",
+                            (schema, table_name,))
+                geom_col = cur.fetchone()
+                if not geom_col:
+                    return None
+
+                # If limiting the time of the query (for the current transaction only)
+                if timeout_ms:
+                    cur.execute("SELECT set_config('statement_timeout', %s, true);", (str(int(timeout_ms)),))
+
+                if exact:
+                    str_query = """SELECT ST_Extent(ST_Transform(ST_SetSRID(t.box::geometry, {srid}), {out_crs})) FROM (SELECT ST_Extent({geom}) AS box FROM {table}) t"""
+
+                else:
+                    str_query = """SELECT ST_Extent(ST_Transform(ST_SetSRID(BOX2d(ST_EstimatedExtent({schema}, {table_name}, {geom_name}))::geometry, {srid}), {out_crs}))"""
 
                 # Query in the database
                 query = sql.SQL(str_query).format(
                     schema=sql.Literal(schema),
                     table_name=sql.Literal(table_name),
-                    geom=sql.Literal("geom"),
-                    out_crs=sql.Literal(out_crs))
+                    table=sql.Identifier(schema, table_name),
+                    geom=sql.Identifier(geom_col["f_geometry_column"]),
+                    geom_name=sql.Literal(geom_col["f_geometry_column"]),
+                    srid=sql.Literal(geom_col["srid"]),
+                    out_crs=sql.Literal(int(out_crs)))
 
                 # Execute cursor and fetch
                 cur.execute(query)
@@ -327,17 +816,267 @@ class DBConnection(object):
                 return res
 
 
+    def analyze_table(self, schema: str, table_name: str, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str):
+        """
+        Gathers the statistics of a remote table (ANALYZE), which the estimated extent relies on.
+        """
+
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                # Execute cursor
+                cur.execute(sql.SQL("ANALYZE {table};").format(table=sql.Identifier(schema, table_name)))
+
+
+    def get_table_change_signal(self, schema: str, table_name: str, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str):
+        """
+        Queries the remote catalog for cheap indicators of changes on a table: the rows inserted, updated, deleted,
+         the last (auto) analyze and the size of the relation.
+
+        :returns: A tuple which changes when the table content or statistics change, or None if the table wasn't found.
+        """
+
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
+            # Open a cursor
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                str_query = """SELECT s.n_tup_ins, s.n_tup_upd, s.n_tup_del, s.n_mod_since_analyze, s.last_analyze, s.last_autoanalyze, pg_relation_size(c.oid) AS rel_size
+                               FROM pg_class c LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+                               WHERE c.oid = to_regclass(format('%%I.%%I', %s::text, %s::text))"""
+
+                # Execute cursor and fetch
+                cur.execute(str_query, (schema, table_name,))
+                res = cur.fetchone()
+                if res:
+                    return tuple(res.values())
+                return None
+
+
+    def get_table_geometry_info(self, schema: str, table_name: str, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str):
+        """
+        Queries for the geometry column of a remote table along with its srid and estimated number of rows.
+
+        :returns: A dictionary with the geom_column, srid and rows (0 when the table was never analyzed), or None if
+         the table has no geometry column.
+        """
+
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
+            # Open a cursor
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                str_query = """SELECT g.f_geometry_column AS geom_column, g.srid, GREATEST(c.reltuples, 0)::bigint AS rows
+                               FROM geometry_columns g JOIN pg_class c ON c.oid = to_regclass(format('%%I.%%I', g.f_table_schema, g.f_table_name))
+                               WHERE g.f_table_schema = %s AND g.f_table_name = %s ORDER BY g.f_geometry_column LIMIT 1"""
+
+                # Execute cursor and fetch
+                cur.execute(str_query, (schema, table_name,))
+                return cur.fetchone()
+
+
+    def get_table_union_tile(self, schema: str, table_name: str, geom_column: str, srid: int, bounds: tuple, open_left: bool, open_bottom: bool,
+                             open_right: bool, open_top: bool, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str):
+        """
+        Queries for the union of the geometries of a remote table whose bounding box lower-left corner falls in a tile,
+         so that each geometry belongs to exactly one tile of a grid.
+
+        :param bounds: The (xmin, ymin, xmax, ymax) of the tile, in the srid of the table
+        :param open_left: True when the tile is on the left edge of the grid, taking the geometries further left
+        :param open_bottom: True when the tile is on the bottom edge of the grid, taking the geometries further down
+        :param open_right: True when the tile is on the right edge of the grid, taking the geometries on its right bound
+        :param open_top: True when the tile is on the top edge of the grid, taking the geometries on its top bound
+        :returns: The union as well known binary, or None when the tile holds no geometries.
+        """
+
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                # The conditions on the lower-left corner of the geometries
+                str_conditions = []
+                if not open_left:
+                    str_conditions.append("ST_XMin({geom}) >= {xmin}")
+                if not open_bottom:
+                    str_conditions.append("ST_YMin({geom}) >= {ymin}")
+                str_conditions.append("ST_XMin({geom}) <= {xmax}" if open_right else "ST_XMin({geom}) < {xmax}")
+                str_conditions.append("ST_YMin({geom}) <= {ymax}" if open_top else "ST_YMin({geom}) < {ymax}")
+
+                # The geometries of the tile overlap the tile (using the spatial index)
+                str_query = """SELECT ST_AsBinary(ST_Union({geom})) FROM {table}
+                               WHERE {geom} && ST_MakeEnvelope({xmin}, {ymin}, {xmax}, {ymax}, {srid}) AND """ + " AND ".join(str_conditions)
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    geom=sql.Identifier(geom_column),
+                    table=sql.Identifier(schema, table_name),
+                    xmin=sql.Literal(float(bounds[0])),
+                    ymin=sql.Literal(float(bounds[1])),
+                    xmax=sql.Literal(float(bounds[2])),
+                    ymax=sql.Literal(float(bounds[3])),
+                    srid=sql.Literal(int(srid)))
+
+                # Execute cursor and fetch
+                cur.execute(query)
+                res = cur.fetchone()[0]
+                return bytes(res) if res is not None else None
+
+
+    def merge_geometries(self, wkbs: list, srid: int, out_crs: int):
+        """
+        Merges geometries (e.g. the unions of the tiles of a table) into a single multi-polygon footprint, the same way
+         the footprints are computed in the database: polygons are kept as is, the other geometries are buffered.
+
+        :param wkbs: The list of geometries as well known binary
+        :param srid: The srid of the geometries
+        :param out_crs: The srid of the footprint
+        :returns: The footprint as hex extended well known binary, or None if there were no geometries.
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = """SELECT CASE WHEN ST_GeometryType(m.u) IN ('ST_Polygon', 'ST_MultiPolygon') THEN ST_Multi(m.u) ELSE ST_Multi(ST_Buffer(m.u, 1)) END
+                               FROM (SELECT ST_Transform(ST_Union(ST_GeomFromWKB(t.g, %s)), %s) AS u FROM unnest(%s::bytea[]) AS t(g)) AS m"""
+
+                # Execute cursor and fetch
+                cur.execute(str_query, (int(srid), int(out_crs), [psycopg2.Binary(w) for w in wkbs],))
+                return cur.fetchone()[0]
+
+
+    def query_collection_sources(self, coll_name: str = None):
+        """
+        Queries for the source tables of the feature Collections, with their footprint mode.
+
+        :param coll_name: The Collection name, None for all the feature Collections
+        :returns: A list of dictionaries with the collection_name, schema, table_name, db_host, db_port, db_name,
+         db_user, db_password, footprint_mode, footprint_param, source_fingerprint and change_column.
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                str_query = """SELECT c.{field_name} AS collection_name, p.{field_search_path}[1] AS schema, p.{field_table} AS table_name,
+                                      p.{field_host} AS db_host, p.{field_port} AS db_port, p.{field_dbname} AS db_name,
+                                      p.{field_user} AS db_user, p.{field_password} AS db_password,
+                                      p.{field_footprint_mode} AS footprint_mode, p.{field_footprint_param} AS footprint_param,
+                                      p.{field_fingerprint} AS source_fingerprint, p.{field_change_column} AS change_column
+                               FROM {table_coll} c JOIN {table_provider} p ON p.{field_coll_uuid} = c.{field_uuid}
+                               WHERE %s IS NULL OR c.{field_name} = %s ORDER BY c.{field_name}"""
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    field_name=sql.Identifier(config.DB_TABLE_COLLECTION["FIELD_NAME"]),
+                    field_uuid=sql.Identifier(config.DB_TABLE_COLLECTION["FIELD_UUID"]),
+                    field_coll_uuid=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_COLLECTION_UUID"]),
+                    field_search_path=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_SEARCH_PATH"]),
+                    field_table=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_TABLE"]),
+                    field_host=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_HOST"]),
+                    field_port=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_PORT"]),
+                    field_dbname=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_DBNAME"]),
+                    field_user=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_USER"]),
+                    field_password=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_PASSWORD"]),
+                    field_footprint_mode=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_FOOTPRINT_MODE"]),
+                    field_footprint_param=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_FOOTPRINT_PARAM"]),
+                    field_fingerprint=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_SOURCE_FINGERPRINT"]),
+                    field_change_column=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_SOURCE_CHANGE_COLUMN"]),
+                    table_coll=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_COLLECTION["TABLE_NAME"]),
+                    table_provider=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_PROVIDER_FEATURE["TABLE_NAME"]))
+
+                # Execute cursor and fetch
+                cur.execute(query, (coll_name, coll_name,))
+                return cur.fetchall()
+
+
+    def get_table_columns_info(self, schema: str, table_name: str, timeout_ms: int, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str):
+        """
+        Queries the remote catalog for a table, its columns and whether they have a spatial (gist, spgist or brin) index.
+
+        :param timeout_ms: The maximum number of milliseconds the query can run
+        :returns: A dictionary with exists, readable (SELECT privilege) and the columns, a dictionary of the type and
+         spatial_index per column name.
+        """
+
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
+            # Open a cursor
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                # Limit the time of the queries (for the current transaction only)
+                cur.execute("SELECT set_config('statement_timeout', %s, true);", (str(int(timeout_ms)),))
+
+                # Find the table
+                cur.execute("SELECT to_regclass(format('%%I.%%I', %s::text, %s::text))::oid AS oid;", (schema, table_name,))
+                oid = cur.fetchone()["oid"]
+                if not oid:
+                    return {"exists": False, "readable": False, "columns": {}}
+
+                str_query = """SELECT a.attname AS name, format_type(a.atttypid, a.atttypmod) AS type,
+                                      EXISTS (SELECT 1 FROM pg_index i JOIN pg_class ic ON ic.oid = i.indexrelid JOIN pg_am am ON am.oid = ic.relam
+                                              WHERE i.indrelid = a.attrelid AND a.attnum = ANY(i.indkey) AND am.amname IN ('gist', 'spgist', 'brin')) AS spatial_index,
+                                      has_table_privilege(a.attrelid, 'SELECT') AS readable
+                               FROM pg_attribute a
+                               WHERE a.attrelid = %s AND a.attnum > 0 AND NOT a.attisdropped ORDER BY a.attnum"""
+
+                # Execute cursor and fetch
+                cur.execute(str_query, (oid,))
+                rows = cur.fetchall()
+                return {"exists": True,
+                        "readable": all(r["readable"] for r in rows),
+                        "columns": {r["name"]: {"type": r["type"], "spatial_index": r["spatial_index"]} for r in rows}}
+
+
+    def get_table_fingerprint_signal(self, schema: str, table_name: str, change_column: str, db_host: str, db_port: int, db_name: str, db_user: str,
+                                     db_password: str):
+        """
+        Queries the remote database for the indicators of changes on the content of a table: the rows inserted, updated,
+         deleted, the size of the relation and, when given, the greatest value of a change column (e.g. updated_at).
+
+        :param change_column: The column whose greatest value changes when the table changes, None to rely on the statistics
+        :returns: A tuple which changes when the table content changes, or None if the table wasn't found.
+        """
+
+        # Checkout a connection to the remote database
+        with self.remote_pools.connection(db_host, db_port, db_name, db_user, db_password) as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = """SELECT s.n_tup_ins, s.n_tup_upd, s.n_tup_del, pg_relation_size(c.oid) AS rel_size
+                               FROM pg_class c LEFT JOIN pg_stat_all_tables s ON s.relid = c.oid
+                               WHERE c.oid = to_regclass(format('%%I.%%I', %s::text, %s::text))"""
+
+                # Execute cursor and fetch
+                cur.execute(str_query, (schema, table_name,))
+                res = cur.fetchone()
+                if not res:
+                    return None
+
+                # If a change column is given
+                if change_column:
+                    query = sql.SQL("SELECT MAX({column})::text FROM {table}").format(
+                        column=sql.Identifier(change_column),
+                        table=sql.Identifier(schema, table_name))
+
+                    # Execute cursor and fetch
+                    cur.execute(query)
+                    res = res + cur.fetchone()
+                return tuple(res)
+
+
     def add_collection_feature(self, parent_uuid: str, metadata_uuid: str, coll_name: str, coll_title_en: str, coll_title_fr: str, coll_desc_en: str, coll_desc_fr: str,
                                keywords_en: list, keywords_fr: list, coll_crs: int, provider_type: str, provider_name: str,
                                extent_bbox: list, extent_crs: str, extent_temporal_begin: object, extent_temporal_end: object,
                                link_type: str, link_rel: str, link_title: str, link_href: str, link_hreflang: str,
-                               tablename: str, data_id_field: str, data_queryables: str, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str, db_search_path: list):
+                               tablename: str, data_id_field: str, data_queryables: str, db_host: str, db_port: int, db_name: str, db_user: str, db_password: str, db_search_path: list,
+                               footprint_mode: str, footprint_param: float, footprint_geom: str = None):
         """
         Adds a feature Collection to the database.
+
+        :param footprint_geom: The footprint already computed (hex extended well known binary), None to compute it
+         in the database with the footprint mode
         """
 
         # Connect to the database
-        with self.open_conn() as conn:
+        with self.open_dblink_conn() as conn:
             # Open a cursor
             with conn.cursor() as cur:
                 # Call the stored procedure
@@ -345,13 +1084,15 @@ class DBConnection(object):
                               %s, %s, %s, %s, %s, \
                               %s, %s, %s, %s, %s, \
                               %s, %s, %s, %s, %s, \
-                              %s, %s, %s, %s, %s, %s, %s, %s, %s);",
+                              %s, %s, %s, %s, %s, %s, %s, %s, %s, \
+                              %s, %s, %s);",
                               (
                                 parent_uuid, metadata_uuid, coll_name, coll_title_en, coll_title_fr, coll_desc_en,
                                 coll_desc_fr, keywords_en, keywords_fr, coll_crs, provider_type,
                                 provider_name, extent_bbox, extent_crs, extent_temporal_begin, extent_temporal_end,
                                 link_type, link_rel, link_title, link_href, link_hreflang,
                                 tablename, data_id_field, data_queryables, db_host, db_port, db_name, db_user, db_password, db_search_path,
+                                footprint_mode, footprint_param, footprint_geom,
                               )
                             )
 
@@ -391,20 +1132,64 @@ class DBConnection(object):
             return True
 
 
-    def update_collection_geom(self, coll_name: str):
+    def add_collections(self, calls):
+        """
+        Adds many Collections to the database, each in its own transaction so that a Collection failing to be added
+         doesn't prevent the others from being added. The connection (and its dblink connections) is shared by the Collections.
+
+        :param calls: An iterable of tuples with the key of the stored procedure adding the Collection
+         (ADD_COLLECTION_FEATURE or ADD_COLLECTION_COVERAGE) and its parameters, or of the exceptions which prevented
+         preparing a Collection (yielded back as is, in their turn).
+        :returns: A generator yielding, per Collection in order, None when added (committed) or the
+         :class:`~psycopg2.DatabaseError` (or preparation exception) which prevented it. The Collections not tried when
+         the generator is closed aren't added.
+        """
+
+        # Connect to the database
+        with self.open_dblink_conn() as conn:
+            for call in calls:
+                # If the Collection couldn't be prepared
+                if isinstance(call, Exception):
+                    yield call
+                    continue
+
+                proc_key, params = call
+                try:
+                    # Open a cursor
+                    with conn.cursor() as cur:
+                        # Call the stored procedure
+                        cur.execute("CALL " + config.DB_STORED_PROCS[proc_key] + "(" + ", ".join(["%s"] * len(params)) + ");", params)
+
+                    # Commit this Collection, before telling it was added
+                    conn.commit()
+
+                except psycopg2.DatabaseError as err:
+                    # Forget this Collection only
+                    conn.rollback()
+                    yield err
+                    continue
+                yield None
+
+
+    def update_collection_geom(self, coll_name: str, footprint_mode: str = None, footprint_param: float = None, footprint_geom: str = None):
         """
         Updates the geometry in the collection.
+
+        :param footprint_mode: The footprint mode to compute the geometry with, None to keep the one of the collection
+        :param footprint_param: The parameter of the footprint mode (e.g. the tolerance)
+        :param footprint_geom: The footprint already computed (hex extended well known binary), None to compute it
+         in the database with the footprint mode
         """
 
         # Connect to the database
-        with self.open_conn() as conn:
+        with self.open_dblink_conn() as conn:
             # Open a cursor
             result = [0]
             with conn.cursor() as cur:
                 # Call the stored procedure
-                cur.execute("CALL " + config.DB_STORED_PROCS["UPDATE_COLLECTION"] + "(%s, %s);", 
+                cur.execute("CALL " + config.DB_STORED_PROCS["UPDATE_COLLECTION"] + "(%s, %s, %s, %s, %s);", 
                               (
-                                coll_name, 0,
+                                coll_name, footprint_mode, footprint_param, footprint_geom, 0,
                               )
                             )
 
@@ -415,6 +1200,134 @@ class DBConnection(object):
             return result[0] >= 1
 
 
+    def query_collection_exists(self, coll_name: str):
+        """
+        Queries if a Collection exists.
+
+        :returns: True if a Collection has this name.
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = """SELECT EXISTS (SELECT 1 FROM {table_coll} WHERE {field_name} = %s)"""
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    field_name=sql.Identifier(config.DB_TABLE_COLLECTION["FIELD_NAME"]),
+                    table_coll=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_COLLECTION["TABLE_NAME"]))
+
+                # Execute cursor and fetch
+                cur.execute(query, (coll_name,))
+                return cur.fetchone()[0]
+
+
+    def query_parent_exists(self, parent_uuid: str):
+        """
+        Queries if a Parent exists.
+
+        :returns: True if a Parent has this uuid.
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = """SELECT EXISTS (SELECT 1 FROM {table_parent} WHERE {field_parent_uuid} = %s)"""
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    field_parent_uuid=sql.Identifier(config.DB_TABLE_COLLECTION_PARENT["FIELD_PARENT_UUID"]),
+                    table_parent=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_COLLECTION_PARENT["TABLE_NAME"]))
+
+                # Execute cursor and fetch
+                cur.execute(query, (parent_uuid,))
+                return cur.fetchone()[0]
+
+
+    def query_collection_geom_size(self, coll_name: str):
+        """
+        Queries for the size of the geometry of a Collection.
+
+        :returns: The number of bytes of the geometry, 0 when there's none.
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = """SELECT COALESCE(SUM(ST_MemSize(geom)), 0) FROM {table_coll} WHERE {field_name} = %s"""
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    field_name=sql.Identifier(config.DB_TABLE_COLLECTION["FIELD_NAME"]),
+                    table_coll=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_COLLECTION["TABLE_NAME"]))
+
+                # Execute cursor and fetch
+                cur.execute(query, (coll_name,))
+                return int(cur.fetchone()[0])
+
+
+    @contextmanager
+    def try_advisory_lock(self, lock_id: int):
+        """
+        Checks out a connection holding an advisory lock, so that something runs in a single process at a time
+         (whatever the server or uWSGI worker), for the duration of the 'with' block.
+
+        :param lock_id: The identifier of the advisory lock
+        :returns: A context manager yielding True when the lock was obtained, False when another process holds it.
+        """
+
+        # Connect to the database, for the duration of the lock
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(%s);", (lock_id,))
+                locked = cur.fetchone()[0]
+            conn.commit()
+
+            try:
+                yield locked
+
+            finally:
+                # Release the lock, if held
+                if locked:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT pg_advisory_unlock(%s);", (lock_id,))
+                    conn.commit()
+
+
+    def update_collection_fingerprint(self, coll_name: str, fingerprint: str, change_column: str):
+        """
+        Records the fingerprint of the source table of a feature Collection, as of its last geometry update.
+
+        :param fingerprint: The fingerprint of the source table, None when unknown
+        :param change_column: The column whose greatest value changes when the table changes, None to rely on the statistics
+        """
+
+        # Connect to the database
+        with self.open_conn() as conn:
+            # Open a cursor
+            with conn.cursor() as cur:
+                str_query = """UPDATE {table_provider} p SET {field_fingerprint} = %s, {field_change_column} = %s
+                               FROM {table_coll} c WHERE p.{field_coll_uuid} = c.{field_uuid} AND c.{field_name} = %s"""
+
+                # Query in the database
+                query = sql.SQL(str_query).format(
+                    field_fingerprint=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_SOURCE_FINGERPRINT"]),
+                    field_change_column=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_SOURCE_CHANGE_COLUMN"]),
+                    field_coll_uuid=sql.Identifier(config.DB_TABLE_PROVIDER_FEATURE["FIELD_COLLECTION_UUID"]),
+                    field_uuid=sql.Identifier(config.DB_TABLE_COLLECTION["FIELD_UUID"]),
+                    field_name=sql.Identifier(config.DB_TABLE_COLLECTION["FIELD_NAME"]),
+                    table_coll=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_COLLECTION["TABLE_NAME"]),
+                    table_provider=sql.Identifier(config.DB_SCHEMA, config.DB_TABLE_PROVIDER_FEATURE["TABLE_NAME"]))
+
+                # Execute cursor
+                cur.execute(query, (fingerprint, change_column, coll_name,))
+            conn.commit()
+
+
     def delete_collection(self, coll_name: str):
         """
         Deletes a Collection to the database.
@@ -460,6 +1373,9 @@ class DBConnection(object):
                 # Read result
                 result = cur.fetchone()
 
+                # Tell the other processes, the notification is sent on commit
+                _notify(cur, config.PARENTS_NOTIFY_CHANNEL, "")
+
             conn.commit()
             return result[0]
 
@@ -484,7 +1400,43 @@ class DBConnection(object):
                 # Read result
                 result = cur.fetchone()
 
+                # Tell the other processes, the notification is sent on commit
+                _notify(cur, config.PARENTS_NOTIFY_CHANNEL, "")
+
             conn.commit()
             return result[0] >= 1
 
     
+
+
+def _close_dblinks(conn):
+    """
+    Closes the named dblink connections opened in the session of the connection, rolling back what wasn't committed.
+
+    :param conn: The :class:`~psycopg2` connection
+    """
+
+    try:
+        # If the transaction wasn't committed (failed or abandoned)
+        if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+
+        with conn.cursor() as cur:
+            cur.execute("SELECT " + config.DB_STORED_PROCS["DBLINK_CLOSE_ALL"] + "();")
+        conn.commit()
+
+    except psycopg2.Error:
+        # The connection is broken, the dblink connections went with its session
+        pass
+
+
+def _notify(cur, channel, payload):
+    """
+    Sends a notification to the processes LISTENing on the channel, when the current transaction commits.
+
+    :param cur: The cursor of the transaction
+    :param channel: The channel name
+    :param payload: The payload (str) of the notification
+    """
+
+    cur.execute("SELECT pg_notify(%s, %s);", (channel, payload,))
@@ -0,0 +1,191 @@
+"""
+This module offers a background listener of Postgresql notifications (LISTEN/NOTIFY).
+"""
+
+# Core modules
+import os, time, select, threading, traceback
+
+# 3rd party imports
+from psycopg2 import sql
+
+
+class DBListener(object):
+    """
+    Class representing a background thread, one per process, LISTENing on Postgresql channels.
+     Callbacks subscribed to a channel are called with the payload of each notification. Tick callbacks are called
+     every poll_interval seconds and each time the listener (re)connects. Connect callbacks are called each time the
+     listener (re)connects, so that subscribers can catch up on anything they may have missed while disconnected.
+     Subscriptions must be done before the listener is started (typically at import time).
+    """
+
+    def __init__(self, db_conn, poll_interval, retry_interval):
+        """
+        Constructor
+
+        :param db_conn: The :class:`~db_connection.DBConnection` object used to open the listening connection
+        :param poll_interval: The number of seconds between each tick
+        :param retry_interval: The number of seconds to wait before reconnecting after a failure
+        """
+        self.db_conn = db_conn
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self._channels = {}
+        self._ticks = []
+        self._connects = []
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._connected = False
+        self._stats = {
+            "connects": 0,
+            "failures": 0,
+            "notifications": 0,
+            "ticks": 0
+        }
+
+
+    def subscribe(self, channel, callback):
+        """
+        Subscribes a callback to the notifications of a channel.
+
+        :param channel: The channel name to listen on
+        :param callback: The function called with the payload (str) of each notification
+        """
+
+        with self._lock:
+            self._channels.setdefault(channel, []).append(callback)
+
+
+    def on_tick(self, callback):
+        """
+        Registers a callback called periodically from the listener thread.
+
+        :param callback: The function called without parameters
+        """
+
+        with self._lock:
+            self._ticks.append(callback)
+
+
+    def on_connect(self, callback):
+        """
+        Registers a callback called from the listener thread each time it (re)connects.
+
+        :param callback: The function called without parameters
+        """
+
+        with self._lock:
+            self._connects.append(callback)
+
+
+    def ensure_started(self):
+        """
+        Starts the listener thread if it's not running in the current process (e.g. after a uWSGI fork).
+        """
+
+        # Quick check, without locking
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._connected = False
+                self._thread = threading.Thread(target=self._run, name="db-listener", daemon=True)
+                self._thread.start()
+
+
+    def is_healthy(self):
+        """
+        Indicates if the listener thread is running and connected in the current process.
+
+        :returns: True if notifications are being received.
+        """
+
+        return self._pid == os.getpid() and self._thread.is_alive() and self._connected
+
+
+    def stats(self):
+        """
+        Gets the statistics of the listener for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        stats = dict(self._stats)
+        stats["healthy"] = self.is_healthy()
+        stats["channels"] = sorted(self._channels.keys())
+        return stats
+
+
+    def _run(self):
+        """
+        The listener thread loop. Never returns.
+        """
+
+        while True:
+            conn = None
+            try:
+                # Connect and listen on the channels
+                conn = self.db_conn.open_listen_conn()
+                with conn.cursor() as cur:
+                    for channel in list(self._channels.keys()):
+                        cur.execute(sql.SQL("LISTEN {channel};").format(channel=sql.Identifier(channel)))
+                self._connected = True
+                self._stats["connects"] += 1
+
+                # Catch up right away
+                for callback in list(self._connects):
+                    callback()
+                self._tick()
+                last_tick = time.monotonic()
+
+                while True:
+                    # Wait for a notification or for the next tick
+                    timeout = max(0.0, self.poll_interval - (time.monotonic() - last_tick))
+                    if select.select([conn], [], [], timeout) != ([], [], []):
+                        conn.poll()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            self._dispatch(notify.channel, notify.payload)
+
+                    # If time for a tick
+                    if time.monotonic() - last_tick >= self.poll_interval:
+                        self._tick()
+                        last_tick = time.monotonic()
+
+            except (Exception,):
+                # Connection lost or callback failure, retry later
+                self._connected = False
+                self._stats["failures"] += 1
+                traceback.print_exc()
+
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+
+                    except (Exception,):
+                        pass
+
+            time.sleep(self.retry_interval)
+
+
+    def _dispatch(self, channel, payload):
+        """
+        Calls the callbacks subscribed to the channel.
+        """
+
+        self._stats["notifications"] += 1
+        for callback in self._channels.get(channel, []):
+            callback(payload)
+
+
+    def _tick(self):
+        """
+        Calls the tick callbacks.
+        """
+
+        self._stats["ticks"] += 1
+        for callback in list(self._ticks):
+            callback()
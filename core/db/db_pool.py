@@ -0,0 +1,335 @@
+"""
+This module offers a thread-safe and fork-safe pool of Postgresql connections.
+"""
+
+# Core modules
+import os, time, threading
+from contextlib import contextmanager
+
+# 3rd party imports
+import psycopg2
+import psycopg2.extensions
+
+# Application modules
+from core.lib.exceptions import *
+
+
+# Connections inherited from a parent process (e.g. the uWSGI master) are kept referenced here so that they're never
+# garbage collected in the child process. Closing them would terminate the session still used by the parent process.
+_ORPHANED_CONNECTIONS = []
+
+
+class _PooledConnection(object):
+    """
+    Class representing a connection held by the pool along with its usage information.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+
+class DBPool(object):
+    """
+    Class representing a pool of Postgresql connections.
+     Connections are created lazily, up to max_size. Idle connections above min_size are closed after idle_timeout
+     seconds. A connection which has been idle for more than health_check_after seconds is validated before being
+     handed out. When the process is forked, the child process starts with an empty pool of its own.
+    """
+
+    def __init__(self, min_size, max_size, checkout_timeout, idle_timeout, health_check_after, **conn_params):
+        """
+        Constructor
+
+        :param min_size: The minimum number of connections kept open once created
+        :param max_size: The maximum number of connections opened at the same time
+        :param checkout_timeout: The number of seconds to wait for a connection when the pool is exhausted
+        :param idle_timeout: The number of seconds after which an idle connection is closed
+        :param health_check_after: The number of seconds of inactivity after which a connection is validated on checkout
+        :param conn_params: The parameters sent to psycopg2.connect
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.conn_params = conn_params
+        self._reset()
+
+
+    def _reset(self):
+        """
+        Resets the pool state for the current process.
+        """
+
+        self._pid = os.getpid()
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = []
+        self._in_use = 0
+        self._connecting = 0
+        self._stats = {
+            "checkouts": 0,
+            "connects": 0,
+            "connect_failures": 0,
+            "discarded": 0,
+            "evicted": 0,
+            "health_check_failures": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0
+        }
+
+
+    def _check_fork(self):
+        """
+        Makes sure the pool doesn't share connections with a parent process after a fork.
+        """
+
+        # If the process has changed since the pool was created
+        if self._pid != os.getpid():
+            # Never use, nor close, the parent's connections
+            _ORPHANED_CONNECTIONS.extend(self._idle)
+            self._reset()
+
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection from the pool for the duration of the 'with' block.
+         Just like a psycopg2 connection used in a 'with' block, the transaction is committed when the block
+         succeeds and rolled back when it raises. The connection then goes back to the pool.
+
+        :returns: A :class:`~psycopg2` connection
+        :raises ServiceBusyException: Raised when no connection could be obtained within the checkout timeout.
+        """
+
+        # Checkout
+        pooled = self._checkout()
+        discard = False
+        try:
+            yield pooled.conn
+
+            # Same behavior as a psycopg2 connection 'with' block
+            pooled.conn.commit()
+
+        except BaseException:
+            # Rollback, and drop the connection if it's not usable anymore
+            try:
+                pooled.conn.rollback()
+
+            except (Exception,):
+                discard = True
+            raise
+
+        finally:
+            # Checkin
+            self._checkin(pooled, discard or pooled.conn.closed != 0)
+
+
+    def _checkout(self):
+        """
+        Gets an idle connection from the pool or opens a new one when possible.
+
+        :returns: A :class:`~_PooledConnection` object
+        """
+
+        # Make sure we're not using a parent process connection
+        self._check_fork()
+
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+        while True:
+            pooled = None
+            with self._cond:
+                # Evict the connections idle for too long
+                to_close = self._evict_idle_locked()
+
+                # Wait for a connection to be available
+                while not self._idle and self._in_use + self._connecting >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise ServiceBusyException()
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    wait_start = time.monotonic()
+                    self._cond.wait(remaining)
+                    self._stats["wait_seconds"] += time.monotonic() - wait_start
+
+                # If an idle connection is available, take the most recently used one
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._in_use += 1
+
+                else:
+                    # Reserve a slot for a new connection
+                    self._connecting += 1
+
+            # Close the evicted connections outside the lock
+            for evicted in to_close:
+                _close_quietly(evicted.conn)
+
+            # If we have to open a new connection
+            if pooled is None:
+                pooled = self._connect()
+                break
+
+            # If the connection is healthy, done
+            if self._is_healthy(pooled):
+                break
+
+            # Drop it and try again
+            self._checkin(pooled, True)
+
+        with self._cond:
+            self._stats["checkouts"] += 1
+        return pooled
+
+
+    def _connect(self):
+        """
+        Opens a new connection in a slot previously reserved.
+
+        :returns: A :class:`~_PooledConnection` object
+        """
+
+        try:
+            conn = psycopg2.connect(**self.conn_params)
+
+        except BaseException:
+            with self._cond:
+                self._connecting -= 1
+                self._stats["connect_failures"] += 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._connecting -= 1
+            self._in_use += 1
+            self._stats["connects"] += 1
+        return _PooledConnection(conn)
+
+
+    def _is_healthy(self, pooled):
+        """
+        Validates a connection taken from the idle list.
+
+        :returns: True if the connection can be used.
+        """
+
+        # If the connection is closed or was left in a transaction
+        if pooled.conn.closed != 0 or \
+           pooled.conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+        # If the connection has been idle long enough that the server may have dropped it
+        if time.monotonic() - pooled.last_used >= self.health_check_after:
+            try:
+                with pooled.conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                pooled.conn.rollback()
+
+            except (Exception,):
+                with self._cond:
+                    self._stats["health_check_failures"] += 1
+                return False
+
+        # Good
+        return True
+
+
+    def _checkin(self, pooled, discard):
+        """
+        Gives back a connection to the pool.
+
+        :param pooled: The :class:`~_PooledConnection` being given back
+        :param discard: True to close the connection instead of keeping it
+        """
+
+        # If the connection was checked out before the process got forked, forget about it
+        if self._pid != os.getpid():
+            _ORPHANED_CONNECTIONS.append(pooled)
+            return
+
+        with self._cond:
+            self._in_use -= 1
+            if not discard:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+
+            else:
+                self._stats["discarded"] += 1
+            self._cond.notify()
+
+        # If discarding
+        if discard:
+            _close_quietly(pooled.conn)
+
+
+    def _evict_idle_locked(self):
+        """
+        Removes the connections idle for more than idle_timeout while keeping min_size connections.
+         The lock must be held by the caller.
+
+        :returns: The list of :class:`~_PooledConnection` evicted which must be closed by the caller.
+        """
+
+        evicted = []
+        now = time.monotonic()
+        total = len(self._idle) + self._in_use + self._connecting
+
+        # The idle list is ordered from the least recently used
+        while self._idle and total > self.min_size and now - self._idle[0].last_used >= self.idle_timeout:
+            evicted.append(self._idle.pop(0))
+            total -= 1
+        self._stats["evicted"] += len(evicted)
+        return evicted
+
+
+    def close_all(self):
+        """
+        Closes all the idle connections of the pool.
+        """
+
+        self._check_fork()
+        with self._cond:
+            to_close = self._idle
+            self._idle = []
+        for pooled in to_close:
+            _close_quietly(pooled.conn)
+
+
+    def stats(self):
+        """
+        Gets the statistics of the pool for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        self._check_fork()
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pid"] = self._pid
+            stats["min_size"] = self.min_size
+            stats["max_size"] = self.max_size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._in_use
+            stats["size"] = len(self._idle) + self._in_use
+            stats["wait_seconds"] = round(stats["wait_seconds"], 6)
+            return stats
+
+
+def _close_quietly(conn):
+    """
+    Closes a connection, ignoring any error.
+    """
+
+    try:
+        conn.close()
+
+    except (Exception,):
+        pass
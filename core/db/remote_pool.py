@@ -0,0 +1,189 @@
+"""
+This module offers pools of connections to the remote (source) Postgresql databases given by the Users.
+"""
+
+# Core modules
+import os, time, hashlib, threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Application modules
+from core.lib.exceptions import *
+from .db_pool import DBPool, _ORPHANED_CONNECTIONS
+
+
+class RemotePools(object):
+    """
+    Class representing the pools of connections to remote databases, one pool per connection descriptor.
+     A pool is keyed by host, port, database, user and a hash of the password (a pool is never shared between
+     different credentials). At most max_pools pools are kept, the least recently used being closed first, and a pool
+     unused for idle_timeout seconds is closed. The number of connections used at the same time on a given host is
+     limited to max_per_host, whatever the database or user.
+    """
+
+    def __init__(self, max_pools, pool_max_size, max_per_host, checkout_timeout, idle_timeout, health_check_after,
+                 connect_timeout):
+        """
+        Constructor
+
+        :param max_pools: The maximum number of pools (connection descriptors) kept
+        :param pool_max_size: The maximum number of connections per pool
+        :param max_per_host: The maximum number of connections used at the same time per host
+        :param checkout_timeout: The number of seconds to wait for a connection
+        :param idle_timeout: The number of seconds after which an idle connection, or an unused pool, is closed
+        :param health_check_after: The number of seconds of inactivity after which a connection is validated on checkout
+        :param connect_timeout: The number of seconds to wait when connecting to a remote database
+        """
+        self.max_pools = max_pools
+        self.pool_max_size = pool_max_size
+        self.max_per_host = max_per_host
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.connect_timeout = connect_timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+
+    def _reset(self):
+        """
+        Resets the pools for the current process.
+        """
+
+        self._pid = os.getpid()
+        self._pools = OrderedDict()
+        self._last_used = {}
+        self._hosts = {}
+        self._stats = {
+            "pools_created": 0,
+            "pools_evicted": 0,
+            "host_limit_timeouts": 0
+        }
+
+
+    @contextmanager
+    def connection(self, host, port, dbname, user, password):
+        """
+        Checks out a connection to a remote database for the duration of the 'with' block.
+
+        :returns: A :class:`~psycopg2` connection
+        :raises ServiceBusyException: Raised when no connection could be obtained within the checkout timeout.
+        """
+
+        # Get the pool and the host limiter
+        pool, host_limit = self._get_pool(host, port, dbname, user, password)
+
+        # Limit the connections per host
+        if not host_limit.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._stats["host_limit_timeouts"] += 1
+            raise ServiceBusyException()
+
+        try:
+            with pool.connection() as conn:
+                yield conn
+
+        finally:
+            host_limit.release()
+
+
+    def host_limit(self, host):
+        """
+        Gets the semaphore limiting the connections used at the same time on a host.
+
+        :param host: The host name
+        :returns: A :class:`~threading.BoundedSemaphore` object
+        """
+
+        with self._lock:
+            self._check_fork_locked()
+            return self._host_limit_locked(host)
+
+
+    def stats(self):
+        """
+        Gets the statistics of the pools for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        with self._lock:
+            self._check_fork_locked()
+            stats = dict(self._stats)
+            stats["pools"] = {_label(key): pool.stats() for key, pool in self._pools.items()}
+            return stats
+
+
+    def _get_pool(self, host, port, dbname, user, password):
+        """
+        Gets the pool for the connection descriptor, creating it if needed.
+
+        :returns: A tuple with the :class:`~db_pool.DBPool` and the host limiter
+        """
+
+        key = (host, int(port), dbname, user, hashlib.sha256(password.encode('utf-8')).hexdigest())
+        to_close = []
+        with self._lock:
+            self._check_fork_locked()
+
+            # Close the pools unused for too long
+            now = time.monotonic()
+            for k in [k for k, used in self._last_used.items() if now - used >= self.idle_timeout and k != key]:
+                to_close.append(self._pools.pop(k))
+                del self._last_used[k]
+
+            # Get or create the pool
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = DBPool(0, self.pool_max_size, self.checkout_timeout, self.idle_timeout, self.health_check_after,
+                              host=host, port=port, dbname=dbname, user=user, password=password,
+                              connect_timeout=self.connect_timeout)
+                self._pools[key] = pool
+                self._stats["pools_created"] += 1
+
+            # Most recently used last
+            self._pools.move_to_end(key)
+            self._last_used[key] = now
+
+            # Keep at most max_pools, close the least recently used ones
+            while len(self._pools) > self.max_pools:
+                k, evicted = self._pools.popitem(last=False)
+                del self._last_used[k]
+                to_close.append(evicted)
+
+            self._stats["pools_evicted"] += len(to_close)
+            host_limit = self._host_limit_locked(host)
+
+        # Close the idle connections of the evicted pools outside the lock (the ones in use are closed by the GC)
+        for evicted in to_close:
+            evicted.close_all()
+        return pool, host_limit
+
+
+    def _host_limit_locked(self, host):
+        """
+        Gets or creates the semaphore of the host. The lock must be held by the caller.
+        """
+
+        if host not in self._hosts:
+            self._hosts[host] = threading.BoundedSemaphore(self.max_per_host)
+        return self._hosts[host]
+
+
+    def _check_fork_locked(self):
+        """
+        Makes sure the pools aren't shared with a parent process after a fork. The lock must be held by the caller.
+        """
+
+        if self._pid != os.getpid():
+            # Never use, nor close, the parent's connections
+            _ORPHANED_CONNECTIONS.append(self._pools)
+            self._reset()
+
+
+def _label(key):
+    """
+    Gets a printable label, without the password hash, for a pool key.
+    """
+
+    return "{user}@{host}:{port}/{dbname}".format(user=key[3], host=key[0], port=key[1], dbname=key[2])
@@ -0,0 +1,180 @@
+"""
+This module computes the union footprint of large remote tables by partitions.
+
+The extent of the table is split in a grid of tiles, each geometry belonging to the tile holding the lower-left corner
+of its bounding box. The tiles are unioned concurrently on the source database (each over its own pooled connection)
+and the partial unions are merged in the application database. The smaller tables, and the other footprint modes,
+are left to the stored procedures.
+"""
+
+# Core modules
+import math, re, threading, time, traceback
+from concurrent.futures import wait, FIRST_EXCEPTION
+
+# 3rd party imports
+import psycopg2
+
+# Application modules
+from core import config
+from core.lib.exceptions import *
+from core.lib.bounded_executor import BoundedExecutor
+from core.db import db_conn
+
+
+# The executor computing the unions of the tiles, GLOBAL
+_executor = BoundedExecutor("footprint", config.FOOTPRINT_PARTITION_WORKERS, config.FOOTPRINT_PARTITION_MAX_PENDING)
+
+# The statistics of the partitioned unions for the current process
+_stats_lock = threading.Lock()
+_stats = {
+    "partitioned": 0,
+    "delegated": 0,
+    "failed": 0,
+    "tiles": 0,
+    "bytes_received": 0,
+    "duration_ms_total": 0.0,
+    "duration_ms_max": 0.0
+}
+
+
+def compute(schema: str, table_name: str, footprint_mode: str, conn_args: tuple, out_crs: int = 4617):
+    """
+    Computes the footprint of a remote table when it's worth partitioning (a union on a large table).
+
+    :param schema: The schema of the table
+    :param table_name: The name of the table
+    :param footprint_mode: The footprint mode of the collection, one of config.FOOTPRINT_MODES
+    :param conn_args: The host, port, database name, user and password of the remote database
+    :param out_crs: The srid of the footprint
+    :returns: A tuple with the footprint as hex extended well known binary, or None when it's to be computed by the
+              database (not a union, small table, table not reachable, which the stored procedures report), and the
+              number of bytes received from the remote database.
+    :raises UserMessageException: Raised when the union of a tile failed.
+    :raises ServiceBusyException: Raised when too many tiles are already being unioned.
+    """
+
+    # If not a union, the database computes it
+    if footprint_mode != "union":
+        return None, 0
+
+    try:
+        # If the table is small (or unknown), the database computes it
+        info = db_conn.get_table_geometry_info(schema, table_name, *conn_args)
+        if not info or info["rows"] < config.FOOTPRINT_PARTITION_MIN_ROWS:
+            _count("delegated")
+            return None, 0
+
+        # Get the exact extent of the table, in its own srid
+        extent = _parse_box(db_conn.get_table_extent(schema, table_name, info["srid"], *conn_args, exact=True))
+        if not extent:
+            _count("delegated")
+            return None, 0
+
+    except psycopg2.Error:
+        # The stored procedures will report the problem with the table
+        traceback.print_exc()
+        _count("delegated")
+        return None, 0
+
+    # Split the extent in tiles
+    started = time.perf_counter()
+    tiles = _tiles(extent, info["rows"])
+
+    # Admit all the tiles
+    futures = []
+    try:
+        for bounds, open_left, open_bottom, open_right, open_top in tiles:
+            futures.append(_executor.submit(db_conn.get_table_union_tile, schema, table_name, info["geom_column"],
+                                            info["srid"], bounds, open_left, open_bottom, open_right, open_top,
+                                            *conn_args))
+
+        # Wait for the unions, stopping at the first error
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for f in done:
+            if f.exception():
+                raise f.exception()
+        wkbs = [f.result() for f in futures]
+
+        # Merge the unions of the tiles
+        geom = db_conn.merge_geometries([w for w in wkbs if w], info["srid"], out_crs)
+
+    except ExecutorFullException as err:
+        # Too many tiles at the same time
+        _count("failed")
+        raise ServiceBusyException() from err
+
+    except psycopg2.Error as err:
+        _count("failed")
+        traceback.print_exc()
+        raise UserMessageException(500,
+                                   "Unable to create the resulting geometry from the input table",
+                                   "Impossible de créer la géométrie résultante à partir de la table") from err
+
+    finally:
+        # Don't union the remaining tiles for nothing
+        for f in futures:
+            f.cancel()
+
+    # Keep the statistics
+    duration_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        _stats["partitioned"] += 1
+        _stats["tiles"] += len(tiles)
+        _stats["bytes_received"] += sum(len(w) for w in wkbs if w)
+        _stats["duration_ms_total"] += duration_ms
+        _stats["duration_ms_max"] = max(_stats["duration_ms_max"], duration_ms)
+    return geom, sum(len(w) for w in wkbs if w)
+
+
+def stats():
+    """
+    Gets the statistics of the partitioned unions for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    with _stats_lock:
+        stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in _stats.items()}
+    stats["executor"] = _executor.stats()
+    return stats
+
+
+def _tiles(extent: tuple, rows: int):
+    """
+    Splits an extent in a grid of tiles of about FOOTPRINT_PARTITION_ROWS_PER_TILE rows each (if evenly distributed).
+
+    :param extent: The (xmin, ymin, xmax, ymax) of the table
+    :param rows: The estimated number of rows of the table
+    :returns: A list of tuples with the bounds of the tile and whether it's on the left, bottom, right or top edge.
+    """
+
+    xmin, ymin, xmax, ymax = extent
+    per_side = math.ceil(math.sqrt(rows / config.FOOTPRINT_PARTITION_ROWS_PER_TILE))
+    per_side = max(1, min(per_side, config.FOOTPRINT_PARTITION_MAX_TILES_PER_SIDE))
+    xs = [xmin + (xmax - xmin) * i / per_side for i in range(per_side)] + [xmax]
+    ys = [ymin + (ymax - ymin) * j / per_side for j in range(per_side)] + [ymax]
+
+    tiles = []
+    for i in range(per_side):
+        for j in range(per_side):
+            tiles.append(((xs[i], ys[j], xs[i + 1], ys[j + 1]), i == 0, j == 0, i == per_side - 1, j == per_side - 1))
+    return tiles
+
+
+def _parse_box(box: str):
+    """
+    Reads a "BOX(xmin ymin,xmax ymax)" string.
+
+    :returns: A tuple (xmin, ymin, xmax, ymax), or None when the box is empty.
+    """
+
+    m = re.match(r"BOX\(\s*(\S+)\s+(\S+)\s*,\s*(\S+)\s+(\S+)\s*\)", box or "")
+    if not m:
+        return None
+    return tuple(float(v) for v in m.groups())
+
+
+def _count(key: str):
+    # Redirect
+    with _stats_lock:
+        _stats[key] += 1
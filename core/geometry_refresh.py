@@ -0,0 +1,176 @@
+"""
+This module handles the refresh of the geometries of all the feature collections.
+
+The collections are refreshed the same way as a PATCH on a collection (see clip_zip_ship.update_collection), skipping
+the ones whose source table hasn't changed, at most GEOMETRY_REFRESH_WORKERS at the same time and at most
+GEOMETRY_REFRESH_MAX_PER_HOST at the same time on a source database host. PyGeoAPI is reloaded once, at the end.
+
+The refresh runs in a background thread of the API processes every GEOMETRY_REFRESH_INTERVAL_SECONDS, in a single
+process at a time. It can also be run from outside the application (e.g. from cron) with:
+    python -m core.geometry_refresh [--force]
+"""
+
+# Core modules
+import argparse, datetime, json, time, traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Application modules
+from core import config, clip_zip_ship
+from core.lib.exceptions import *
+from core.lib.periodic import PeriodicJob
+from core.db import db_conn
+from core.pygeoapi import reload_notifier
+
+
+# The report of the last refresh in the current process
+_last_report = {
+    "report": None
+}
+
+
+def refresh_all(force: bool = False):
+    """
+    Refreshes the geometries of all the feature collections, unless another process is already refreshing them.
+
+    :param force: True to refresh the geometries even if the source tables haven't changed
+    :returns: The report of the refresh (see refresh_collections), or None when another process is refreshing them.
+    """
+
+    # Make sure a single process refreshes at a time
+    with db_conn.try_advisory_lock(config.GEOMETRY_REFRESH_LOCK_ID) as locked:
+        # If another process is refreshing
+        if not locked:
+            print("geometry_refresh.refresh_all: already running in another process")
+            return None
+
+        # Redirect
+        return refresh_collections(db_conn.query_collection_sources(), force)
+
+
+def refresh_collections(sources: list, force: bool = False):
+    """
+    Refreshes the geometries of feature collections, concurrently within the global and per host limits.
+
+    :param sources: The source tables of the collections (see DBConnection.query_collection_sources)
+    :param force: True to refresh the geometries even if the source tables haven't changed
+    :returns: A dictionary with the dates and duration of the refresh, the number of collections refreshed, skipped
+              and failed, the bytes transferred, whether PyGeoAPI was reloaded and the results per collection (see
+              _refresh_one).
+    """
+
+    started = time.perf_counter()
+    started_date = datetime.datetime.now()
+    pending = list(sources)
+    running = {}
+    per_host = Counter()
+    results = []
+
+    with ThreadPoolExecutor(max_workers=config.GEOMETRY_REFRESH_WORKERS, thread_name_prefix="geometry-refresh") as executor:
+        while pending or running:
+            # Start the collections the limits allow, in order
+            for source in list(pending):
+                if len(running) >= config.GEOMETRY_REFRESH_WORKERS:
+                    break
+
+                # If the host of the collection is busy enough, try the next collection
+                if per_host[source["db_host"]] >= config.GEOMETRY_REFRESH_MAX_PER_HOST:
+                    continue
+
+                pending.remove(source)
+                per_host[source["db_host"]] += 1
+                running[executor.submit(_refresh_one, source, force)] = source
+
+            # Wait for a collection to be done
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for f in done:
+                per_host[running.pop(f)["db_host"]] -= 1
+                results.append(f.result())
+
+    # The report
+    report = {
+        "started": started_date.isoformat(),
+        "finished": datetime.datetime.now().isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        "collections": len(results),
+        "refreshed": sum(1 for r in results if r["status"] == "refreshed"),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "bytes": sum(r["bytes"] for r in results),
+        "reloaded": False,
+        "results": sorted(results, key=lambda r: r["collection"])
+    }
+
+    # If geometries were refreshed, reload PyGeoAPI once
+    if report["refreshed"]:
+        report["reloaded"] = reload_notifier.reload_now()
+
+    # Keep the report
+    _last_report["report"] = {k: v for k, v in report.items() if k != "results"}
+    print("geometry_refresh.refresh_collections: " + json.dumps(_last_report["report"]))
+    return report
+
+
+def stats():
+    """
+    Gets the statistics of the refresh job for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    stats = refresh_job.stats()
+    stats["last_refresh"] = _last_report["report"]
+    return stats
+
+
+def _refresh_one(source: dict, force: bool):
+    """
+    Refreshes the geometry of a feature collection.
+
+    :returns: A dictionary with the collection, the host, the status (refreshed, skipped or failed), the reason (see
+              clip_zip_ship.update_collection), the duration in milliseconds, the bytes transferred, the number of
+              retries because the footprint executor was full and the error.
+    """
+
+    started = time.perf_counter()
+    res = {"collection": source["collection_name"], "host": source["db_host"], "status": "failed", "reason": None,
+           "duration_ms": None, "bytes": 0, "busy_retries": 0, "error": None}
+    try:
+        while True:
+            try:
+                # Refresh the geometry, PyGeoAPI is reloaded at the end
+                result = clip_zip_ship.update_collection(source["collection_name"], {"geometry": True, "force": force}, reload=False)
+                break
+
+            except ServiceBusyException:
+                # The footprint executor is full (nothing wrong with the collection), wait for room unless waited enough
+                if time.perf_counter() - started + config.GEOMETRY_REFRESH_BUSY_RETRY_SECONDS > config.GEOMETRY_REFRESH_BUSY_MAX_WAIT_SECONDS:
+                    raise
+                res["busy_retries"] += 1
+                time.sleep(config.GEOMETRY_REFRESH_BUSY_RETRY_SECONDS)
+
+        res["status"] = "refreshed" if result["refreshed"] else "skipped"
+        res["reason"] = result["reason"]
+        res["bytes"] = result["bytes"]
+
+    except UserMessageException as err:
+        res["error"] = err.message
+
+    except Exception as err:
+        traceback.print_exc()
+        res["error"] = str(err)
+
+    res["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return res
+
+
+# Create the background job which is GLOBAL (its thread is started per process, on demand)
+refresh_job = PeriodicJob("geometry-refresh", config.GEOMETRY_REFRESH_INTERVAL_SECONDS, refresh_all)
+
+
+# If we're running in stand alone mode, refresh once
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Refreshes the geometries of all the feature collections.")
+    parser.add_argument("--force", action="store_true", help="refresh even if the source tables haven't changed")
+    args = parser.parse_args()
+    print(json.dumps(refresh_all(args.force), indent=2))
@@ -6,13 +6,22 @@
 '''
 
 import sys, os, logging, json, requests, xmltodict
+import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
 
+from core import config
+from core.lib.exceptions import *
+from core.lib.path_trie import PathTrie
+
 
 #URL_PREFIX = "https://gcgeo.gc.ca/geonetwork/metadata/eng/"
 URL_GEO_NETWORK = {
     #"URL": "https://maps.canada.ca/geonetwork/srv/eng/csw?request=GetRecordById&service=CSW&version=2.0.2&elementSetName=full&outputSchema=http://www.isotc211.org/2005/gmd&typeNames=gmd:MD_Metadata&constraintLanguage=FILTER&id={metadata_uuid}",
     "ROOT": "csw:GetRecordByIdResponse",
+    "SEARCH_ROOT": "csw:GetRecordsResponse",
+    "SEARCH_RESULTS": "csw:SearchResults",
+    "RECORDS_MATCHED": "@numberOfRecordsMatched",
+    "NEXT_RECORD": "@nextRecord",
     "METADATA": "gmd:MD_Metadata",
     "FILE_IDENTIFIER": "gmd:fileIdentifier",
     "LANGUAGE": "gmd:language",
@@ -71,6 +80,84 @@ URL_GEO_NETWORK = {
     "TYPE_CODE": "gmd:MD_KeywordTypeCode",
     "DECIMAL": "gco:Decimal"
 }
+
+# The paths read by the GeoNetworkReader. With the stream backend, only these nodes (and their whole content) are kept.
+_META_PATH = [URL_GEO_NETWORK["ROOT"], URL_GEO_NETWORK["METADATA"]]
+_DATA_IDENTIFY_PATH = _META_PATH + [URL_GEO_NETWORK["IDENTIFY_INFO"], URL_GEO_NETWORK["DATA_IDENTIFY"]]
+_ONLINE_RES_PATH = _META_PATH + [URL_GEO_NETWORK["DISTRIBUTION_INFO"], URL_GEO_NETWORK["DISTRIBUTION"],
+                                 URL_GEO_NETWORK["TRANSFER_OPT"], URL_GEO_NETWORK["TRANSFER_DIGITAL"],
+                                 URL_GEO_NETWORK["TRANSFER_ONLINE"], URL_GEO_NETWORK["TRANSFER_ONLINE_RES"]]
+READER_PATHS = [
+    _META_PATH + [URL_GEO_NETWORK["FILE_IDENTIFIER"]],
+    _META_PATH + [URL_GEO_NETWORK["LANGUAGE"]],
+    _META_PATH + [URL_GEO_NETWORK["DATE_STAMP"]],
+    _META_PATH + [URL_GEO_NETWORK["REFERENCE_SYSTEM_INFO"], URL_GEO_NETWORK["REFERENCE_SYSTEM_IDENTIF"],
+                  URL_GEO_NETWORK["RS_IDENT"], URL_GEO_NETWORK["RS_IDENTIF"], URL_GEO_NETWORK["RS_IDENTIF_CODE"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["EXTENT"], URL_GEO_NETWORK["EX_EXTENT"], URL_GEO_NETWORK["GEOGRAPHIC_ELEMENT"],
+                           URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["EXTENT"], URL_GEO_NETWORK["EX_EXTENT"], URL_GEO_NETWORK["TEMPORAL_ELEMENT"],
+                           URL_GEO_NETWORK["EX_TEMPORAL_EXTENT"], URL_GEO_NETWORK["EXTENT"], URL_GEO_NETWORK["TIME_PERIOD"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["CITATION"], URL_GEO_NETWORK["CI_CITATION"], URL_GEO_NETWORK["TITLE"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["TOPIC_CATEGORY"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["GRAPHIC_OVERVIEW"], URL_GEO_NETWORK["BROWSE_GRAPHIC"],
+                           URL_GEO_NETWORK["FILE_NAME"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["DESC_KEYWORDS"], URL_GEO_NETWORK["KEYWORDS"], URL_GEO_NETWORK["KEYWORD"]],
+    _DATA_IDENTIFY_PATH + [URL_GEO_NETWORK["DESC_KEYWORDS"], URL_GEO_NETWORK["KEYWORDS"], URL_GEO_NETWORK["TYPE"]],
+    _ONLINE_RES_PATH + [URL_GEO_NETWORK["TRANSFER_ONLINE_RES_LINK"]],
+    _ONLINE_RES_PATH + [URL_GEO_NETWORK["TRANSFER_ONLINE_NAME"]]
+]
+
+# The paths read by read_search_results, the same records under the GetRecords response root
+_SEARCH_PATH = [URL_GEO_NETWORK["SEARCH_ROOT"], URL_GEO_NETWORK["SEARCH_RESULTS"]]
+SEARCH_READER_PATHS = [_SEARCH_PATH + path[1:] for path in READER_PATHS]
+
+# The paths read by read_date_stamp
+DATE_STAMP_PATHS = [
+    _META_PATH + [URL_GEO_NETWORK["DATE_STAMP"]]
+]
+
+# The paths read by the GeoNetworkReader from the metadata root, the data identification root and an online resource
+_META_TRIE = PathTrie({
+    "uuid": [URL_GEO_NETWORK["FILE_IDENTIFIER"], URL_GEO_NETWORK["CHAR_STRING"]],
+    "srid": [URL_GEO_NETWORK["REFERENCE_SYSTEM_INFO"], URL_GEO_NETWORK["REFERENCE_SYSTEM_IDENTIF"],
+             URL_GEO_NETWORK["RS_IDENT"], URL_GEO_NETWORK["RS_IDENTIF"], URL_GEO_NETWORK["RS_IDENTIF_CODE"],
+             URL_GEO_NETWORK["CHAR_STRING"]],
+    "language": [URL_GEO_NETWORK["LANGUAGE"], URL_GEO_NETWORK["CHAR_STRING"]],
+    "data_identif": [URL_GEO_NETWORK["IDENTIFY_INFO"], URL_GEO_NETWORK["DATA_IDENTIFY"]],
+    "distribution": [URL_GEO_NETWORK["DISTRIBUTION_INFO"], URL_GEO_NETWORK["DISTRIBUTION"]]
+})
+_BOUNDING_BOX_PATH = [URL_GEO_NETWORK["EXTENT"], URL_GEO_NETWORK["EX_EXTENT"], URL_GEO_NETWORK["GEOGRAPHIC_ELEMENT"],
+                      URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX"]]
+_TIME_PERIOD_PATH = [URL_GEO_NETWORK["EXTENT"], URL_GEO_NETWORK["EX_EXTENT"], URL_GEO_NETWORK["TEMPORAL_ELEMENT"],
+                     URL_GEO_NETWORK["EX_TEMPORAL_EXTENT"], URL_GEO_NETWORK["EXTENT"], URL_GEO_NETWORK["TIME_PERIOD"]]
+_TITLE_PATH = [URL_GEO_NETWORK["CITATION"], URL_GEO_NETWORK["CI_CITATION"], URL_GEO_NETWORK["TITLE"]]
+_KEYWORDS_PATH = [URL_GEO_NETWORK["DESC_KEYWORDS"], URL_GEO_NETWORK["KEYWORDS"]]
+_DATA_IDENTIFY_TRIE = PathTrie({
+    "west": _BOUNDING_BOX_PATH + [URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_WEST"], URL_GEO_NETWORK["DECIMAL"]],
+    "east": _BOUNDING_BOX_PATH + [URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_EAST"], URL_GEO_NETWORK["DECIMAL"]],
+    "south": _BOUNDING_BOX_PATH + [URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_SOUTH"], URL_GEO_NETWORK["DECIMAL"]],
+    "north": _BOUNDING_BOX_PATH + [URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_NORTH"], URL_GEO_NETWORK["DECIMAL"]],
+    "begin": _TIME_PERIOD_PATH + [URL_GEO_NETWORK["BEGIN_POSITION"]],
+    "end": _TIME_PERIOD_PATH + [URL_GEO_NETWORK["END_POSITION"]],
+    "title_og": _TITLE_PATH + [URL_GEO_NETWORK["CHAR_STRING"]],
+    "title_alt": _TITLE_PATH + [URL_GEO_NETWORK["FREE_TEXT"], URL_GEO_NETWORK["TEXT_GROUP"], URL_GEO_NETWORK["LOCALIZED"]],
+    "topic": [URL_GEO_NETWORK["TOPIC_CATEGORY"], URL_GEO_NETWORK["TOPIC_CATEGORY_CODE"]],
+    "thumbnail": [URL_GEO_NETWORK["GRAPHIC_OVERVIEW"], URL_GEO_NETWORK["BROWSE_GRAPHIC"], URL_GEO_NETWORK["FILE_NAME"],
+                  URL_GEO_NETWORK["CHAR_STRING"]],
+    "keywords_type": _KEYWORDS_PATH + [URL_GEO_NETWORK["TYPE"], URL_GEO_NETWORK["TYPE_CODE"]],
+    "keywords_og": _KEYWORDS_PATH + [URL_GEO_NETWORK["KEYWORD"], URL_GEO_NETWORK["CHAR_STRING"]],
+    "keywords_alt": _KEYWORDS_PATH + [URL_GEO_NETWORK["KEYWORD"], URL_GEO_NETWORK["FREE_TEXT"],
+                                      URL_GEO_NETWORK["TEXT_GROUP"], URL_GEO_NETWORK["LOCALIZED"], URL_GEO_NETWORK["TEXT"]]
+})
+_ONLINE_TRIE = PathTrie({
+    "url": [URL_GEO_NETWORK["TRANSFER_ONLINE_RES"], URL_GEO_NETWORK["TRANSFER_ONLINE_RES_LINK"],
+            URL_GEO_NETWORK["TRANSFER_ONLINE_RES_LINK_URL"]],
+    "name_og": [URL_GEO_NETWORK["TRANSFER_ONLINE_RES"], URL_GEO_NETWORK["TRANSFER_ONLINE_NAME"],
+                URL_GEO_NETWORK["CHAR_STRING"]],
+    "name_alt": [URL_GEO_NETWORK["TRANSFER_ONLINE_RES"], URL_GEO_NETWORK["TRANSFER_ONLINE_NAME"],
+                 URL_GEO_NETWORK["FREE_TEXT"], URL_GEO_NETWORK["TEXT_GROUP"], URL_GEO_NETWORK["LOCALIZED"]]
+})
+
 DETERMINANTS_EN = ["a", "an", "the"]
 DETERMINANTS_FR = ["le", "la", "les", "un", "une", "des"]
 
@@ -80,84 +167,73 @@ class GeoNetworkReader(object):
     Class representing a simplified GeoNetwork result of a query to GeoNetwork
     """
 
-    def __init__(self, xml_content: str):
+    def __init__(self, xml_content: str, backend: str = None):
+        """
+        Constructor
+
+        :param xml_content: The GetRecordById response
+        :param backend: The parser, "xmltodict" (the whole document) or "stream" (only the READER_PATHS), defaults to
+                        config.GEONETWORK_READER_BACKEND. Both read the same information.
+        """
         self._xml_content = xml_content
 
-        # Parse the XML to JSON
-        responseJson = xmltodict.parse(xml_content)
+        # Parse the XML to JSON and read it
+        self._read(_parse(xml_content, backend))
+
+
+    @classmethod
+    def from_json(cls, responseJson: dict):
+        """
+        Creates a reader from a response already parsed to JSON.
+
+        :param responseJson: The GetRecordById response, as parsed by xmltodict or stream_parse
+        :returns: The GeoNetworkReader
+        """
+
+        reader = cls.__new__(cls)
+        reader._xml_content = None
+        reader._read(responseJson)
+        return reader
 
+
+    def _read(self, responseJson: dict):
         # If found
         if URL_GEO_NETWORK["ROOT"] in responseJson and \
            URL_GEO_NETWORK["METADATA"] in responseJson[URL_GEO_NETWORK["ROOT"]]:
             # Grab root
             self._meta_root = responseJson[URL_GEO_NETWORK["ROOT"]][URL_GEO_NETWORK["METADATA"]]
 
+            # Read the paths of the metadata root, in one walk
+            founds = _META_TRIE.resolve(self._meta_root)
+
             # Grab the UUID
-            self._uuid = _dig_node_one_value(self._meta_root, [URL_GEO_NETWORK["FILE_IDENTIFIER"],
-                                                               URL_GEO_NETWORK["CHAR_STRING"]])
+            self._uuid = _one_value(founds["uuid"])
 
             # Grab the spatial reference system
-            self._srid = _dig_node_one_value(self._meta_root, [URL_GEO_NETWORK["REFERENCE_SYSTEM_INFO"],
-                                                               URL_GEO_NETWORK["REFERENCE_SYSTEM_IDENTIF"],
-                                                               URL_GEO_NETWORK["RS_IDENT"],
-                                                               URL_GEO_NETWORK["RS_IDENTIF"],
-                                                               URL_GEO_NETWORK["RS_IDENTIF_CODE"],
-                                                               URL_GEO_NETWORK["CHAR_STRING"]]);
+            self._srid = _one_value(founds["srid"])
 
             # Grab the information
-            self._language = _dig_node_one_value(self._meta_root, [URL_GEO_NETWORK["LANGUAGE"],
-                                                                   URL_GEO_NETWORK["CHAR_STRING"]])
+            self._language = _one_value(founds["language"])
             # Grab data identification root
-            self._data_identif_root = _dig_node_one(self._meta_root, [URL_GEO_NETWORK["IDENTIFY_INFO"],
-                                                                      URL_GEO_NETWORK["DATA_IDENTIFY"]])
+            self._data_identif_root = _one(founds["data_identif"])
+
+            # Read the paths of the data identification root, in one walk
+            identif_founds = _DATA_IDENTIFY_TRIE.resolve(self._data_identif_root)
 
             # Grab the extent
             self._extent = {}
-            self._extent["west"] = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["EXTENT"],
-                                                                                 URL_GEO_NETWORK["EX_EXTENT"],
-                                                                                 URL_GEO_NETWORK["GEOGRAPHIC_ELEMENT"],
-                                                                                 URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX"],
-                                                                                 URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_WEST"],
-                                                                                 URL_GEO_NETWORK["DECIMAL"]])
-            self._extent["east"] = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["EXTENT"],
-                                                                                 URL_GEO_NETWORK["EX_EXTENT"],
-                                                                                 URL_GEO_NETWORK["GEOGRAPHIC_ELEMENT"],
-                                                                                 URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX"],
-                                                                                 URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_EAST"],
-                                                                                 URL_GEO_NETWORK["DECIMAL"]])
-            self._extent["south"] = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["EXTENT"],
-                                                                                  URL_GEO_NETWORK["EX_EXTENT"],
-                                                                                  URL_GEO_NETWORK["GEOGRAPHIC_ELEMENT"],
-                                                                                  URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX"],
-                                                                                  URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_SOUTH"],
-                                                                                  URL_GEO_NETWORK["DECIMAL"]])
-            self._extent["north"] = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["EXTENT"],
-                                                                                  URL_GEO_NETWORK["EX_EXTENT"],
-                                                                                  URL_GEO_NETWORK["GEOGRAPHIC_ELEMENT"],
-                                                                                  URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX"],
-                                                                                  URL_GEO_NETWORK["GEOGRAPHIC_BOUNDING_BOX_NORTH"],
-                                                                                  URL_GEO_NETWORK["DECIMAL"]])
+            self._extent["west"] = _one_value(identif_founds["west"])
+            self._extent["east"] = _one_value(identif_founds["east"])
+            self._extent["south"] = _one_value(identif_founds["south"])
+            self._extent["north"] = _one_value(identif_founds["north"])
 
             # Grab the time extent
             self._temporal_extent = {}
-            self._temporal_extent["begin"] = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["EXTENT"],
-                                                                                           URL_GEO_NETWORK["EX_EXTENT"],
-                                                                                           URL_GEO_NETWORK["TEMPORAL_ELEMENT"],
-                                                                                           URL_GEO_NETWORK["EX_TEMPORAL_EXTENT"],
-                                                                                           URL_GEO_NETWORK["EXTENT"],
-                                                                                           URL_GEO_NETWORK["TIME_PERIOD"],
-                                                                                           URL_GEO_NETWORK["BEGIN_POSITION"]])
-            self._temporal_extent["end"] = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["EXTENT"],
-                                                                               URL_GEO_NETWORK["EX_EXTENT"],
-                                                                               URL_GEO_NETWORK["TEMPORAL_ELEMENT"],
-                                                                               URL_GEO_NETWORK["EX_TEMPORAL_EXTENT"],
-                                                                               URL_GEO_NETWORK["EXTENT"],
-                                                                               URL_GEO_NETWORK["TIME_PERIOD"],
-                                                                               URL_GEO_NETWORK["END_POSITION"]])
+            self._temporal_extent["begin"] = _one_value(identif_founds["begin"])
+            self._temporal_extent["end"] = _one_value(identif_founds["end"])
 
             # Grab distribution root
-            self._distribution_info_root = _dig_node_one(self._meta_root, [URL_GEO_NETWORK["DISTRIBUTION_INFO"],
-                                                                           URL_GEO_NETWORK["DISTRIBUTION"]])
+            self._distribution_info_root = _one(founds["distribution"])
 
             # Grab transfer options
             self._transfer_options = _dig_node_one(self._distribution_info_root, [URL_GEO_NETWORK["TRANSFER_OPT"]])
@@ -166,23 +242,14 @@ class GeoNetworkReader(object):
             if isinstance(self._transfer_options, dict):
                 self._transfer_options = [self._transfer_options]
 
-            self._title_og = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["CITATION"],
-                                                                           URL_GEO_NETWORK["CI_CITATION"],
-                                                                           URL_GEO_NETWORK["TITLE"],
-                                                                           URL_GEO_NETWORK["CHAR_STRING"]])
+            self._title_og = _one_value(identif_founds["title_og"])
 
-            self._title_alt = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["CITATION"],
-                                                                            URL_GEO_NETWORK["CI_CITATION"],
-                                                                            URL_GEO_NETWORK["TITLE"],
-                                                                            URL_GEO_NETWORK["FREE_TEXT"],
-                                                                            URL_GEO_NETWORK["TEXT_GROUP"],
-                                                                            URL_GEO_NETWORK["LOCALIZED"]])
+            self._title_alt = _one_value(identif_founds["title_alt"])
 
             # Grab the topic
             self._topic = "topic"
             if URL_GEO_NETWORK["TOPIC_CATEGORY"] in self._data_identif_root:
-            	self._topic = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["TOPIC_CATEGORY"],
-            																URL_GEO_NETWORK["TOPIC_CATEGORY_CODE"]])
+            	self._topic = _one_value(identif_founds["topic"])
 
             # Grab the date
             self._date = ""
@@ -195,18 +262,11 @@ class GeoNetworkReader(object):
                 self._date = _dig_node_one_value(self._meta_root, [URL_GEO_NETWORK["DATE_STAMP"], URL_GEO_NETWORK["DATE"]])
 
             # Grab the thumbnail url
-            self._thumbnail_url = _dig_node_one_value(self._data_identif_root, [URL_GEO_NETWORK["GRAPHIC_OVERVIEW"],
-                                                                                URL_GEO_NETWORK["BROWSE_GRAPHIC"],
-                                                                                URL_GEO_NETWORK["FILE_NAME"],
-                                                                                URL_GEO_NETWORK["CHAR_STRING"]])
+            self._thumbnail_url = _one_value(identif_founds["thumbnail"])
 
             # Check keywords
-            keywords_group = _dig_node_all(self._data_identif_root, [URL_GEO_NETWORK["DESC_KEYWORDS"],
-                                                                     URL_GEO_NETWORK["KEYWORDS"]])
-
             self._keywords_nice_group = {}
-            key_group = _dig_node_one_value(keywords_group, [URL_GEO_NETWORK["TYPE"],
-                                                             URL_GEO_NETWORK["TYPE_CODE"]])
+            key_group = _one_value(identif_founds["keywords_type"])
 
             if key_group not in self._keywords_nice_group:
                 self._keywords_nice_group[key_group] = {
@@ -214,14 +274,9 @@ class GeoNetworkReader(object):
                     "alt": []
                 }
 
-            self._keywords_nice_group[key_group]["og"].extend(_dig_node_all_values(keywords_group, [URL_GEO_NETWORK["KEYWORD"],
-                                                                                                    URL_GEO_NETWORK["CHAR_STRING"]]))
+            self._keywords_nice_group[key_group]["og"].extend(_all_values(identif_founds["keywords_og"]))
 
-            self._keywords_nice_group[key_group]["alt"].extend(_dig_node_all_values(keywords_group, [URL_GEO_NETWORK["KEYWORD"],
-                                                                                                     URL_GEO_NETWORK["FREE_TEXT"],
-                                                                                                     URL_GEO_NETWORK["TEXT_GROUP"],
-                                                                                                     URL_GEO_NETWORK["LOCALIZED"],
-                                                                                                     URL_GEO_NETWORK["TEXT"]]))
+            self._keywords_nice_group[key_group]["alt"].extend(_all_values(identif_founds["keywords_alt"]))
 
             ## Further split each node on the commas and rebuild the lists in the dictionary (in case keywords are split by commas)
             self._keywords_splits = {
@@ -235,6 +290,10 @@ class GeoNetworkReader(object):
                     self._keywords_splits["alt"].extend([x.strip() for x in rec.split(',')])
 
 
+    def date_stamp(self):
+        return self._date
+
+
     def is_english(self):
         return "eng" in self._language
 
@@ -308,22 +367,15 @@ class GeoNetworkReader(object):
 
 		            # For each online node
 		            for online in online_nodes:
-		                # Read the url
-		                url = _dig_node_one_value(online, [URL_GEO_NETWORK["TRANSFER_ONLINE_RES"],
-		                                                   URL_GEO_NETWORK["TRANSFER_ONLINE_RES_LINK"],
-		                                                   URL_GEO_NETWORK["TRANSFER_ONLINE_RES_LINK_URL"]])
+		                # Read the url and names, in one walk
+		                online_founds = _ONLINE_TRIE.resolve(online)
+		                url = _one_value(online_founds["url"])
 
 		                # If the url points to the datacube cog
 		                if url and url.endswith(".tif"):
-		                    name_og =  _dig_node_one_value(online, [URL_GEO_NETWORK["TRANSFER_ONLINE_RES"],
-		                                                            URL_GEO_NETWORK["TRANSFER_ONLINE_NAME"],
-		                                                            URL_GEO_NETWORK["CHAR_STRING"]])
+		                    name_og = _one_value(online_founds["name_og"])
 
-		                    name_alt = _dig_node_one_value(online, [URL_GEO_NETWORK["TRANSFER_ONLINE_RES"],
-		                                                            URL_GEO_NETWORK["TRANSFER_ONLINE_NAME"],
-		                                                            URL_GEO_NETWORK["FREE_TEXT"],
-		                                                            URL_GEO_NETWORK["TEXT_GROUP"],
-		                                                            URL_GEO_NETWORK["LOCALIZED"]])
+		                    name_alt = _one_value(online_founds["name_alt"])
 
 		                    # Read the url path
 		                    cogs_infos.append({
@@ -338,17 +390,249 @@ class GeoNetworkReader(object):
         return cogs_infos
 
 
+def read_records(xml_content: str, backend: str = None):
+    """
+    Reads all the metadata records of a GetRecordById response (e.g. when requesting many ids at once).
+
+    :param xml_content: The GetRecordById response
+    :param backend: The parser (see GeoNetworkReader)
+    :returns: A list of GeoNetworkReader, one per record, in the order of the response.
+    """
+
+    # Parse the XML to JSON
+    records = _dig_node_one(_parse(xml_content, backend), _META_PATH)
+
+    # Read each record as if alone in its response
+    return [GeoNetworkReader.from_json(r) for r in _metadata_responses(records)]
+
+
+def read_search_results(xml_content: str, backend: str = None):
+    """
+    Reads a page of a GetRecords response (outputSchema gmd, elementSetName full).
+
+    :param xml_content: The GetRecords response
+    :param backend: The parser (see GeoNetworkReader)
+    :returns: A tuple with a list of GeoNetworkReader, one per record in the order of the response (None for a record
+              which couldn't be read), the number of records matched by the search and the position of the next record
+              (0 when it was the last page).
+    :raises UserMessageException: Raised when the response isn't a GetRecords response.
+    """
+
+    # Parse the XML to JSON
+    if (backend or config.GEONETWORK_READER_BACKEND) == "stream":
+        responseJson = stream_parse(xml_content, SEARCH_READER_PATHS)
+    else:
+        responseJson = xmltodict.parse(xml_content)
+
+    # If not a search response (e.g. an ows:ExceptionReport sent with a 200)
+    search_root = responseJson.get(URL_GEO_NETWORK["SEARCH_ROOT"])
+    if not isinstance(search_root, dict) or URL_GEO_NETWORK["SEARCH_RESULTS"] not in search_root:
+        raise UserMessageException(502,
+                                   "The catalog returned an invalid search response",
+                                   "Le catalogue a retourné une réponse de recherche invalide")
+    results = search_root[URL_GEO_NETWORK["SEARCH_RESULTS"]] or {}
+
+    # Read the paging of the search
+    matched = int(results.get(URL_GEO_NETWORK["RECORDS_MATCHED"]) or 0)
+    next_record = int(results.get(URL_GEO_NETWORK["NEXT_RECORD"]) or 0)
+
+    # Read each record as if alone in its response, an incomplete record not preventing the others from being read
+    readers = []
+    for responseJson in _metadata_responses(results.get(URL_GEO_NETWORK["METADATA"])):
+        try:
+            readers.append(GeoNetworkReader.from_json(responseJson))
+
+        except Exception as err:
+            print("geonetwork.read_search_results: " + str(err))
+            readers.append(None)
+    return readers, matched, next_record
+
+
+def read_date_stamp(xml_content: str):
+    """
+    Reads the date stamp of a metadata record, without reading the rest of it (e.g. a summary record).
+
+    :param xml_content: The GetRecordById response
+    :returns: The gmd:dateStamp (DateTime or Date) of the record, or None when not found.
+    """
+
+    # Parse the XML to JSON, only the date stamp
+    responseJson = stream_parse(xml_content, DATE_STAMP_PATHS)
+    meta_root = _dig_node_one(responseJson, _META_PATH)
+
+    # Redirect
+    return _dig_node_one_value(meta_root, [URL_GEO_NETWORK["DATE_STAMP"], URL_GEO_NETWORK["DATE_TIME"]]) or \
+           _dig_node_one_value(meta_root, [URL_GEO_NETWORK["DATE_STAMP"], URL_GEO_NETWORK["DATE"]])
+
+
+def _metadata_responses(records):
+    # If a single record, or none
+    if not isinstance(records, list):
+        records = [records] if records else []
+
+    # Each record in a GetRecordById response of its own
+    return [{URL_GEO_NETWORK["ROOT"]: {URL_GEO_NETWORK["METADATA"]: r}} for r in records]
+
+
+def _parse(xml_content, backend: str = None):
+    # Parse the XML to JSON, with the backend
+    if (backend or config.GEONETWORK_READER_BACKEND) == "stream":
+        return stream_parse(xml_content, READER_PATHS)
+    return xmltodict.parse(xml_content)
+
+
+def stream_parse(xml_content, paths: list):
+    """
+    Parses an XML document to JSON, like xmltodict.parse, in a single streaming pass keeping only the given paths.
+     The nodes leading to a path are kept (with their attributes and text), the nodes at the end of a path are kept
+     with their whole content and all the other nodes are discarded as soon as they're read.
+
+    :param xml_content: The XML document, as text or bytes
+    :param paths: The paths to keep, each a list of node names (with their namespace prefix) from the document root
+    :returns: The JSON of the kept nodes, the same as xmltodict.parse returns for them.
+    """
+
+    # Build the tree of the paths, a leaf marking a node to keep whole
+    tree = {}
+    for path in paths:
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+            if node is _KEEP_ALL:
+                break
+        else:
+            node[path[-1]] = _KEEP_ALL
+
+    # The prefixes of the namespaces in scope, as xmltodict keeps the names as written
+    uris = {}
+    declared = []
+    xmlns = []
+    names = {}
+
+    def name_of(tag):
+        # Turn a {uri}name into the prefix:name of the document
+        name = names.get(tag)
+        if name is None:
+            name = tag
+            if tag[0] == "{":
+                uri, name = tag[1:].split("}", 1)
+                prefix = uris.get(uri)
+                if prefix and prefix[-1]:
+                    name = prefix[-1] + ":" + name
+            names[tag] = name
+        return name
+
+    # Each frame is [paths tree (or _KEEP_ALL or None when discarded), item], the document first
+    stack = [[tree, None]]
+    for event, elem in _pull_events(xml_content):
+        if event == "start":
+            # If the parent is discarded, or this node isn't on a path
+            subtree = stack[-1][0]
+            if subtree is not None and subtree is not _KEEP_ALL:
+                subtree = subtree.get(name_of(elem.tag))
+            if subtree is None:
+                xmlns = []
+                stack.append([None, None])
+                continue
+
+            # Keep it, with its namespace declarations and attributes (like xmltodict)
+            item = None
+            if xmlns or elem.attrib:
+                item = dict(xmlns)
+                item.update(("@" + name_of(k), v) for k, v in elem.attrib.items())
+                xmlns = []
+            stack.append([subtree, item])
+
+        elif event == "end":
+            subtree, item = stack.pop()
+
+            # If discarded, free it (its tail, the text of its parent, comes later)
+            if subtree is None:
+                elem.clear()
+                continue
+
+            # The text of the node, around its children
+            text = elem.text
+            if len(elem):
+                text = (text or "") + "".join(child.tail or "" for child in elem)
+
+                # Like xmltodict, a node with children is a dictionary even when they're all discarded
+                if item is None:
+                    item = {}
+            text = (text.strip() or None) if text else None
+            if item is not None:
+                if text:
+                    _push(item, URL_GEO_NETWORK["TEXT"], text)
+                text = item
+            stack[-1][1] = _push(stack[-1][1], name_of(elem.tag), text)
+            del elem[:]
+
+        elif event == "start-ns":
+            prefix, uri = elem
+            uris.setdefault(uri, []).append(prefix)
+            declared.append(uri)
+            xmlns.append(("@xmlns:" + prefix if prefix else "@xmlns", uri))
+            names.clear()
+
+        else:
+            # Out of the scope of the declaration
+            uris[declared.pop()].pop()
+            names.clear()
+
+    # The document
+    return stack[0][1] or {}
+
+
+# Marks the nodes to keep with their whole content
+_KEEP_ALL = object()
+
+# The size of the chunks fed to the stream parser
+_STREAM_CHUNK_SIZE = 65536
+
+
+def _pull_events(xml_content):
+    # Feed the parser by chunks, so that the nodes are read (and discarded) as they come
+    parser = ET.XMLPullParser(events=("start", "end", "start-ns", "end-ns"))
+    for i in range(0, len(xml_content), _STREAM_CHUNK_SIZE):
+        parser.feed(xml_content[i:i + _STREAM_CHUNK_SIZE])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _push(item, key, value):
+    # Like xmltodict, a repeated node becomes a list
+    if item is None:
+        item = {}
+    if key not in item:
+        item[key] = value
+    elif isinstance(item[key], list):
+        item[key].append(value)
+    else:
+        item[key] = [item[key], value]
+    return item
+
+
 def _dig_node_one(starting_node, list_keys):
-    value = None
-    founds = _dig_node_all(starting_node, list_keys)
-    if len(founds) > 0:
-        value = founds.pop(0)
-    return value
+    # Redirect
+    return _one(_dig_node_all(starting_node, list_keys))
 
 
 def _dig_node_one_value(starting_node, list_keys):
     # Redirect
-    value = _dig_node_one(starting_node, list_keys)
+    return _one_value(_dig_node_all(starting_node, list_keys))
+
+
+def _one(founds):
+    # The first node found, if any
+    if len(founds) > 0:
+        return founds[0]
+    return None
+
+
+def _one_value(founds):
+    # Redirect
+    value = _one(founds)
 
     # Make sure we read the "value" (not a dictionary due to namespaces being read at the node level)
     if isinstance(value, dict):
@@ -368,8 +652,10 @@ def _dig_node_all(starting_node, list_keys):
 
 def _dig_node_all_values(starting_node, list_keys):
     # Redirect
-    founds = _dig_node_all(starting_node, list_keys)
+    return _all_values(_dig_node_all(starting_node, list_keys))
+
 
+def _all_values(founds):
     # Make sure we read the "value" (not a dictionary due to namespaces being read at the node level)
     found_values = []
     for f in founds:
@@ -380,20 +666,18 @@ def _dig_node_all_values(starting_node, list_keys):
     return found_values
 
 
-def _dig_node_REC(current_node, list_keys, founds):
+def _dig_node_REC(current_node, list_keys, founds, index=0):
     # If done
-    if len(list_keys) == 0:
+    if index == len(list_keys):
         founds.append(current_node)
         return
 
     # If the node is a dictionary
     if isinstance(current_node, dict):
-        key = list_keys[0]
-        list_keys_local = list_keys.copy()
-        list_keys_local.pop(0)
+        key = list_keys[index]
         if key in current_node:
-            _dig_node_REC(current_node[key], list_keys_local, founds)
+            _dig_node_REC(current_node[key], list_keys, founds, index + 1)
 
     elif isinstance(current_node, list):
         for itm in current_node:
-            _dig_node_REC(itm, list_keys, founds)
+            _dig_node_REC(itm, list_keys, founds, index)
@@ -0,0 +1,163 @@
+"""
+This module handles the jobs: long operations (e.g. adding a collection) which run in the background instead of
+holding the HTTP request.
+
+The jobs are recorded in the jobs table so that their state can be read by any process. They run on a small pool of
+threads in the process which received them, which admits a limited number of pending jobs.
+"""
+
+# Core modules
+import datetime, traceback, uuid
+
+# Application modules
+from core import config
+from core.lib.exceptions import *
+from core.lib.bounded_executor import BoundedExecutor
+from core.lib.periodic import PeriodicJob
+from core.db import db_conn
+
+
+# The executor running the jobs, GLOBAL
+_executor = BoundedExecutor("jobs", config.JOB_WORKERS, config.JOB_MAX_PENDING)
+
+
+def submit(job_type: str, target: str, fn, *args):
+    """
+    Records a job and runs the function in the background.
+
+    :param job_type: The type of the job (e.g. add_collection)
+    :param target: The name of what the job works on (e.g. the collection name)
+    :param fn: The function to run
+    :returns: The identifier of the job
+    :raises ServiceBusyException: Raised when too many jobs are already pending in this process.
+    """
+
+    # Record the job
+    job_id = str(uuid.uuid4())
+    db_conn.add_job(job_id, job_type, target)
+
+    try:
+        # Run it in the background
+        _executor.submit(_run, job_id, fn, args)
+        return job_id
+
+    except ExecutorFullException as err:
+        # Too many jobs at the same time
+        busy = ServiceBusyException()
+        db_conn.finish_job(job_id, "failed", busy.code, busy.message, busy.message_fr)
+        raise busy from err
+
+
+def get_job(job_id: str):
+    """
+    Gets a job.
+
+    :param job_id: The identifier of the job
+    :returns: A dictionary with the job_id, type, target, state (queued, running, succeeded or failed), the dates,
+              the queue and run durations and, when failed, the UserMessageException (error).
+    :raises NotFoundException: Raised when the job doesn't exist.
+    """
+
+    # Validate the job id is a uuid
+    try:
+        job_id = str(uuid.UUID(job_id))
+
+    except ValueError:
+        raise NotFoundException()
+
+    # Redirect
+    r = db_conn.query_job(job_id)
+
+    # If not found
+    if not r:
+        raise NotFoundException()
+
+    job = {
+        "job_id": str(r[config.DB_TABLE_JOBS["FIELD_ID"]]),
+        "type": r[config.DB_TABLE_JOBS["FIELD_TYPE"]],
+        "target": r[config.DB_TABLE_JOBS["FIELD_TARGET"]],
+        "state": r[config.DB_TABLE_JOBS["FIELD_STATE"]],
+        "created": _iso(r[config.DB_TABLE_JOBS["FIELD_CREATED_DATE"]]),
+        "started": _iso(r[config.DB_TABLE_JOBS["FIELD_STARTED_DATE"]]),
+        "finished": _iso(r[config.DB_TABLE_JOBS["FIELD_FINISHED_DATE"]]),
+        "queue_ms": _duration_ms(r[config.DB_TABLE_JOBS["FIELD_CREATED_DATE"]], r[config.DB_TABLE_JOBS["FIELD_STARTED_DATE"]]),
+        "run_ms": _duration_ms(r[config.DB_TABLE_JOBS["FIELD_STARTED_DATE"]], r[config.DB_TABLE_JOBS["FIELD_FINISHED_DATE"]]),
+        "error": None
+    }
+
+    # If failed
+    if r[config.DB_TABLE_JOBS["FIELD_ERROR_STATUS"]]:
+        job["error"] = UserMessageException(r[config.DB_TABLE_JOBS["FIELD_ERROR_STATUS"]],
+                                            r[config.DB_TABLE_JOBS["FIELD_ERROR_EN"]],
+                                            r[config.DB_TABLE_JOBS["FIELD_ERROR_FR"]])
+    return job
+
+
+def purge_finished_jobs():
+    """
+    Marks the jobs queued or running for more than JOB_TIMEOUT_SECONDS as failed (their process died, e.g. killed or
+    recycled), then deletes the jobs finished for more than JOB_RETENTION_DAYS. A job failed while queued is skipped
+    when its turn comes, and a job failed while running keeps its failed state when it ends.
+
+    :returns: A dictionary with the number of jobs failed and deleted
+    """
+
+    # Fail the jobs which will never finish
+    now = datetime.datetime.now()
+    timeout = UserMessageException(500, "The job didn't finish in time, it was interrupted",
+                                   "La tâche ne s'est pas terminée à temps, elle a été interrompue")
+    failed = db_conn.fail_stale_jobs(now - datetime.timedelta(seconds=config.JOB_TIMEOUT_SECONDS),
+                                     timeout.code, timeout.message, timeout.message_fr)
+
+    # Redirect
+    return {"failed": failed, "deleted": db_conn.purge_jobs(now - datetime.timedelta(days=config.JOB_RETENTION_DAYS))}
+
+
+def stats():
+    """
+    Gets the statistics of the jobs executor for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    stats = _executor.stats()
+    stats["purge"] = purge_job.stats()
+    return stats
+
+
+def _run(job_id: str, fn, args: tuple):
+    """
+    Runs the job in a worker thread and records its state.
+    """
+
+    try:
+        # If the job was failed while queued (e.g. as stale), don't run it
+        if not db_conn.start_job(job_id):
+            print(f"jobs._run: job {job_id} is no longer queued, skipped")
+            return
+
+        fn(*args)
+        db_conn.finish_job(job_id, "succeeded")
+
+    except UserMessageException as err:
+        # The error for the User
+        db_conn.finish_job(job_id, "failed", err.code, err.message, err.message_fr)
+
+    except Exception:
+        # A generic error
+        traceback.print_exc()
+        db_conn.finish_job(job_id, "failed", 500, "Internal error", "Erreur interne")
+
+
+def _iso(date):
+    # Redirect
+    return date.isoformat() if date else None
+
+
+def _duration_ms(start, end):
+    # Redirect
+    return round((end - start).total_seconds() * 1000, 3) if start and end else None
+
+
+# Create the background job purging the old jobs which is GLOBAL (its thread is started per process, on demand)
+purge_job = PeriodicJob("job-purge", config.JOB_PURGE_INTERVAL_SECONDS, purge_finished_jobs)
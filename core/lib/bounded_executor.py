@@ -0,0 +1,132 @@
+"""
+This module offers a thread pool executor with admission control and timing metrics.
+"""
+
+# Core modules
+import os, time, threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Application modules
+from core.lib.exceptions import *
+
+
+class BoundedExecutor(object):
+    """
+    Class representing a pool of max_workers threads which admits at most max_pending tasks (running + queued).
+     Submitting a task when the executor is full raises an ExecutorFullException right away instead of queuing.
+     Each forked process gets its own threads.
+    """
+
+    def __init__(self, name, max_workers, max_pending):
+        """
+        Constructor
+
+        :param name: The name of the executor (prefix of its threads names)
+        :param max_workers: The number of threads running the tasks
+        :param max_pending: The maximum number of tasks admitted at the same time, running or queued
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._pending = 0
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+            "run_ms_total": 0.0,
+            "run_ms_max": 0.0
+        }
+
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Submits a task.
+
+        :returns: A :class:`~concurrent.futures.Future` object
+        :raises ExecutorFullException: Raised when max_pending tasks are already admitted.
+        """
+
+        with self._lock:
+            # If the process has changed (forked), the threads of the parent aren't there anymore
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                self._pending = 0
+
+            # Admission control
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise ExecutorFullException(self.name + " executor is full")
+            self._pending += 1
+            self._stats["submitted"] += 1
+            executor = self._executor
+
+        # Submit the task, timed
+        submitted = time.perf_counter()
+        try:
+            return executor.submit(self._run_timed, submitted, fn, args, kwargs)
+
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Submits a task and waits for its result.
+
+        :returns: The result of the task
+        :raises ExecutorFullException: Raised when max_pending tasks are already admitted.
+        """
+
+        # Redirect
+        return self.submit(fn, *args, **kwargs).result()
+
+
+    def stats(self):
+        """
+        Gets the statistics of the executor for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        with self._lock:
+            stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()}
+            stats["max_workers"] = self.max_workers
+            stats["max_pending"] = self.max_pending
+            stats["pending"] = self._pending if self._pid == os.getpid() else 0
+            return stats
+
+
+    def _run_timed(self, submitted, fn, args, kwargs):
+        """
+        Runs the task in a worker thread and records its queue wait and run times.
+        """
+
+        started = time.perf_counter()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+
+        except BaseException:
+            failed = True
+            raise
+
+        finally:
+            finished = time.perf_counter()
+            queue_wait_ms = (started - submitted) * 1000
+            run_ms = (finished - started) * 1000
+            with self._lock:
+                self._pending -= 1
+                self._stats["failed" if failed else "completed"] += 1
+                self._stats["queue_wait_ms_total"] += queue_wait_ms
+                self._stats["queue_wait_ms_max"] = max(self._stats["queue_wait_ms_max"], queue_wait_ms)
+                self._stats["run_ms_total"] += run_ms
+                self._stats["run_ms_max"] = max(self._stats["run_ms_max"], run_ms)
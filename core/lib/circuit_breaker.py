@@ -0,0 +1,111 @@
+"""
+This module offers a circuit breaker, to fail fast when a remote service is down instead of waiting on it.
+"""
+
+# Core modules
+import time, threading
+
+
+class CircuitBreaker(object):
+    """
+    Class representing a circuit breaker. After failure_threshold consecutive failures the circuit opens and the calls
+     are refused right away for reset_timeout seconds. Then a single call is let through (half open): if it succeeds
+     the circuit closes, else it opens again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        """
+        Constructor
+
+        :param name: The name of the circuit (e.g. the remote service)
+        :param failure_threshold: The number of consecutive failures opening the circuit
+        :param reset_timeout: The number of seconds the circuit stays open before letting a call through
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = CircuitBreaker.CLOSED
+        self._failures = 0
+        self._opened = None
+        self._stats = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0
+        }
+
+
+    def allow(self):
+        """
+        Tells if a call can go through, the caller then records its success or failure.
+
+        :returns: True if the call can go through, False if it's refused (the circuit is open).
+        """
+
+        with self._lock:
+            # If open for long enough, let a single call through to probe the service
+            if self._state == CircuitBreaker.OPEN and time.monotonic() - self._opened >= self.reset_timeout:
+                self._state = CircuitBreaker.HALF_OPEN
+                return True
+
+            # If open, or already probing
+            if self._state != CircuitBreaker.CLOSED:
+                self._stats["rejected"] += 1
+                return False
+            return True
+
+
+    def record_success(self):
+        """
+        Records a successful call, which closes the circuit.
+        """
+
+        with self._lock:
+            self._stats["successes"] += 1
+            self._state = CircuitBreaker.CLOSED
+            self._failures = 0
+
+
+    def record_failure(self):
+        """
+        Records a failed call, which opens the circuit past the threshold or when probing.
+        """
+
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._state == CircuitBreaker.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != CircuitBreaker.OPEN:
+                    self._stats["opened"] += 1
+                self._state = CircuitBreaker.OPEN
+                self._opened = time.monotonic()
+
+
+    def state(self):
+        """
+        Gets the state of the circuit.
+
+        :returns: closed, open or half_open
+        """
+
+        with self._lock:
+            return self._state
+
+
+    def stats(self):
+        """
+        Gets the statistics of the circuit.
+
+        :returns: A dictionary of statistics
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._state
+            stats["consecutive_failures"] = self._failures
+            return stats
@@ -1,10 +1,36 @@
 """
 This module offers functions to encrypt/verify passwords.
+
+Password verifications run on a small dedicated pool of threads which admits a limited number of pending
+verifications, so that a burst of logins can't hold every worker on bcrypt.
+
+The bcrypt cost (rounds) is calibrated on the current CPU so that a verification takes about
+PASSWORD_HASH_TARGET_MS. Passwords hashed with a lower cost are rehashed on login (see needs_rehash), never with a
+lower one: the calibrations of the processes differ (CPU, load), a stored cost is only ever raised.
 """
 
+# Core modules
+import math, threading, time
+
 # 3rd party imports
 import bcrypt
 
+# Application modules
+from core import config
+from core.lib.exceptions import *
+from core.lib.bounded_executor import BoundedExecutor
+
+
+# The executor verifying the passwords, GLOBAL
+_check_executor = BoundedExecutor("password-check", config.PASSWORD_CHECK_WORKERS, config.PASSWORD_CHECK_MAX_PENDING)
+
+# The calibrated bcrypt cost and the time measured for it
+_calibration = {
+    "rounds": None,
+    "measured_ms": None
+}
+_calibration_lock = threading.Lock()
+
 
 def get_hashed_password(plain_text_password):
     # Redirect
@@ -12,16 +38,142 @@ def get_hashed_password(plain_text_password):
 
 
 def check_password(plain_text_password, hashed_password):
-    # Redirect
-    return _check_password(plain_text_password.encode('utf-8'), hashed_password)
+    """
+    Checks the password against the hashed password on the password verification executor.
+
+    :raises RateLimitedException: Raised when too many password verifications are already pending.
+    """
+
+    try:
+        # Redirect
+        return _check_executor.run(_check_password, plain_text_password.encode('utf-8'), hashed_password)
+
+    except ExecutorFullException as err:
+        # Too many logins at the same time
+        raise RateLimitedException(str(_check_executor.max_pending) + " simultaneous logins") from err
+
+
+def rehash_password(plain_text_password, save):
+    """
+    Hashes a password again with the calibrated cost, in the background on the password verification executor, then
+     saves the new hash. Skipped when the executor is full (the password is rehashed on a next login).
+
+    :param plain_text_password: The password, as verified
+    :param save: The function saving the new hash (bytes)
+    :returns: True when the rehash was submitted, False when skipped.
+    """
+
+    try:
+        # Redirect
+        _check_executor.submit(_rehash_password, plain_text_password.encode('utf-8'), save)
+        return True
+
+    except ExecutorFullException:
+        # Too many logins at the same time, the login goes on
+        return False
+
+
+def calibrate():
+    """
+    Picks the bcrypt cost whose hashing time on the current CPU is the closest to PASSWORD_HASH_TARGET_MS,
+     bounded by PASSWORD_HASH_MIN_ROUNDS and PASSWORD_HASH_MAX_ROUNDS. Meant to be called at startup.
+
+    :returns: The calibrated cost (rounds)
+    """
+
+    with _calibration_lock:
+        # Measure a cheap cost, each additional round then doubles the time
+        probe_rounds = 6
+        probe_s = min(_time_hash(probe_rounds) for _ in range(3))
+        target_s = config.PASSWORD_HASH_TARGET_MS / 1000
+        rounds = probe_rounds + round(math.log2(max(target_s / max(probe_s, 1e-6), 1)))
+        rounds = min(max(rounds, config.PASSWORD_HASH_MIN_ROUNDS), config.PASSWORD_HASH_MAX_ROUNDS)
+
+        # Validate the extrapolation with a real measure and adjust by one round when it's clearly off
+        measured_s = _time_hash(rounds)
+        if measured_s > target_s * 2 and rounds > config.PASSWORD_HASH_MIN_ROUNDS:
+            rounds -= 1
+            measured_s /= 2
+
+        elif measured_s < target_s / 2 and rounds < config.PASSWORD_HASH_MAX_ROUNDS:
+            rounds += 1
+            measured_s *= 2
+
+        _calibration["rounds"] = rounds
+        _calibration["measured_ms"] = round(measured_s * 1000, 3)
+        print("encr.calibrate: bcrypt rounds=" + str(rounds) + " (~" + str(_calibration["measured_ms"]) + "ms)")
+        return rounds
+
+
+def hash_rounds():
+    """
+    Gets the calibrated bcrypt cost, calibrating on first use.
+
+    :returns: The bcrypt cost (rounds)
+    """
+
+    rounds = _calibration["rounds"]
+    if rounds is None:
+        rounds = calibrate()
+    return rounds
+
+
+def needs_rehash(hashed_password):
+    """
+    Indicates if the hashed password was hashed with a cost lower than the calibrated one.
+
+    :param hashed_password: The bcrypt hash, as bytes (e.g. b'$2b$12$...')
+    :returns: True if the password should be hashed again.
+    """
+
+    try:
+        # The cost is the second field of the hash, only ever raise it
+        return int(hashed_password.split(b"$")[2]) < hash_rounds()
+
+    except (ValueError, IndexError):
+        return False
+
+
+def stats():
+    """
+    Gets the statistics (queue wait and hash time) of the password verifications for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    stats = _check_executor.stats()
+    stats["rounds"] = _calibration["rounds"]
+    stats["calibrated_ms"] = _calibration["measured_ms"]
+    return stats
+
+
+def _time_hash(rounds):
+    """
+    Measures the time to hash a password with the given cost.
+
+    :returns: The time in seconds
+    """
+
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=rounds))
+    return time.perf_counter() - started
 
 
 def _get_hashed_password(plain_text_password):
     # Hash a password for the first time
     #   (Using bcrypt, the salt is saved into the hash itself)
-    return bcrypt.hashpw(plain_text_password, bcrypt.gensalt())
+    return bcrypt.hashpw(plain_text_password, bcrypt.gensalt(rounds=hash_rounds()))
 
 
 def _check_password(plain_text_password, hashed_password):
     # Check hashed password. Using bcrypt, the salt is saved into the hash itself
     return bcrypt.checkpw(plain_text_password, hashed_password)
+
+
+def _rehash_password(plain_text_password, save):
+    # Hash the password again and save it, the login is valid either way
+    try:
+        save(_get_hashed_password(plain_text_password))
+
+    except Exception as err:
+        print("encr._rehash_password: rehash failed: " + str(err))
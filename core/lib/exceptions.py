@@ -8,6 +8,11 @@ class ApplicationException(Exception):
     pass
 
 
+class ExecutorFullException(ApplicationException):
+    """Exception raised when a bounded executor can't admit more tasks."""
+    pass
+
+
 class UserMessageException(ApplicationException):
     """Exception raised when a message (likely an error message) needs to be sent to the User."""
     def __init__(self, code, message, message_fr):
@@ -28,6 +33,8 @@ class UserMessageException(ApplicationException):
             self.title = "Method Not Allowed"
         elif code == 429:
             self.title = "Too Many Requests"
+        elif code == 503:
+            self.title = "Service Unavailable"
         self.message = message
         self.message_fr = message_fr
 
@@ -91,3 +98,17 @@ class RateLimitedException(UserMessageException):
                                                    "You've sent too many requests. Do not go over " + reason + ".",
                                                    "Vous avez effectué trop de requêtes. Ne dépassez pas " + reason.replace(
                                                        "per", "par") + ".")
+
+
+class ServiceBusyException(UserMessageException):
+    """Exception raised when a limited resource (e.g. a connection pool) couldn't be obtained in time."""
+    def __init__(self):
+        super(ServiceBusyException, self).__init__(503, "The service is busy, please try again later",
+                                                   "Le service est occupé, veuillez réessayer plus tard")
+
+
+class CatalogUnavailableException(UserMessageException):
+    """Exception raised when the catalog (CSW) couldn't be reached or is deemed down."""
+    def __init__(self):
+        super(CatalogUnavailableException, self).__init__(503, "The catalog is unavailable, please try again later",
+                                                          "Le catalogue est indisponible, veuillez réessayer plus tard")
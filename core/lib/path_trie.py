@@ -0,0 +1,62 @@
+"""
+This module offers a trie of paths, to read many paths of a JSON document (e.g. parsed by xmltodict) in a single walk.
+"""
+
+
+class PathTrie(object):
+    """
+    Class representing a compiled set of named paths. The paths sharing a prefix share its nodes, so that the prefix is
+     resolved once for all of them. A path goes down the dictionaries by key and through every item of the lists it
+     meets (without consuming a key), the same way as the GeoNetwork digging helpers.
+    """
+
+    def __init__(self, paths: dict):
+        """
+        Constructor
+
+        :param paths: The paths, by name, each a list of keys from the root
+        """
+        self.paths = {name: list(keys) for name, keys in paths.items()}
+        # Each node is a tuple (names of the paths ending at the node, children nodes by key)
+        self._root = ([], {})
+        for name, keys in paths.items():
+            node = self._root
+            for key in keys:
+                node = node[1].setdefault(key, ([], {}))
+            node[0].append(name)
+
+
+    def resolve(self, root):
+        """
+        Resolves all the paths from a root node, in a single walk.
+
+        :param root: The root node (a dictionary, a list or a value)
+        :returns: A dictionary of the nodes found, by name, each a list in document order (empty when not found).
+        """
+
+        founds = {name: [] for name in self.paths}
+        for name in self._root[0]:
+            founds[name].append(root)
+        _walk(root, self._root[1], founds)
+        return founds
+
+
+def _walk(current, children, founds):
+    # If the node is a dictionary, follow the keys
+    if isinstance(current, dict):
+        for key, (names, grandchildren) in children.items():
+            if key in current:
+                value = current[key]
+
+                # The paths ending here
+                for name in names:
+                    founds[name].append(value)
+
+                # Go down
+                if grandchildren:
+                    _walk(value, grandchildren, founds)
+
+    # If a list, go through every item
+    elif isinstance(current, list):
+        for itm in current:
+            _walk(itm, children, founds)
@@ -0,0 +1,83 @@
+"""
+This module offers a background job which runs a function periodically in the current process.
+"""
+
+# Core modules
+import os, time, datetime, threading, traceback
+
+
+class PeriodicJob(object):
+    """
+    Class representing a function run every interval seconds in a background thread.
+     The thread is started on demand and again in each forked process (e.g. each uWSGI worker), because threads don't
+     survive a fork. An interval of 0 (or less) disables the job.
+    """
+
+    def __init__(self, name, interval, fn):
+        """
+        Constructor
+
+        :param name: The name of the job (and of its thread)
+        :param interval: The number of seconds between each run
+        :param fn: The function to run, without parameters
+        """
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._stats = {
+            "runs": 0,
+            "failures": 0,
+            "last_run": None,
+            "last_error": None
+        }
+
+
+    def ensure_started(self):
+        """
+        Starts the job thread if it's not running in the current process.
+        """
+
+        # If disabled or already running, quick check without locking
+        if self.interval <= 0 or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+
+    def stats(self):
+        """
+        Gets the statistics of the job for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        stats = dict(self._stats)
+        stats["interval"] = self.interval
+        stats["running"] = self._pid == os.getpid() and self._thread.is_alive()
+        return stats
+
+
+    def _run(self):
+        """
+        The job thread loop. Never returns.
+        """
+
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.fn()
+
+            except (Exception,) as err:
+                self._stats["failures"] += 1
+                self._stats["last_error"] = str(err)
+                traceback.print_exc()
+
+            self._stats["runs"] += 1
+            self._stats["last_run"] = datetime.datetime.now().isoformat()
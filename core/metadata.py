@@ -0,0 +1,453 @@
+"""
+This module handles the metadata records of the catalog, as read by the GeoNetworkReader.
+
+The parsed records are cached in two tiers: in memory (a LRU per process) and on disk (a JSON file per record, shared by
+the processes). A cached record is fresh for METADATA_CACHE_TTL_SECONDS. Past it, the record is revalidated against
+its gmd:dateStamp, read from a summary record (much lighter than the full record), and only downloaded and parsed
+again when it changed. Within METADATA_CACHE_STALE_SECONDS past the TTL, the cached record is served right away and
+revalidated in the background. Beyond it, the record is revalidated on the request itself. When the catalog is
+unavailable, the cached record is served however old it is.
+
+Many records can be read at once (get_metadata_batch): the cached ones are served right away and the others requested by
+chunks of ids, concurrently, each chunk being a single GetRecordById.
+"""
+
+# Core modules
+import os, json, stat, time, threading, traceback, tempfile
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from uuid import UUID
+
+# Application modules
+from core import config
+from core.lib.exceptions import *
+from core.lib.bounded_executor import BoundedExecutor
+from core.catalog import catalog_client
+from core.geonetwork import GeoNetworkReader, read_records, read_date_stamp
+
+
+# The memory tier of the cache, per process
+_cache_lock = threading.Lock()
+_cache = OrderedDict()
+_revalidating = set()
+_stats = {
+    "hits_memory": 0,
+    "hits_disk": 0,
+    "misses": 0,
+    "stale_served": 0,
+    "revalidated_unchanged": 0,
+    "revalidated_changed": 0,
+    "revalidate_failures": 0,
+    "disk_errors": 0
+}
+
+# The executor revalidating the stale records in the background, GLOBAL
+_executor = BoundedExecutor("metadata-revalidate", config.METADATA_CACHE_REVALIDATE_WORKERS,
+                            config.METADATA_CACHE_REVALIDATE_MAX_PENDING)
+
+# The executor requesting the chunks of records of the batches, GLOBAL
+_batch_executor = BoundedExecutor("metadata-batch", config.METADATA_BATCH_WORKERS, config.METADATA_BATCH_MAX_PENDING)
+
+
+def get_metadata(uuid: str):
+    """
+    Gets the metadata of a record of the catalog, from the cache when possible.
+
+    :param uuid: The uuid of the metadata record
+    :returns: The metadata, as returned by GeoNetworkReader.to_dict()
+    :raises CatalogUnavailableException: Raised when the record isn't cached and the catalog is unavailable.
+    """
+
+    # Read the cache, memory then disk
+    entry = _read_entry(uuid)
+
+    # If not cached
+    if not entry:
+        _count("misses")
+        return _fetch(uuid)["metadata"]
+
+    # Redirect
+    return _serve(uuid, entry)
+
+
+def get_metadata_batch(uuids: list):
+    """
+    Gets the metadata of many records of the catalog. The cached records are served first, the others are requested by
+     chunks of METADATA_BATCH_CHUNK_SIZE ids, concurrently. All the chunks are admitted (or refused) before any is
+     requested.
+
+    :param uuids: The uuids of the metadata records
+    :returns: A generator of dictionaries, in completion order, with the uuid of each record along with either its
+              metadata (as returned by GeoNetworkReader.to_dict()) and whether it was cached, or the
+              UserMessageException (error).
+    :raises UserMessageException: Raised when the uuids are invalid.
+    :raises ServiceBusyException: Raised when too many records are already being requested.
+    """
+
+    # If no uuids
+    if not uuids or not isinstance(uuids, list):
+        raise UserMessageException(400,
+                                   "No uuids specified.",
+                                   "Aucun uuid spécifié.")
+
+    # If too many uuids
+    if len(uuids) > config.METADATA_BATCH_MAX_UUIDS:
+        raise UserMessageException(400,
+                                   "Too many uuids, the maximum is " + str(config.METADATA_BATCH_MAX_UUIDS) + ".",
+                                   "Trop d'uuids, le maximum est " + str(config.METADATA_BATCH_MAX_UUIDS) + ".")
+
+    # Sort the uuids, once each, between the invalid, the cached (fresh enough to be served without waiting for the
+    # catalog) and the ones to request
+    invalids = []
+    cached = {}
+    missing = []
+    for uuid in dict.fromkeys(uuids):
+        if not _is_valid_uuid(uuid):
+            invalids.append(uuid)
+            continue
+
+        entry = _read_entry(uuid)
+        if entry and time.time() - entry["validated"] < \
+           config.METADATA_CACHE_TTL_SECONDS + config.METADATA_CACHE_STALE_SECONDS:
+            cached[uuid] = entry
+
+        else:
+            _count("misses")
+            missing.append(uuid)
+
+    # Admit all the chunks
+    futures = {}
+    try:
+        for i in range(0, len(missing), config.METADATA_BATCH_CHUNK_SIZE):
+            chunk = missing[i:i + config.METADATA_BATCH_CHUNK_SIZE]
+            futures[_batch_executor.submit(_fetch_chunk, chunk)] = chunk
+
+    except ExecutorFullException as err:
+        # Too many records at the same time, give back what was admitted
+        for f in futures:
+            f.cancel()
+        raise ServiceBusyException() from err
+
+    def generate():
+        try:
+            # The invalid uuids
+            for uuid in invalids:
+                yield {"uuid": uuid, "error": UserMessageException(400,
+                                                                   "Invalid UUID.",
+                                                                   "UUID invalide.")}
+
+            # The cached records (stale ones being revalidated in the background)
+            for uuid, entry in cached.items():
+                yield {"uuid": uuid, "metadata": _serve(uuid, entry), "cached": True}
+
+            # The chunks, as they complete
+            for f in as_completed(futures):
+                try:
+                    entries = f.result()
+
+                except UserMessageException as err:
+                    entries = err
+
+                except Exception as err:
+                    # Keep going with the other chunks
+                    traceback.print_exc()
+                    entries = UserMessageException(500,
+                                                   "Unable to read the metadata records from the catalog.",
+                                                   "Impossible de lire les fiches de métadonnées du catalogue.")
+                    entries.__cause__ = err
+
+                for uuid in futures[f]:
+                    # If the whole chunk failed
+                    if isinstance(entries, UserMessageException):
+                        yield {"uuid": uuid, "error": entries}
+
+                    elif uuid in entries:
+                        yield {"uuid": uuid, "metadata": entries[uuid]["metadata"], "cached": False}
+
+                    else:
+                        yield {"uuid": uuid, "error": UserMessageException(404,
+                                                                           "Metadata record not found in the catalog.",
+                                                                           "Fiche de métadonnées introuvable dans le catalogue.")}
+
+        finally:
+            # If the client went away, don't request the rest
+            for f in futures:
+                f.cancel()
+
+    return generate()
+
+
+def stats():
+    """
+    Gets the statistics of the metadata cache for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    with _cache_lock:
+        stats = dict(_stats)
+        stats["size"] = len(_cache)
+        stats["revalidating"] = len(_revalidating)
+    stats["executor"] = _executor.stats()
+    stats["batch_executor"] = _batch_executor.stats()
+    return stats
+
+
+def _fetch(uuid: str):
+    """
+    Downloads and parses a metadata record and caches it.
+
+    :returns: The cache entry of the record
+    """
+
+    # Read the record
+    reader = GeoNetworkReader(catalog_client.get_record(uuid))
+    entry = {"metadata": reader.to_dict(), "date_stamp": reader.date_stamp(), "validated": time.time()}
+
+    # Cache it
+    _write_entry(uuid, entry)
+    return entry
+
+
+def _serve(uuid: str, entry: dict):
+    """
+    Serves a cached metadata record, revalidating it when stale.
+
+    :returns: The metadata
+    """
+
+    # If fresh
+    age = time.time() - entry["validated"]
+    if age < config.METADATA_CACHE_TTL_SECONDS:
+        return entry["metadata"]
+
+    # If stale, but not too much, serve it and revalidate in the background
+    if age < config.METADATA_CACHE_TTL_SECONDS + config.METADATA_CACHE_STALE_SECONDS:
+        _count("stale_served")
+        _revalidate_background(uuid, entry)
+        return entry["metadata"]
+
+    try:
+        # Revalidate now
+        return _revalidate(uuid, entry)["metadata"]
+
+    except CatalogUnavailableException:
+        # Better old than nothing
+        _count("stale_served")
+        return entry["metadata"]
+
+
+def _fetch_chunk(uuids: list):
+    """
+    Downloads and parses many metadata records, in a single request, and caches them.
+
+    :returns: The cache entries of the records found, by uuid
+    """
+
+    # Read the records
+    entries = {}
+    for reader in read_records(catalog_client.get_record(",".join(uuids))):
+        # If not one of the requested records (should not happen), it can't be cached under its uuid
+        if reader.uuid() not in uuids:
+            continue
+
+        # Cache it
+        entries[reader.uuid()] = {"metadata": reader.to_dict(), "date_stamp": reader.date_stamp(), "validated": time.time()}
+        _write_entry(reader.uuid(), entries[reader.uuid()])
+    return entries
+
+
+def _is_valid_uuid(value):
+    # A version 4 uuid, written as such (it's also the name of the cached file)
+    try:
+        return isinstance(value, str) and str(UUID(value, version=4)) == value
+
+    except ValueError:
+        return False
+
+
+def _revalidate(uuid: str, entry: dict):
+    """
+    Revalidates a cached metadata record against the date stamp of the record in the catalog.
+
+    :returns: The cache entry of the record, validated again or downloaded again when it changed.
+    """
+
+    try:
+        # If the record hasn't changed, it's valid again
+        date_stamp = read_date_stamp(catalog_client.get(config.CATALOG_SUMMARY_URL.format(metadata_uuid=uuid)))
+        if date_stamp and date_stamp == entry["date_stamp"]:
+            _count("revalidated_unchanged")
+            entry = dict(entry, validated=time.time())
+            _write_entry(uuid, entry)
+            return entry
+
+        # Download it again
+        _count("revalidated_changed")
+        return _fetch(uuid)
+
+    except Exception:
+        _count("revalidate_failures")
+        raise
+
+
+def _revalidate_background(uuid: str, entry: dict):
+    """
+    Revalidates a cached metadata record in the background, unless it's already being revalidated.
+    """
+
+    with _cache_lock:
+        if uuid in _revalidating:
+            return
+        _revalidating.add(uuid)
+
+    try:
+        future = _executor.submit(_revalidate, uuid, entry)
+        future.add_done_callback(lambda f: _revalidated(uuid, f))
+
+    except ExecutorFullException:
+        # Too busy, a later request will revalidate it
+        with _cache_lock:
+            _revalidating.discard(uuid)
+
+
+def _revalidated(uuid: str, future):
+    # Done revalidating
+    with _cache_lock:
+        _revalidating.discard(uuid)
+
+    # If it failed, the stale record stays
+    if future.exception() and not isinstance(future.exception(), CatalogUnavailableException):
+        err = future.exception()
+        traceback.print_exception(type(err), err, err.__traceback__)
+
+
+def _read_entry(uuid: str):
+    """
+    Reads the cache entry of a metadata record, from memory or else from disk (then kept in memory).
+
+    :returns: A dictionary with the metadata, its date stamp and when it was validated, or None when not cached.
+    """
+
+    with _cache_lock:
+        entry = _cache.get(uuid)
+        if entry:
+            _cache.move_to_end(uuid)
+
+    # If fresh in memory
+    if entry and time.time() - entry["validated"] < config.METADATA_CACHE_TTL_SECONDS:
+        _count("hits_memory")
+        return entry
+
+    # If the disk has a more recent entry (e.g. revalidated by another process)
+    disk_entry = _read_disk(uuid)
+    if disk_entry and (not entry or disk_entry["validated"] > entry["validated"]):
+        entry = disk_entry
+        _put_memory(uuid, entry)
+        _count("hits_disk")
+
+    elif entry:
+        _count("hits_memory")
+    return entry
+
+
+def _write_entry(uuid: str, entry: dict):
+    # Write to both tiers
+    _put_memory(uuid, entry)
+    _write_disk(uuid, entry)
+
+
+def _put_memory(uuid: str, entry: dict):
+    # Keep the most recently used entries
+    with _cache_lock:
+        _cache[uuid] = entry
+        _cache.move_to_end(uuid)
+        while len(_cache) > config.METADATA_CACHE_MEMORY_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _read_disk(uuid: str):
+    """
+    Reads the cache entry of a metadata record from disk.
+
+    :returns: The cache entry, or None when not on disk.
+    """
+
+    try:
+        with open(os.path.join(_cache_dir(), uuid + ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    except FileNotFoundError:
+        return None
+
+    except (OSError, ValueError):
+        # A broken entry is a miss
+        traceback.print_exc()
+        _count("disk_errors")
+        return None
+
+
+def _write_disk(uuid: str, entry: dict):
+    """
+    Writes the cache entry of a metadata record to disk, atomically, and evicts the least recently written entries.
+    """
+
+    try:
+        cache_dir = _cache_dir()
+
+        # Write to a temporary file and move it, so that other processes never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, os.path.join(cache_dir, uuid + ".json"))
+
+        # If too many entries, remove the oldest ones
+        names = [n for n in os.listdir(cache_dir) if n.endswith(".json")]
+        if len(names) > config.METADATA_CACHE_DISK_MAX_ENTRIES:
+            paths = sorted((os.path.join(cache_dir, n) for n in names), key=_mtime)
+            for path in paths[:len(names) - config.METADATA_CACHE_DISK_MAX_ENTRIES]:
+                try:
+                    os.remove(path)
+
+                except FileNotFoundError:
+                    # Already evicted by another process
+                    pass
+
+    except OSError:
+        # The memory tier still has it
+        traceback.print_exc()
+        _count("disk_errors")
+
+
+def _mtime(path: str):
+    # A file evicted meanwhile sorts first, it's gone anyways
+    try:
+        return os.path.getmtime(path)
+
+    except FileNotFoundError:
+        return 0
+
+
+def _cache_dir():
+    """
+    Gets the directory of the disk tier, creating it (only accessible to the user of the application) if needed. The
+     uuids are validated by the callers, so they're safe file names in it.
+
+    :returns: The path of the directory
+    :raises OSError: Raised when the directory can't be created, or isn't a directory owned by the user of the
+                     application and writable by it only (another user could plant entries in it).
+    """
+
+    os.makedirs(config.METADATA_CACHE_DIR, mode=0o700, exist_ok=True)
+
+    # Never trust a directory someone else could write to
+    st = os.lstat(config.METADATA_CACHE_DIR)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise PermissionError("Unsafe metadata cache directory: " + config.METADATA_CACHE_DIR)
+    return config.METADATA_CACHE_DIR
+
+
+def _count(key: str):
+    # Redirect
+    with _cache_lock:
+        _stats[key] += 1
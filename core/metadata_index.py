@@ -0,0 +1,231 @@
+"""
+This module handles the metadata index: a local copy of the searchable information of the catalog records (uuid,
+titles, keywords, extent, cogs), so that the records can be found by their titles or keywords without knowing their uuid.
+
+The index is harvested by paging through the catalog with CSW GetRecords, each record read with the GeoNetworkReader.
+The records no longer in the catalog are deleted from the index once a harvest read as many records as the search
+matched, never after an empty or invalid page (e.g. an exception report from a throttled catalog). The harvest
+runs in a background thread of the API processes every METADATA_HARVEST_INTERVAL_SECONDS, in a single process at a
+time. It can also be run from outside the application (e.g. from cron) with:
+    python -m core.metadata_index
+
+The autocomplete searches the index only (prefix and trigram indexes), never the catalog.
+"""
+
+# Core modules
+import argparse, datetime, json, threading, time, traceback
+
+# Application modules
+from core import config, geonetwork
+from core.lib.exceptions import *
+from core.lib.periodic import PeriodicJob
+from core.catalog import catalog_client
+from core.db import db_conn
+
+
+# The languages of the index
+LANGUAGES = ["en", "fr"]
+
+# The report of the last harvest in the current process
+_last_report = {
+    "report": None
+}
+
+# The statistics of the autocomplete in the current process
+_lock = threading.Lock()
+_stats = {
+    "autocomplete_requests": 0,
+    "autocomplete_ms_total": 0.0,
+    "autocomplete_ms_max": 0.0
+}
+
+
+def harvest():
+    """
+    Harvests the catalog into the metadata index, unless another process is already harvesting it.
+
+    :returns: The report of the harvest (see harvest_catalog), or None when another process is harvesting it.
+    """
+
+    # Make sure a single process harvests at a time
+    with db_conn.try_advisory_lock(config.METADATA_HARVEST_LOCK_ID) as locked:
+        # If another process is harvesting
+        if not locked:
+            print("metadata_index.harvest: already running in another process")
+            return None
+
+        # Redirect
+        return harvest_catalog(config.CATALOG_GETRECORDS_URL, config.METADATA_HARVEST_PAGE_SIZE)
+
+
+def harvest_catalog(url: str, page_size: int):
+    """
+    Harvests the records of the catalog into the metadata index, page by page. When as many records as the search
+     matched were read, the records which weren't (no longer in the catalog) are deleted from the index. Otherwise
+     (e.g. an empty page before the end) the harvest is incomplete and nothing is deleted.
+
+    :param url: The GetRecords URL of the catalog, without the paging parameters
+    :param page_size: The number of records per page
+    :returns: A dictionary with the dates and duration of the harvest, the number of records matched, pages read,
+              records indexed, records which couldn't be read and records deleted, whether all the records matched
+              were read and the error which stopped it, if any.
+    """
+
+    started = time.perf_counter()
+    started_date = datetime.datetime.now()
+    report = {
+        "started": started_date.isoformat(),
+        "finished": None,
+        "duration_ms": None,
+        "matched": 0,
+        "pages": 0,
+        "indexed": 0,
+        "unreadable": 0,
+        "deleted": 0,
+        "complete": False,
+        "error": None
+    }
+
+    try:
+        position = 1
+        while position <= config.METADATA_HARVEST_MAX_RECORDS:
+            # Get the page
+            xml_content = catalog_client.get(url, {"startPosition": position, "maxRecords": page_size})
+            readers, report["matched"], next_record = geonetwork.read_search_results(xml_content)
+            report["pages"] += 1
+
+            # Index its records
+            records = [r for r in (_read_record(reader) for reader in readers) if r]
+            report["unreadable"] += len(readers) - len(records)
+            report["indexed"] += db_conn.upsert_metadata_index(records, started_date)
+
+            # If it was the last page
+            if not readers or next_record <= position or next_record > report["matched"]:
+                break
+            position = next_record
+
+        # If all the records matched were read, forget the records no longer in the catalog
+        report["complete"] = report["matched"] > 0 and \
+                             report["indexed"] + report["unreadable"] >= report["matched"]
+        if report["complete"]:
+            report["deleted"] = db_conn.purge_metadata_index(started_date)
+
+    except UserMessageException as err:
+        report["error"] = err.message
+
+    except Exception as err:
+        traceback.print_exc()
+        report["error"] = str(err)
+
+    # Keep the report
+    report["finished"] = datetime.datetime.now().isoformat()
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    _last_report["report"] = report
+    print("metadata_index.harvest_catalog: " + json.dumps(report))
+    return report
+
+
+def autocomplete(text: str, lang: str = None, limit: int = None):
+    """
+    Finds the records of the metadata index whose titles or keywords start with, contain or resemble a text.
+
+    :param text: The text, as typed (at least METADATA_AUTOCOMPLETE_MIN_CHARS characters)
+    :param lang: The language to search, "en" or "fr", None for both
+    :param limit: The maximum number of records to return, defaults to METADATA_AUTOCOMPLETE_DEFAULT_LIMIT
+    :returns: A list of dictionaries, one per record found (best first), with the uuid, the titles, the keywords
+              matching the text, the topic and the similarity score.
+    :raises UserMessageException: Raised when the text is too short or the language or limit is invalid.
+    """
+
+    # Validate
+    text = (text or "").strip()
+    if len(text) < config.METADATA_AUTOCOMPLETE_MIN_CHARS:
+        raise UserMessageException(400,
+                                   f"The text must have at least {config.METADATA_AUTOCOMPLETE_MIN_CHARS} characters",
+                                   f"Le texte doit avoir au moins {config.METADATA_AUTOCOMPLETE_MIN_CHARS} caractères")
+    if lang and lang not in LANGUAGES:
+        raise UserMessageException(400,
+                                   f"The language must be one of {', '.join(LANGUAGES)}",
+                                   f"La langue doit être l'une de {', '.join(LANGUAGES)}")
+    if limit is None:
+        limit = config.METADATA_AUTOCOMPLETE_DEFAULT_LIMIT
+    if not 1 <= limit <= config.METADATA_AUTOCOMPLETE_MAX_LIMIT:
+        raise UserMessageException(400,
+                                   f"The limit must be between 1 and {config.METADATA_AUTOCOMPLETE_MAX_LIMIT}",
+                                   f"La limite doit être entre 1 et {config.METADATA_AUTOCOMPLETE_MAX_LIMIT}")
+
+    # Search the index
+    started = time.perf_counter()
+    langs = [lang] if lang else LANGUAGES
+    rows = db_conn.query_metadata_autocomplete(text, langs, limit)
+    _record_latency((time.perf_counter() - started) * 1000)
+
+    # Keep the keywords matching the text, in the languages searched
+    lowered = text.lower()
+    return [{
+        "uuid": r["uuid"],
+        "title": {"en": r["title_en"], "fr": r["title_fr"]},
+        "keywords": {l: [k for k in (r["keywords_" + l] or "").split(", ") if lowered in k.lower()] for l in langs},
+        "topic": r["topic"],
+        "score": round(r["score"] or 0, 3)
+    } for r in rows]
+
+
+def stats():
+    """
+    Gets the statistics of the harvest job and of the autocomplete for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    stats = harvest_job.stats()
+    stats["last_harvest"] = _last_report["report"]
+    with _lock:
+        stats.update({k: round(v, 3) if isinstance(v, float) else v for k, v in _stats.items()})
+    return stats
+
+
+def _read_record(reader):
+    """
+    Reads the information of a record to index.
+
+    :returns: A dictionary as returned by GeoNetworkReader.to_dict with the date_stamp, or None when the record couldn't be read.
+    """
+
+    # If the record couldn't be read at all
+    if reader is None:
+        return None
+
+    try:
+        record = reader.to_dict()
+        record["date_stamp"] = reader.date_stamp() or None
+        return record if record["uuid"] else None
+
+    except Exception as err:
+        # Incomplete record, skip it
+        print("metadata_index._read_record: " + str(err))
+        return None
+
+
+def _record_latency(latency_ms: float):
+    # Keep the statistics
+    with _lock:
+        _stats["autocomplete_requests"] += 1
+        _stats["autocomplete_ms_total"] += latency_ms
+        _stats["autocomplete_ms_max"] = max(_stats["autocomplete_ms_max"], latency_ms)
+
+
+# Create the background job which is GLOBAL (its thread is started per process, on demand)
+harvest_job = PeriodicJob("metadata-harvest", config.METADATA_HARVEST_INTERVAL_SECONDS, harvest)
+
+
+# If we're running in stand alone mode, harvest once
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Harvests the catalog into the metadata index.")
+    parser.add_argument("--url", default=config.CATALOG_GETRECORDS_URL, help="GetRecords URL of the catalog (e.g. a local CSW)")
+    parser.add_argument("--page-size", type=int, default=config.METADATA_HARVEST_PAGE_SIZE, help="number of records per page")
+    args = parser.parse_args()
+
+    # Make sure a single process harvests at a time
+    with db_conn.try_advisory_lock(config.METADATA_HARVEST_LOCK_ID) as locked:
+        print(json.dumps(harvest_catalog(args.url, args.page_size), indent=2) if locked else "Already running in another process")
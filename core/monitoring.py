@@ -0,0 +1,40 @@
+"""
+This module gathers the runtime statistics of the application components.
+"""
+
+# Core modules
+import os
+
+# Application modules
+from core import catalog, clip_zip_ship, footprint, geometry_refresh, jobs, metadata, metadata_index, token_purge
+from core.db import db_conn, db_listen
+from core.lib import encr
+from core.pygeoapi import reload_notifier
+from core.revoked_tokens import revoked_cache
+
+
+def get_stats():
+    """
+    Gets the runtime statistics of the components for the current process (uWSGI worker).
+
+    :returns: A dictionary of statistics per component.
+    """
+
+    return {
+        "pid": os.getpid(),
+        "db_pool": db_conn.pool_stats(),
+        "remote_db_pools": db_conn.remote_pools_stats(),
+        "db_listener": db_listen.stats(),
+        "revoked_tokens": revoked_cache.stats(),
+        "extents_cache": clip_zip_ship.extents_cache_stats(),
+        "extents_batch": clip_zip_ship.extents_batch_stats(),
+        "footprint": footprint.stats(),
+        "token_purge": token_purge.stats(),
+        "jobs": jobs.stats(),
+        "geometry_refresh": geometry_refresh.stats(),
+        "pygeoapi_reload": reload_notifier.stats(),
+        "catalog": catalog.catalog_client.stats(),
+        "metadata_cache": metadata.stats(),
+        "metadata_index": metadata_index.stats(),
+        "password_check": encr.stats()
+    }
@@ -0,0 +1,176 @@
+"""
+This module handles the hot-reload notifications sent to PyGeoAPI when the collections change.
+
+The reloads are requested by the collection mutations and sent by a background thread: the requests made within
+PYGEOAPI_RELOAD_DEBOUNCE_SECONDS of each other are coalesced into a single reload (sent at the latest
+PYGEOAPI_RELOAD_MAX_DELAY_SECONDS after the first request), with a timeout and retries.
+"""
+
+# Core modules
+import os, time, datetime, threading, traceback
+
+# 3rd party imports
+import requests
+
+# Application modules
+from core import config
+
+
+class ReloadNotifier(object):
+    """
+    Class representing the PyGeoAPI hot-reload notifier of the current process.
+     The thread is started on demand and again in each forked process, because threads don't survive a fork.
+    """
+
+    def __init__(self, url, debounce, max_delay, timeout, retries, retry_interval):
+        """
+        Constructor
+
+        :param url: The PyGeoAPI reload URL
+        :param debounce: The number of seconds to wait for more requests before reloading
+        :param max_delay: The maximum number of seconds a reload can be delayed by more requests
+        :param timeout: The number of seconds to wait for PyGeoAPI to answer
+        :param retries: The number of times a failed reload is retried
+        :param retry_interval: The number of seconds before retrying, doubled after each retry
+        """
+        self.url = url
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_interval = retry_interval
+        self._cond = threading.Condition()
+        self._pid = None
+        self._thread = None
+        self._due = None
+        self._deadline = None
+        self._stats = {
+            "requested": 0,
+            "coalesced": 0,
+            "reloads": 0,
+            "retries": 0,
+            "failures": 0,
+            "latency_ms_total": 0.0,
+            "latency_ms_max": 0.0,
+            "last_reload": None,
+            "last_error": None
+        }
+
+
+    def request_reload(self):
+        """
+        Requests a reload. The reload is sent once no more requests came for the debounce window.
+        """
+
+        with self._cond:
+            self._ensure_started_locked()
+            self._stats["requested"] += 1
+
+            # If a reload is already waiting, it'll cover this request
+            now = time.monotonic()
+            if self._due is not None:
+                self._stats["coalesced"] += 1
+
+            else:
+                self._deadline = now + self.max_delay
+            self._due = min(now + self.debounce, self._deadline)
+            self._cond.notify()
+
+
+    def reload_now(self):
+        """
+        Sends a reload right away, in the current thread (e.g. at the end of a command line run).
+
+        :returns: True if PyGeoAPI was reloaded.
+        """
+
+        with self._cond:
+            self._stats["requested"] += 1
+            self._due = None
+
+        # Redirect
+        return self._reload()
+
+
+    def stats(self):
+        """
+        Gets the statistics of the notifier for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        with self._cond:
+            stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()}
+            stats["pending"] = self._due is not None and self._pid == os.getpid()
+            return stats
+
+
+    def _ensure_started_locked(self):
+        """
+        Starts the notifier thread if it's not running in the current process. The lock must be held by the caller.
+        """
+
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            # The pending reload of a parent process isn't ours
+            if self._pid != os.getpid():
+                self._due = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="pygeoapi-reload", daemon=True)
+            self._thread.start()
+
+
+    def _run(self):
+        """
+        The notifier thread loop. Never returns.
+        """
+
+        while True:
+            with self._cond:
+                # Wait for a reload to be due
+                while self._due is None or self._due > time.monotonic():
+                    self._cond.wait(None if self._due is None else self._due - time.monotonic())
+                self._due = None
+
+            # Reload, the requests made meanwhile will wait for the next one
+            self._reload()
+
+
+    def _reload(self):
+        """
+        Sends the reload to PyGeoAPI, retrying when it fails.
+
+        :returns: True if PyGeoAPI was reloaded.
+        """
+
+        for attempt in range(self.retries + 1):
+            # If retrying, wait a bit longer each time
+            if attempt > 0:
+                self._stats["retries"] += 1
+                time.sleep(self.retry_interval * 2 ** (attempt - 1))
+
+            started = time.perf_counter()
+            try:
+                response = requests.get(self.url, timeout=self.timeout)
+                response.raise_for_status()
+
+                # Keep the statistics
+                latency_ms = (time.perf_counter() - started) * 1000
+                with self._cond:
+                    self._stats["reloads"] += 1
+                    self._stats["latency_ms_total"] += latency_ms
+                    self._stats["latency_ms_max"] = max(self._stats["latency_ms_max"], latency_ms)
+                    self._stats["last_reload"] = datetime.datetime.now().isoformat()
+                return True
+
+            except (Exception,) as err:
+                self._stats["last_error"] = str(err)
+                traceback.print_exc()
+
+        self._stats["failures"] += 1
+        return False
+
+
+# Create the notifier which is GLOBAL (its thread is started per process, on demand)
+reload_notifier = ReloadNotifier(config.PYGEOAPI_URL, config.PYGEOAPI_RELOAD_DEBOUNCE_SECONDS,
+                                 config.PYGEOAPI_RELOAD_MAX_DELAY_SECONDS, config.PYGEOAPI_RELOAD_TIMEOUT_SECONDS,
+                                 config.PYGEOAPI_RELOAD_RETRIES, config.PYGEOAPI_RELOAD_RETRY_SECONDS)
@@ -0,0 +1,165 @@
+"""
+This module handles the local cache of revoked tokens so that validating a token doesn't query the database.
+
+Each process keeps the JTIs of the revoked tokens which haven't expired yet. The cache is kept in sync by the
+database listener thread: each revocation is NOTIFYied to all processes and the blacklist table is also read
+incrementally every few seconds in case a notification was missed. The incremental read overlaps the last ids already
+read, because the ids of concurrent revocations can commit out of order, and the whole table is read again each time the
+listener (re)connects, as notifications may have been missed meanwhile. When the listener isn't running (or got
+behind), the cache is refreshed on the request itself, so a revoked token is never accepted for more than the max
+staleness.
+"""
+
+# Core modules
+import datetime, json, threading, time
+
+# Application modules
+from core import config
+from core.db import db_conn, db_listen
+
+
+class RevokedTokenCache(object):
+    """
+    Class representing the revoked tokens cache of the current process.
+    """
+
+    def __init__(self, max_staleness, poll_overlap):
+        """
+        Constructor
+
+        :param max_staleness: The number of seconds after which the cache must be refreshed before being used
+        :param poll_overlap: The number of ids, below the highest id read, read again by each refresh
+        """
+        self.max_staleness = max_staleness
+        self.poll_overlap = poll_overlap
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._revoked = {}
+        self._last_id = None
+        self._synced_at = None
+        self._stats = {
+            "lookups": 0,
+            "refreshes": 0,
+            "resyncs": 0,
+            "request_refreshes": 0,
+            "notifications": 0
+        }
+
+
+    def is_revoked(self, jti_uid):
+        """
+        Checks if the token has been revoked.
+
+        :param jti_uid: The JTI of the token
+        :returns: True if the token has been revoked.
+        """
+
+        # Make sure the cache is fresh enough
+        self._ensure_synced()
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            return jti_uid in self._revoked
+
+
+    def add(self, jti_uid, expiration_date):
+        """
+        Adds a revoked token in the cache.
+
+        :param jti_uid: The JTI of the token
+        :param expiration_date: The expiration date of the token
+        """
+
+        with self._lock:
+            self._revoked[jti_uid] = expiration_date
+
+
+    def refresh(self):
+        """
+        Reads the tokens revoked since the last refresh from the database, going back poll_overlap ids to catch the
+         revocations which committed after a higher id was read.
+        """
+
+        # One refresh at a time
+        with self._refresh_lock:
+            started = time.monotonic()
+            since = max(0, self._last_id - self.poll_overlap) if self._last_id is not None else None
+            records = db_conn.query_tokens_revoked_since(since)
+
+            with self._lock:
+                for r in records:
+                    self._revoked[r["jti"]] = r["exp"]
+                    self._last_id = max(self._last_id or 0, r["id"])
+
+                # Forget the expired tokens, they're rejected anyways
+                now = datetime.datetime.now()
+                self._revoked = {k: v for k, v in self._revoked.items() if v >= now}
+
+                # Only consider the cache in sync from the moment the query started
+                self._synced_at = started
+                self._stats["refreshes"] += 1
+
+
+    def resync(self):
+        """
+        Reads all the tokens still valid from the database again (e.g. when notifications may have been missed).
+        """
+
+        # Forget the position, the next refresh reads everything
+        with self._refresh_lock:
+            self._last_id = None
+            self._stats["resyncs"] += 1
+        self.refresh()
+
+
+    def stats(self):
+        """
+        Gets the statistics of the cache for the current process.
+
+        :returns: A dictionary of statistics
+        """
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._revoked)
+            stats["last_id"] = self._last_id
+            stats["synced_seconds_ago"] = round(time.monotonic() - self._synced_at, 3) if self._synced_at else None
+            return stats
+
+
+    def _ensure_synced(self):
+        """
+        Refreshes the cache on the spot if the listener thread hasn't kept it in sync.
+        """
+
+        # Make sure the listener thread is running in this process
+        db_listen.ensure_started()
+
+        # If the cache is fresh enough
+        synced_at = self._synced_at
+        if synced_at is not None and time.monotonic() - synced_at <= self.max_staleness:
+            return
+
+        # Refresh now
+        self._stats["request_refreshes"] += 1
+        self.refresh()
+
+
+    def _on_notify(self, payload):
+        """
+        Handles a token revocation notification sent by any process.
+
+        :param payload: The JSON payload of the notification, holding the jti and exp of the token
+        """
+
+        data = json.loads(payload)
+        self.add(data["jti"], datetime.datetime.fromisoformat(data["exp"]))
+        self._stats["notifications"] += 1
+
+
+# Create the cache which is GLOBAL and keep it in sync with the listener thread
+revoked_cache = RevokedTokenCache(config.TOKEN_REVOKED_CACHE_MAX_STALENESS_SECONDS,
+                                  config.TOKEN_REVOKED_POLL_OVERLAP_IDS)
+db_listen.subscribe(config.TOKEN_REVOKED_NOTIFY_CHANNEL, revoked_cache._on_notify)
+db_listen.on_connect(revoked_cache.resync)
+db_listen.on_tick(revoked_cache.refresh)
@@ -3,10 +3,11 @@ This module offers utility functions shared across the application to handle the
 """
 
 # Core modules
+import json
 from functools import wraps
 
 # 3rd party imports
-from flask import request, jsonify, abort, redirect, make_response, render_template, session
+from flask import request, jsonify, abort, redirect, make_response, render_template, session, Response, stream_with_context
 
 # Application modules
 from core import config, auth
@@ -95,6 +96,20 @@ def response_201(body):
     return make_response(body, 201)
 
 
+def response_202(body, location):
+    """
+    Returns the given body as JSON on a 202 response, the request being accepted but processed later.
+
+    :param body: The payload to return as JSON
+    :param location: The URL where to follow up on the processing
+    :returns: The given body on a 202 response.
+    """
+
+    response = make_response(jsonify(body), 202)
+    response.headers["Location"] = location
+    return response
+
+
 def response_204():
     """
     Returns an empty payload (per standards for a 204).
@@ -105,6 +120,75 @@ def response_204():
     return make_response("", 204)
 
 
+def response_ndjson(items):
+    """
+    Streams the given items as newline delimited JSON, each item being sent as soon as it's generated.
+
+    :param items: An iterable of JSON serializable items
+    :returns: A streamed 200 response of type application/x-ndjson.
+    """
+
+    return Response(stream_with_context(json.dumps(item) + "\n" for item in items), 200,
+                    mimetype="application/x-ndjson")
+
+
+def read_json_rows():
+    """
+    Reads the body of the request as a list of JSON objects, either a JSON array or newline delimited JSON.
+
+    :returns: The list of rows
+    :raises UserMessageException: Raised when the body can't be read.
+    """
+
+    body = request.get_data(as_text=True).strip()
+
+    # If a JSON array
+    if body.startswith("["):
+        try:
+            return json.loads(body)
+
+        except ValueError as err:
+            raise UserMessageException(400,
+                                       "Invalid JSON array.",
+                                       "Tableau JSON invalide.") from err
+
+    # One JSON per line
+    rows = []
+    for i, line in enumerate(body.splitlines()):
+        if line.strip():
+            try:
+                rows.append(json.loads(line))
+
+            except ValueError as err:
+                raise UserMessageException(400,
+                                           "Invalid JSON on line " + str(i + 1) + ".",
+                                           "JSON invalide à la ligne " + str(i + 1) + ".") from err
+    return rows
+
+
+def response_etag(payload, etag):
+    """
+    Returns the given payload as JSON along with a strong ETag. When the client already has this version of the
+     payload (If-None-Match), an empty 304 response is returned instead.
+
+    :param payload: The payload to return as JSON
+    :param etag: The ETag (unquoted) identifying the version of the payload
+    :returns: A 200 response with the payload or an empty 304 response.
+    """
+
+    # If the client already has it
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+
+    else:
+        response = make_response(jsonify(payload), 200)
+
+    # Clients must revalidate before using their copy
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
 def _response(status, title, message, message_fr, cause_exception):
     """
     Creates an official Response Payload which contains an English and French message.
@@ -119,6 +203,17 @@ def _response(status, title, message, message_fr, cause_exception):
      When running in DEV, the response contains more information.
     """
 
+    # Return an official NRCan message
+    return make_response(jsonify(_payload(status, title, message, message_fr, cause_exception)), status)
+
+
+def _payload(status, title, message, message_fr, cause_exception):
+    """
+    Creates the official Payload which contains an English and French message (see _response).
+
+    :returns: A dictionary with the status, title, detail and detail_fr.
+    """
+
     # The base payload
     json_res = {
         "status": status,
@@ -134,8 +229,24 @@ def _response(status, title, message, message_fr, cause_exception):
     if config.IS_DEV() and cause_exception:
         json_res["dev_cause"] = str(cause_exception)
 
-    # Return an official NRCan message
-    return make_response(jsonify(json_res), status)
+    return json_res
+
+
+def payload_user(user_message_exception):
+    """
+    Creates the official Payload from the given UserMessageException, for when it has to be embedded in a response
+     (e.g. one line of a stream) instead of being the response.
+
+    :param user_message_exception: The :class:`~lib.exceptions.UserMessageException` object.
+    :returns: A dictionary with the status, title, detail and detail_fr.
+    """
+
+    # Redirect
+    return _payload(user_message_exception.code,
+                    user_message_exception.title,
+                    user_message_exception.message,
+                    user_message_exception.message_fr,
+                    user_message_exception.__cause__)
 
 
 def response_user(user_message_exception):
@@ -0,0 +1,73 @@
+"""
+This module handles the purge of the expired tokens from the tokens blacklist table.
+
+The purge runs in a background thread of the API processes every TOKEN_PURGE_INTERVAL_SECONDS, in a single process at
+a time. It can also be run periodically from outside the application (e.g. from cron, with TOKEN_PURGE_INTERVAL_SECONDS
+set to 0) with:
+    python -m core.token_purge
+"""
+
+# Core modules
+import datetime, json, time
+
+# Application modules
+from core import config
+from core.db import db_conn
+from core.lib.periodic import PeriodicJob
+
+
+# The statistics of the last purge in the current process
+_last_purge = {
+    "deleted": None,
+    "duration_ms": None,
+    "finished": None
+}
+
+
+def purge_expired_tokens():
+    """
+    Deletes the expired tokens from the tokens blacklist table, in batches of TOKEN_PURGE_BATCH_SIZE rows, unless
+    another process is already purging them.
+
+    :returns: A dictionary indicating how many rows were deleted and how long it took, or None when another process
+              is purging them.
+    """
+
+    # Make sure a single process purges at a time
+    with db_conn.try_advisory_lock(config.TOKEN_PURGE_LOCK_ID) as locked:
+        # If another process is purging
+        if not locked:
+            print("token_purge.purge_expired_tokens: already running in another process")
+            return None
+
+        # Purge
+        started = time.perf_counter()
+        deleted = db_conn.purge_tokens_revoked(config.TOKEN_PURGE_BATCH_SIZE)
+
+    # Keep the statistics
+    _last_purge["deleted"] = deleted
+    _last_purge["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    _last_purge["finished"] = datetime.datetime.now().isoformat()
+    print("token_purge.purge_expired_tokens: " + json.dumps(_last_purge))
+    return dict(_last_purge)
+
+
+def stats():
+    """
+    Gets the statistics of the purge job for the current process.
+
+    :returns: A dictionary of statistics
+    """
+
+    stats = purge_job.stats()
+    stats["last_purge"] = dict(_last_purge)
+    return stats
+
+
+# Create the background job which is GLOBAL (its thread is started per process, on demand)
+purge_job = PeriodicJob("token-purge", config.TOKEN_PURGE_INTERVAL_SECONDS, purge_expired_tokens)
+
+
+# If we're running in stand alone mode, purge once
+if __name__ == '__main__':
+    purge_expired_tokens()
@@ -1,5 +1,51 @@
 CREATE EXTENSION dblink;
 CREATE EXTENSION postgis_raster;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DELIMITER \\
+CREATE OR REPLACE FUNCTION czs.czs_dblink_open(db_host VARCHAR(255), db_port INTEGER, db_name VARCHAR(255), db_user VARCHAR(255), db_password VARCHAR(255))
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	conn_str TEXT;
+	conn_name TEXT;
+	
+BEGIN
+	-- The connection is named after the connection string, so that it's reused by the next statements of the session
+	conn_str = 'dbname=' || db_name || ' port=' || db_port || ' host=' || db_host || ' user=' || db_user || ' password=' || db_password;
+	conn_name = 'czs_' || md5(conn_str);
+
+	-- If not connected yet
+	IF NOT conn_name = ANY(COALESCE(czs.dblink_get_connections(), '{}')) THEN
+		PERFORM czs.dblink_connect(conn_name, conn_str);
+	END IF;
+	
+	RETURN conn_name;
+END;$$
+;
+
+
+DELIMITER \\
+CREATE OR REPLACE FUNCTION czs.czs_dblink_close_all()
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+	conn_name TEXT;
+	closed INTEGER = 0;
+	
+BEGIN
+	-- Close the named connections opened by czs_dblink_open in the session
+	FOR conn_name IN SELECT c FROM unnest(czs.dblink_get_connections()) AS c WHERE c LIKE 'czs\_%' LOOP
+		PERFORM czs.dblink_disconnect(conn_name);
+		closed = closed + 1;
+	END LOOP;
+	
+	RETURN closed;
+END;$$
+;
+
 
 DELIMITER \\
 CREATE OR REPLACE FUNCTION czs.czs_test_connection_table(schemaname VARCHAR(255), tablename VARCHAR(255), db_host VARCHAR(255), db_port INTEGER, db_name VARCHAR(255), db_user VARCHAR(255), db_password VARCHAR(255))
@@ -10,35 +56,80 @@ BEGIN
 	RETURN QUERY
 	SELECT *
 	FROM czs.dblink (
-	    'dbname=' || db_name || ' port=' || db_port || ' host=' || db_host || ' user=' || db_user || ' password=' || db_password,
+	    czs.czs_dblink_open(db_host, db_port, db_name, db_user, db_password),
 	    'SELECT COUNT(*) FROM ' || schemaname || '.' || tablename
 	) AS t1(i INTEGER);
 END;$$
 ;
 
 
+ALTER TABLE czs.provider_feature_postgres ADD COLUMN IF NOT EXISTS footprint_mode VARCHAR(30) NOT NULL DEFAULT 'union';
+ALTER TABLE czs.provider_feature_postgres ADD COLUMN IF NOT EXISTS footprint_param DOUBLE PRECISION;
+ALTER TABLE czs.provider_feature_postgres ADD COLUMN IF NOT EXISTS source_fingerprint VARCHAR(64);
+ALTER TABLE czs.provider_feature_postgres ADD COLUMN IF NOT EXISTS source_change_column VARCHAR(255);
+DROP FUNCTION IF EXISTS czs.czs_get_geometry_table(VARCHAR, VARCHAR, VARCHAR, INTEGER, VARCHAR, VARCHAR, VARCHAR, INT);
+
+
 DELIMITER \\
-CREATE OR REPLACE FUNCTION czs.czs_get_geometry_table(schemaname VARCHAR(255), tablename VARCHAR(255), db_host VARCHAR(255), db_port INTEGER, db_name VARCHAR(255), db_user VARCHAR(255), db_password VARCHAR(255), out_crs INT)
+CREATE OR REPLACE FUNCTION czs.czs_get_geometry_table(schemaname VARCHAR(255), tablename VARCHAR(255), db_host VARCHAR(255), db_port INTEGER, db_name VARCHAR(255), db_user VARCHAR(255), db_password VARCHAR(255), out_crs INT,
+																	  footprint_mode VARCHAR(30) DEFAULT 'union', footprint_param DOUBLE PRECISION DEFAULT NULL)
 RETURNS GEOMETRY
 LANGUAGE plpgsql
 AS $$
 DECLARE
 	geom GEOMETRY;
 	geom_field_name VARCHAR(100);
+	geom_srid INTEGER;
+	geom_field VARCHAR(255);
+	table_full VARCHAR(600);
+	footprint_query TEXT;
+	conn_name TEXT;
 		
 BEGIN
-	-- Get the geometry field name of the external table
+	-- Connect to the external database, or reuse the connection of the session
+	conn_name = czs.czs_dblink_open(db_host, db_port, db_name, db_user, db_password);
+
+	-- Get the geometry field name and srid of the external table
 	SELECT *
 	FROM czs.dblink (
-	    'dbname=' || db_name || ' port=' || db_port || ' host=' || db_host || ' user=' || db_user || ' password=' || db_password,
-	    'SELECT f_geometry_column FROM geometry_columns'
-	) AS t1(geom_col VARCHAR(100)) INTO geom_field_name;
-	
-	-- Make a union of the geometries for the external table
+	    conn_name,
+	    'SELECT f_geometry_column, srid FROM geometry_columns WHERE f_table_schema = ' || quote_literal(schemaname) || ' AND f_table_name = ' || quote_literal(tablename) || ' ORDER BY f_geometry_column LIMIT 1'
+	) AS t1(geom_col VARCHAR(100), srid INTEGER) INTO geom_field_name, geom_srid;
+
+	geom_field = quote_ident(geom_field_name);
+	table_full = quote_ident(schemaname) || '.' || quote_ident(tablename);
+
+	-- Build the footprint query, from the most precise (and slowest) to the fastest
+	CASE COALESCE(footprint_mode, 'union')
+		WHEN 'union' THEN
+			-- The union of all the geometries
+			footprint_query = 'SELECT ST_UNION(' || geom_field || ') FROM ' || table_full;
+		WHEN 'simplified' THEN
+			-- The union of the geometries simplified at the tolerance (in the units of the table)
+			footprint_query = 'SELECT ST_UNION(ST_SimplifyPreserveTopology(' || geom_field || ', ' || footprint_param || ')) FROM ' || table_full;
+		WHEN 'grid' THEN
+			-- The union of the grid cells (of the given size, in the units of the table) holding geometries
+			footprint_query = 'SELECT ST_UNION(g.geom) FROM ST_SquareGrid(' || footprint_param || ', (SELECT ST_SetSRID(ST_Extent(' || geom_field || ')::geometry, ' || geom_srid || ') FROM ' || table_full || ')) AS g ' ||
+			                  'WHERE EXISTS (SELECT 1 FROM ' || table_full || ' t WHERE ST_Intersects(t.' || geom_field || ', g.geom))';
+		WHEN 'concave_hull' THEN
+			-- The concave hull of the geometries (the parameter being the target percent of the convex hull area)
+			footprint_query = 'SELECT ST_ConcaveHull(ST_Collect(' || geom_field || '), ' || COALESCE(footprint_param, 0.9) || ') FROM ' || table_full;
+		WHEN 'convex_hull' THEN
+			-- The convex hull of the geometries
+			footprint_query = 'SELECT ST_ConvexHull(ST_Collect(' || geom_field || ')) FROM ' || table_full;
+		WHEN 'envelope' THEN
+			-- The bounding box of the geometries
+			footprint_query = 'SELECT ST_SetSRID(ST_Extent(' || geom_field || ')::geometry, ' || geom_srid || ') FROM ' || table_full;
+		ELSE
+			RAISE EXCEPTION 'Invalid footprint mode %.', footprint_mode
+						   USING ERRCODE = 'XXQUA';
+	END CASE;
+
+	-- Make the footprint of the external table
 	SELECT *
 	FROM czs.dblink (
-	    'dbname=' || db_name || ' port=' || db_port || ' host=' || db_host || ' user=' || db_user || ' password=' || db_password,
-	    'SELECT ST_Transform(ST_UNION(' || geom_field_name || '), ' || out_crs || ') FROM ' || schemaname || '.' || tablename
+	    conn_name,
+	    'SELECT ST_Transform(f.geom, ' || out_crs || ') FROM (' || footprint_query || ') AS f(geom)'
 	) AS t1(geom GEOMETRY) INTO geom;
 	
 	
@@ -47,8 +138,11 @@ BEGIN
 	--SELECT ST_Multi(ST_Transform(ST_union(ST_Polygon(rast)), 4617)) FROM czs.raster_file_halifax_mask INTO geom;
 -------------
 	
-	IF ST_GeometryType(geom) <> 'ST_MultiPolygon' THEN
-	   geom = ST_Buffer(geom, 1); -- 0.00001 is 1 meter
+	-- Polygons are kept as is, the other geometries (points, lines) are buffered into polygons
+	IF ST_GeometryType(geom) IN ('ST_Polygon', 'ST_MultiPolygon') THEN
+	   geom = ST_Multi(geom);
+	ELSE
+	   geom = ST_Multi(ST_Buffer(geom, 1)); -- 0.00001 is 1 meter
 	END IF;
 	
 	RETURN geom;
@@ -57,6 +151,9 @@ END;$$
 
 
 																  																			  
+DROP PROCEDURE IF EXISTS czs.czs_add_collection_feature(uuid, uuid, VARCHAR, VARCHAR, VARCHAR, TEXT, TEXT, CHARACTER VARYING[], CHARACTER VARYING[], INTEGER, VARCHAR, VARCHAR, REAL[], VARCHAR, DATE, DATE, VARCHAR, VARCHAR, TEXT, TEXT, VARCHAR, VARCHAR, VARCHAR, CHARACTER VARYING[], VARCHAR, INTEGER, VARCHAR, VARCHAR, VARCHAR, CHARACTER VARYING[]);
+DROP PROCEDURE IF EXISTS czs.czs_add_collection_feature(uuid, uuid, VARCHAR, VARCHAR, VARCHAR, TEXT, TEXT, CHARACTER VARYING[], CHARACTER VARYING[], INTEGER, VARCHAR, VARCHAR, REAL[], VARCHAR, DATE, DATE, VARCHAR, VARCHAR, TEXT, TEXT, VARCHAR, VARCHAR, VARCHAR, CHARACTER VARYING[], VARCHAR, INTEGER, VARCHAR, VARCHAR, VARCHAR, CHARACTER VARYING[], VARCHAR, DOUBLE PRECISION);
+
 DELIMITER \\
 CREATE OR REPLACE PROCEDURE czs.czs_add_collection_feature(parent_uuid uuid, metadata_uuid uuid, coll_name VARCHAR(100), 
 																			  coll_title_en VARCHAR(255), coll_title_fr VARCHAR(255), coll_desc_en TEXT, coll_desc_fr TEXT,
@@ -65,7 +162,8 @@ CREATE OR REPLACE PROCEDURE czs.czs_add_collection_feature(parent_uuid uuid, met
 																			  extent_temporal_begin DATE, extent_temporal_end DATE,
 																	        link_type VARCHAR(255), link_rel VARCHAR(30), link_title TEXT, link_href TEXT, link_hreflang VARCHAR(30),
 																			  tablename VARCHAR(2550), data_id_field VARCHAR(255), data_queryables CHARACTER VARYING(255)[], 
-																			  db_host VARCHAR(255), db_port INTEGER, db_name VARCHAR(255), db_user VARCHAR(255), db_password VARCHAR(255), db_search_path CHARACTER VARYING(255)[])
+																			  db_host VARCHAR(255), db_port INTEGER, db_name VARCHAR(255), db_user VARCHAR(255), db_password VARCHAR(255), db_search_path CHARACTER VARYING(255)[],
+																			  footprint_mode VARCHAR(30), footprint_param DOUBLE PRECISION, footprint_geom GEOMETRY DEFAULT NULL)
 LANGUAGE plpgsql
 AS $$
 DECLARE
@@ -130,9 +228,13 @@ BEGIN
 			         USING ERRCODE = 'XXQUA';
    END;
 	
-	-- Calculate the geometry from the table features
+	-- Calculate the geometry from the table features, unless it was computed by the caller (e.g. partitioned union)
 	BEGIN
-		SELECT czs.czs_get_geometry_table(db_search_path[1], tablename, db_host, db_port, db_name, db_user, db_password, 4617) INTO geom;
+		IF footprint_geom IS NOT NULL THEN
+			geom = ST_Multi(ST_Transform(footprint_geom, 4617));
+		ELSE
+			SELECT czs.czs_get_geometry_table(db_search_path[1], tablename, db_host, db_port, db_name, db_user, db_password, 4617, footprint_mode, footprint_param) INTO geom;
+		END IF;
 		
    EXCEPTION
    	WHEN OTHERS THEN
@@ -148,9 +250,9 @@ BEGIN
 
 	-- Add the provider 'feature' specific information
 	INSERT INTO czs.provider_feature_postgres
-		(collection_uuid, max_extraction_area, max_feature_elements, data_queryables, data_id_field, data_table, data_host, data_port, data_dbname, data_user, data_password, data_search_path)
+		(collection_uuid, max_extraction_area, max_feature_elements, data_queryables, data_id_field, data_table, data_host, data_port, data_dbname, data_user, data_password, data_search_path, footprint_mode, footprint_param)
 		VALUES
-		(coll_uuid, 999, 20, data_queryables, data_id_field, tablename, db_host, db_port, db_name, db_user, db_password, db_search_path);
+		(coll_uuid, 999, 20, data_queryables, data_id_field, tablename, db_host, db_port, db_name, db_user, db_password, db_search_path, COALESCE(footprint_mode, 'union'), footprint_param);
 END;$$
 ;
 
@@ -281,8 +383,12 @@ END;$$
 ;
 
 
+DROP PROCEDURE IF EXISTS czs.czs_update_collection_geom(VARCHAR, NUMERIC);
+DROP PROCEDURE IF EXISTS czs.czs_update_collection_geom(VARCHAR, VARCHAR, DOUBLE PRECISION, NUMERIC);
+
+
 DELIMITER \\
-CREATE OR REPLACE PROCEDURE czs.czs_update_collection_geom(coll_name VARCHAR(255), INOUT res NUMERIC)
+CREATE OR REPLACE PROCEDURE czs.czs_update_collection_geom(coll_name VARCHAR(255), _footprint_mode VARCHAR(30), _footprint_param DOUBLE PRECISION, _footprint_geom GEOMETRY, INOUT res NUMERIC)
 LANGUAGE plpgsql
 AS $$
 DECLARE
@@ -293,6 +399,9 @@ DECLARE
 	db_name VARCHAR(100);
 	db_user VARCHAR(100);
 	db_password VARCHAR(100);
+	coll_uuid uuid;
+	mode VARCHAR(30);
+	param DOUBLE PRECISION;
 	geom_poly GEOMETRY(MultiPolygon,4617);
 	
 BEGIN
@@ -300,10 +409,25 @@ BEGIN
    SELECT INTO ds, tablename, db_host, db_port, db_name, db_user, db_password
 	       data_search_path[1], data_table, data_host, data_port, data_dbname, data_user, data_password 
 	FROM czs.v_czs_collections WHERE collection_name = coll_name AND provider_type = 'feature';
+
+	-- Query the footprint of the collection, unless a new one is given
+	SELECT INTO coll_uuid, mode, param
+	       c.collection_uuid, p.footprint_mode, p.footprint_param
+	FROM czs.czs_collection c JOIN czs.provider_feature_postgres p ON p.collection_uuid = c.collection_uuid
+	WHERE c.collection_name = coll_name;
+
+	IF _footprint_mode IS NOT NULL THEN
+		mode = _footprint_mode;
+		param = _footprint_param;
+	END IF;
    
-	-- Calculate the geometry from the table features
+	-- Calculate the geometry from the table features, unless it was computed by the caller (e.g. partitioned union)
 	BEGIN
-		SELECT czs.czs_get_geometry_table(ds, tablename, db_host, db_port, db_name, db_user, db_password, 4617) INTO geom_poly;
+		IF _footprint_geom IS NOT NULL THEN
+			geom_poly = ST_Multi(ST_Transform(_footprint_geom, 4617));
+		ELSE
+			SELECT czs.czs_get_geometry_table(ds, tablename, db_host, db_port, db_name, db_user, db_password, 4617, mode, param) INTO geom_poly;
+		END IF;
    EXCEPTION
    	WHEN OTHERS THEN
          RAISE EXCEPTION 'Unable to create the resulting geometry from the input table'
@@ -315,6 +439,11 @@ BEGIN
 	SET geom = geom_poly
 	WHERE collection_name = coll_name;
 	GET DIAGNOSTICS res = ROW_COUNT;
+
+	-- Keep the footprint for the next updates
+	UPDATE czs.provider_feature_postgres
+	SET footprint_mode = mode, footprint_param = param
+	WHERE collection_uuid = coll_uuid;
 END;$$
 ;
 
@@ -405,3 +534,43 @@ BEGIN
 	GET DIAGNOSTICS res = ROW_COUNT;
 END;$$
 ;
+
+
+CREATE TABLE IF NOT EXISTS czs.czs_job (
+	job_id uuid NOT NULL,
+	job_type VARCHAR(50) NOT NULL,
+	target VARCHAR(255),
+	state VARCHAR(20) NOT NULL,
+	created_date TIMESTAMP NOT NULL,
+	started_date TIMESTAMP,
+	finished_date TIMESTAMP,
+	error_status INTEGER,
+	error_en TEXT,
+	error_fr TEXT,
+	CONSTRAINT czs_job_pkey PRIMARY KEY (job_id)
+);
+CREATE INDEX IF NOT EXISTS czs_job_finished_date_idx ON czs.czs_job (finished_date);
+
+
+CREATE TABLE IF NOT EXISTS czs.czs_metadata_index (
+	metadata_uuid VARCHAR(255) NOT NULL,
+	title_en TEXT,
+	title_fr TEXT,
+	keywords_en TEXT,
+	keywords_fr TEXT,
+	topic VARCHAR(255),
+	srid VARCHAR(50),
+	extent JSONB,
+	temporal_extent JSONB,
+	cogs JSONB,
+	date_stamp VARCHAR(50),
+	harvested_date TIMESTAMP NOT NULL,
+	CONSTRAINT czs_metadata_index_pkey PRIMARY KEY (metadata_uuid)
+);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_title_en_prefix_idx ON czs.czs_metadata_index (lower(title_en) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_title_fr_prefix_idx ON czs.czs_metadata_index (lower(title_fr) text_pattern_ops);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_title_en_trgm_idx ON czs.czs_metadata_index USING GIN (title_en gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_title_fr_trgm_idx ON czs.czs_metadata_index USING GIN (title_fr gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_keywords_en_trgm_idx ON czs.czs_metadata_index USING GIN (keywords_en gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_keywords_fr_trgm_idx ON czs.czs_metadata_index USING GIN (keywords_fr gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS czs_metadata_index_harvested_date_idx ON czs.czs_metadata_index (harvested_date);
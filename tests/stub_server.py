@@ -0,0 +1,54 @@
+"""
+This module offers a stub HTTP server, on an ephemeral port, standing in for the catalog in the tests.
+"""
+
+# Core modules
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer(object):
+    """
+    Class representing a stub server answering the GET requests with scripted responses, in order. Once the script
+     is exhausted, the last response is repeated.
+    """
+
+    def __init__(self, responses):
+        """
+        Constructor
+
+        :param responses: A list of tuples (status code, body)
+        """
+        self.responses = list(responses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # Answer with the next response of the script
+                stub.requests.append(self.path)
+                status, body = stub.responses.pop(0) if len(stub.responses) > 1 else stub.responses[0]
+                payload = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                # Keep the output of the tests clean
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/csw"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
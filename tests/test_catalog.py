@@ -0,0 +1,101 @@
+"""
+Tests of the catalog client (retries and circuit breaker) against a stub catalog.
+
+Run from the root of a configured tree (core/config.py generated):
+    python -m pytest tests
+"""
+
+# Core modules
+import time
+
+# 3rd party imports
+import pytest
+
+# Application modules
+from core.catalog import CatalogClient
+from core.lib.circuit_breaker import CircuitBreaker
+from core.lib.exceptions import *
+from stub_server import StubServer
+
+
+def _client(url, retries=0, failures=2, reset=0.2):
+    # A client quick to give up, which doesn't wait between retries
+    return CatalogClient(url, 2, 1, 1, retries, 0, CircuitBreaker("test", failures, reset))
+
+
+def test_retry_succeeds_after_5xx():
+    with StubServer([(503, "busy"), (200, "<ok/>")]) as stub:
+        client = _client(stub.url, retries=2)
+
+        # The 503 is retried, the retry succeeds
+        assert client.get(stub.url) == "<ok/>"
+        assert len(stub.requests) == 2
+        assert client.stats()["retries"] == 1
+        assert client.stats()["failures"] == 0
+        assert client.breaker.state() == CircuitBreaker.CLOSED
+
+
+def test_4xx_is_not_retried():
+    with StubServer([(404, "not found")]) as stub:
+        client = _client(stub.url, retries=2)
+
+        # Refused by the catalog, not retried and not counted against the catalog
+        with pytest.raises(UserMessageException) as err:
+            client.get(stub.url)
+        assert err.value.code == 400
+        assert len(stub.requests) == 1
+        assert client.breaker.state() == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_and_fails_fast():
+    with StubServer([(500, "down")]) as stub:
+        client = _client(stub.url, retries=1, failures=2)
+
+        # Each call fails after its retry, the second one opens the circuit
+        for _ in range(2):
+            with pytest.raises(CatalogUnavailableException):
+                client.get(stub.url)
+        assert len(stub.requests) == 4
+        assert client.breaker.state() == CircuitBreaker.OPEN
+
+        # The next call fails right away, without reaching the catalog
+        with pytest.raises(CatalogUnavailableException):
+            client.get(stub.url)
+        assert len(stub.requests) == 4
+        assert client.stats()["short_circuited"] == 1
+
+
+def test_breaker_closes_after_successful_probe():
+    with StubServer([(500, "down"), (500, "down"), (200, "<ok/>")]) as stub:
+        client = _client(stub.url, failures=2, reset=0.2)
+        for _ in range(2):
+            with pytest.raises(CatalogUnavailableException):
+                client.get(stub.url)
+        assert client.breaker.state() == CircuitBreaker.OPEN
+
+        # Once the reset timeout elapsed, a probe goes through and closes the circuit
+        time.sleep(0.3)
+        assert client.get(stub.url) == "<ok/>"
+        assert client.breaker.state() == CircuitBreaker.CLOSED
+
+
+def test_unexpected_error_during_probe_settles_breaker(monkeypatch):
+    with StubServer([(500, "down"), (500, "down"), (200, "<ok/>")]) as stub:
+        client = _client(stub.url, failures=2, reset=0.2)
+        for _ in range(2):
+            with pytest.raises(CatalogUnavailableException):
+                client.get(stub.url)
+
+        # The probe fails with an error which isn't a requests one, the circuit opens again instead of staying half open
+        time.sleep(0.3)
+        session = client._get_session()
+        monkeypatch.setattr(session, "get", lambda *args, **kwargs: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            client.get(stub.url)
+        assert client.breaker.state() == CircuitBreaker.OPEN
+
+        # Once the reset timeout elapsed again, the next probe goes through
+        monkeypatch.undo()
+        time.sleep(0.3)
+        assert client.get(stub.url) == "<ok/>"
+        assert client.breaker.state() == CircuitBreaker.CLOSED
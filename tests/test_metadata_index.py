@@ -0,0 +1,101 @@
+"""
+Tests of the metadata harvest against a stub catalog, the database calls being recorded instead of run.
+
+Run from the root of a configured tree (core/config.py generated):
+    python -m pytest tests
+"""
+
+# 3rd party imports
+import pytest
+
+# Application modules
+from core import metadata_index
+from core.catalog import CatalogClient
+from core.lib.circuit_breaker import CircuitBreaker
+from stub_server import StubServer
+
+
+RECORD = '<gmd:MD_Metadata><gmd:fileIdentifier><gco:CharacterString>{uuid}</gco:CharacterString></gmd:fileIdentifier></gmd:MD_Metadata>'
+
+PAGE = '<csw:GetRecordsResponse xmlns:csw="http://www.opengis.net/cat/csw/2.0.2" xmlns:gmd="http://www.isotc211.org/2005/gmd" ' \
+       'xmlns:gco="http://www.isotc211.org/2005/gco"><csw:SearchResults numberOfRecordsMatched="{matched}" ' \
+       'nextRecord="{next}">{records}</csw:SearchResults></csw:GetRecordsResponse>'
+
+EXCEPTION_REPORT = '<ows:ExceptionReport xmlns:ows="http://www.opengis.net/ows" version="1.2.0"><ows:Exception ' \
+                   'exceptionCode="NoApplicableCode"><ows:ExceptionText>Too many requests</ows:ExceptionText>' \
+                   '</ows:Exception></ows:ExceptionReport>'
+
+
+def _page(matched, next_record, uuids):
+    return 200, PAGE.format(matched=matched, next=next_record, records="".join(RECORD.format(uuid=u) for u in uuids))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """
+    Records the pages upserted and the purges instead of running them.
+    """
+
+    calls = {"upserted": [], "purged": []}
+
+    def upsert_metadata_index(records, harvested_date):
+        calls["upserted"].append(records)
+        return len(records)
+
+    def purge_metadata_index(before_date):
+        calls["purged"].append(before_date)
+        return 1
+
+    monkeypatch.setattr(metadata_index.db_conn, "upsert_metadata_index", upsert_metadata_index)
+    monkeypatch.setattr(metadata_index.db_conn, "purge_metadata_index", purge_metadata_index)
+    return calls
+
+
+def _harvest(monkeypatch, stub):
+    # Harvest through a client which doesn't retry, by pages of 2 records
+    monkeypatch.setattr(metadata_index, "catalog_client",
+                        CatalogClient(stub.url, 2, 1, 1, 0, 0, CircuitBreaker("test", 5, 30)))
+    return metadata_index.harvest_catalog(stub.url, 2)
+
+
+def test_full_harvest_purges(monkeypatch, db):
+    with StubServer([_page(3, 3, ["a", "b"]), _page(3, 0, ["c"])]) as stub:
+        report = _harvest(monkeypatch, stub)
+
+    # Every record matched was read, the others are forgotten
+    assert report["pages"] == 2
+    assert report["indexed"] + report["unreadable"] == 3
+    assert report["complete"] is True
+    assert report["error"] is None
+    assert len(db["purged"]) == 1
+
+
+def test_exception_report_does_not_purge(monkeypatch, db):
+    with StubServer([_page(4, 3, ["a", "b"]), (200, EXCEPTION_REPORT)]) as stub:
+        report = _harvest(monkeypatch, stub)
+
+    # The harvest stopped on the exception report, nothing is forgotten
+    assert report["pages"] == 1
+    assert report["complete"] is False
+    assert report["error"]
+    assert db["purged"] == []
+
+
+def test_empty_page_does_not_purge(monkeypatch, db):
+    with StubServer([_page(4, 3, ["a", "b"]), _page(4, 5, [])]) as stub:
+        report = _harvest(monkeypatch, stub)
+
+    # The second page came back empty before the end, nothing is forgotten
+    assert report["pages"] == 2
+    assert report["complete"] is False
+    assert report["error"] is None
+    assert db["purged"] == []
+
+
+def test_empty_catalog_does_not_purge(monkeypatch, db):
+    with StubServer([_page(0, 0, [])]) as stub:
+        report = _harvest(monkeypatch, stub)
+
+    # A search matching nothing is more likely a catalog problem than an empty catalog
+    assert report["complete"] is False
+    assert db["purged"] == []
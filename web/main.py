@@ -24,6 +24,7 @@ from flask_babel import Babel, lazy_gettext as gettext, _
 
 # Application imports
 from routes import *
+from core.lib import encr
 
 
 # Create the Flask application
@@ -59,6 +60,9 @@ csrf = CSRFProtect(app)
 # Read the parameters
 app.jinja_env.globals["api_url"] = config.API_URL()
 
+# Calibrate the password hashing cost on this CPU (before uWSGI forks the workers)
+encr.calibrate()
+
 
 @babel.localeselector
 def get_locale():
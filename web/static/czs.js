@@ -90,7 +90,45 @@ function addParent(payload, successCallback, failedCallback) {
 
 function addCollection(payload, successCallback, failedCallback) {
      callAPI("PUT", "/collections", payload,
-        successCallback, failedCallback);   
+        function(res) {
+            // The collection is added in a background job, wait for it
+            waitJob(res.job_id, successCallback, failedCallback);
+        }, failedCallback);
+}
+
+// How often and how many times a job is checked before giving up on it (10 minutes)
+var WAIT_JOB_INTERVAL_MS = 2000;
+var WAIT_JOB_MAX_ATTEMPTS = 300;
+
+function waitJob(jobId, successCallback, failedCallback, attempt) {
+    attempt = attempt || 1;
+    callAPI("GET", "/jobs/" + jobId, null,
+        function(job) {
+            // If not finished, check again later, unless waited long enough
+            if (job.state == "queued" || job.state == "running") {
+                if (attempt >= WAIT_JOB_MAX_ATTEMPTS) {
+                    (failedCallback || _defaultFailedCallback)({ responseJSON: {
+                        status: 504,
+                        detail: "The job is taking too long, check its state later (job " + jobId + ")",
+                        detail_fr: "La tâche prend trop de temps, vérifiez son état plus tard (tâche " + jobId + ")"
+                    }});
+                    return;
+                }
+
+                setTimeout(function() {
+                    waitJob(jobId, successCallback, failedCallback, attempt + 1);
+                }, WAIT_JOB_INTERVAL_MS);
+            }
+
+            else if (job.state == "succeeded") {
+                (successCallback || _defaultSuccessCallback)(job);
+            }
+
+            else {
+                // Fail like the API call would have
+                (failedCallback || _defaultFailedCallback)({ responseJSON: job.error });
+            }
+        }, failedCallback);
 }
 
 //////////